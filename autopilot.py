@@ -0,0 +1,238 @@
+"""
+Piloto automático: rota pelos planetas ainda não visitados com cursos de
+interceptação. As órbitas são determinísticas, então as posições futuras de
+todos os planetas são avaliadas de uma vez em uma grade de tempo (array
+(T, m, 3)); o primeiro instante em que um planeta está ao alcance do
+foguete em linha reta, na velocidade máxima, é o instante de interceptação.
+A ordem das visitas é escolhida pelo vizinho mais rápido seguido de 2-opt
+(heurística do caixeiro-viajante, com custo dependente do horário de
+partida). O planejamento roda em uma thread própria e a rota fica em cache
+até algum corpo ser visitado; a cada tick só o trecho atual é reavaliado e
+convertido em eixos (frente, direita, giro), como os do teclado.
+"""
+import math
+import threading
+
+import numpy as np
+
+SUN_RADIUS = 5.0
+
+
+# Função para as posições futuras de planetas em órbita circular do Sol
+def planet_positions(distances, heights, angles, speeds, times, tick_dt):
+    """
+    :param distances: Raios das órbitas, shape (m,)
+    :param heights: Alturas (y) dos planetas, shape (m,)
+    :param angles: Ângulos de órbita atuais em graus, shape (m,)
+    :param speeds: Velocidades de órbita em graus por tick, shape (m,)
+    :param times: Instantes futuros em segundos, shape (T,)
+    :param tick_dt: Duração de um tick em segundos
+    :return: Posições, shape (T, m, 3)
+    """
+    theta = np.radians(angles[None, :] + speeds[None, :] * (times[:, None] / tick_dt))
+    positions = np.empty(theta.shape + (3,))
+    positions[..., 0] = distances * np.cos(theta)
+    positions[..., 1] = heights
+    positions[..., 2] = distances * np.sin(theta)
+    return positions
+
+
+# Função para os instantes de interceptação de vários alvos a partir de um ponto e horário
+def intercept_indices(start, first, positions, times, speed, reach):
+    """
+    :param start: Posição de partida, shape (3,)
+    :param first: Índice da grade no horário de partida
+    :param positions: Posições futuras dos alvos, shape (T, k, 3)
+    :param times: Grade de tempo em segundos, shape (T,)
+    :param speed: Velocidade do foguete (unidades por segundo)
+    :param reach: Distância de contato por alvo (raio do foguete + raio do planeta), shape (k,)
+    :return: Índice da grade da chegada por alvo, shape (k,); -1 se não alcança dentro da grade
+    """
+    gap = np.linalg.norm(positions[first:] - start, axis=-1) - reach            # (T', k)
+    flight = speed * (times[first:] - times[first])
+    reachable = gap <= flight[:, None]
+    found = reachable.any(axis=0)
+    return np.where(found, first + reachable.argmax(axis=0), -1)
+
+
+# Função para o tempo total de uma ordem de visitas (chegada no último alvo)
+def route_time(order, start, positions, times, speed, reach):
+    """
+    :return: Índice da grade da chegada no último alvo (len(times) se algum não for alcançado)
+    """
+    index, point = 0, start
+    for target in order:
+        index = int(intercept_indices(point, index, positions[:, target:target + 1], times, speed,
+                                      reach[target:target + 1])[0])
+        if index < 0:
+            return len(times)
+        point = positions[index, target]
+    return index
+
+
+# Função para ordenar os alvos: vizinho mais rápido e melhorias 2-opt
+def plan_route(start, positions, times, speed, reach):
+    """
+    :return: Lista com os índices dos alvos na ordem de visita
+    """
+    remaining = list(range(positions.shape[1]))
+    order = []
+    index, point = 0, start
+    # Vizinho mais rápido: cada passo avalia todos os alvos restantes de uma vez
+    while remaining:
+        arrivals = intercept_indices(point, index, positions[:, remaining], times, speed, reach[remaining])
+        arrivals = np.where(arrivals < 0, len(times), arrivals)
+        best = int(np.argmin(arrivals))
+        target = remaining.pop(best)
+        order.append(target)
+        if arrivals[best] >= len(times):
+            order.extend(remaining)  # Fora do horizonte: o resto segue na ordem original
+            break
+        index = int(arrivals[best])
+        point = positions[index, target]
+
+    # 2-opt: inverter trechos enquanto o tempo total diminuir
+    best_time = route_time(order, start, positions, times, speed, reach)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                candidate_time = route_time(candidate, start, positions, times, speed, reach)
+                if candidate_time < best_time:
+                    order, best_time = candidate, candidate_time
+                    improved = True
+    return order
+
+
+# Classe para o piloto automático: planejamento em segundo plano e condução a cada tick
+class Autopilot:
+    def __init__(self, tick_dt, horizon=90.0, step=1.0 / 30.0, clearance=1.5):
+        """
+        :param tick_dt: Duração de um tick da simulação em segundos
+        :param horizon: Até quantos segundos à frente procurar interceptações
+        :param step: Passo da grade de tempo em segundos
+        :param clearance: Folga além do raio do Sol ao desviar dele
+        """
+        self.tick_dt = tick_dt
+        self.times = np.arange(0.0, horizon, step)
+        self.clearance = clearance
+        self.engaged = False
+        self.synchronous = False  # Gravação/replay: planejar no próprio tick (determinístico)
+        self.route = None         # (alvos pendentes, nomes na ordem de visita)
+        self.planning = None
+        self.guidance = None      # (alvo, ponto de interceptação, segundos até lá), lido pelo HUD
+        self.command = (0.0, 0.0, 0.0)
+
+    def toggle(self):
+        self.engaged = not self.engaged
+        if not self.engaged:
+            self.command = (0.0, 0.0, 0.0)
+
+    def axes(self):
+        """
+        Mesma interface do InputSystem: eixos (frente, direita, giro) deste tick.
+        """
+        return self.command
+
+    def update(self, player, planets):
+        """
+        Chamado a cada tick da simulação: atualiza a rota, o alvo, o ponto de interceptação e os eixos.
+        :param player: Foguete conduzido
+        :param planets: Planetas (os não visitados são os alvos)
+        """
+        targets = [p for p in planets if p.name not in player.planetas_coletados]
+        if not targets:
+            self.guidance = None
+            self.command = (0.0, 0.0, 0.0)
+            return
+        pending = frozenset(p.name for p in targets)
+        route = self.route
+        if route is None or route[0] != pending:
+            self._request(pending, player, targets)
+            route = self.route
+
+        # Próximo alvo: o primeiro pendente da rota em cache (a antiga serve enquanto a nova é
+        # planejada) ou, sem rota ainda, o mais rápido de alcançar agora
+        by_name = {p.name: p for p in targets}
+        order = [] if route is None else [name for name in route[1] if name in by_name]
+        candidates = [by_name[order[0]]] if order else targets
+        positions = self._positions(candidates)
+        reach = np.array([player.size + p.size for p in candidates])
+        arrivals = intercept_indices(player.position, 0, positions, self.times, self._speed(player), reach)
+        arrivals = np.where(arrivals < 0, len(self.times) - 1, arrivals)
+        best = int(np.argmin(arrivals))
+        waypoint = positions[arrivals[best], best]
+        # Uma única atribuição: a renderização pode ler de outra thread
+        self.guidance = (candidates[best].name, waypoint, float(self.times[arrivals[best]]))
+        self.command = self._steer(player, waypoint) if self.engaged else (0.0, 0.0, 0.0)
+
+    def _speed(self, player):
+        return player.max_speed * player.speed
+
+    def _positions(self, bodies):
+        return planet_positions(np.array([b.distance for b in bodies]), np.array([b.size for b in bodies]),
+                                np.array([b.orbit_angle for b in bodies]),
+                                np.array([b.orbit_speed for b in bodies]), self.times, self.tick_dt)
+
+    def _request(self, pending, player, targets):
+        if self.planning == pending:
+            return  # Já em planejamento
+        # Cópia do estado: a thread não lê objetos que a simulação está alterando
+        snapshot = (pending, player.position.copy(), self._speed(player), [p.name for p in targets],
+                    self._positions(targets), np.array([player.size + p.size for p in targets]))
+        self.planning = pending
+        if self.synchronous:
+            self._plan(*snapshot)
+        else:
+            threading.Thread(target=self._plan, args=snapshot, daemon=True).start()
+
+    def _plan(self, pending, start, speed, names, positions, reach):
+        order = plan_route(start, positions, self.times, speed, reach)
+        self.route = (pending, [names[i] for i in order])
+        if self.planning == pending:
+            self.planning = None
+
+    def _steer(self, player, waypoint):
+        position = player.position * [1.0, 0.0, 1.0]  # Voo no plano da órbita
+        aim = waypoint * [1.0, 0.0, 1.0]
+        safe = SUN_RADIUS + player.size + self.clearance
+        # Desviar do Sol: se o trecho reto passa perto dele, mirar em um ponto ao lado
+        segment = aim - position
+        length = np.linalg.norm(segment)
+        if length > 0:
+            closest = position + np.clip(-np.dot(position, segment) / (length * length), 0.0, 1.0) * segment
+            distance = np.linalg.norm(closest)
+            if distance < safe:
+                side = closest / distance if distance > 1e-6 else np.array([-segment[2], 0.0, segment[0]]) / length
+                aim = side * safe * 1.5
+
+        dx, dz = aim[0] - position[0], aim[2] - position[2]
+        desired = math.degrees(math.atan2(dx, -dz))  # Frente do foguete: (sen yaw, 0, -cos yaw)
+        diff = (desired - player.yaw + 180.0) % 360.0 - 180.0
+        turn = float(np.clip(diff / (player.turn_rate * self.tick_dt), -1.0, 1.0))
+        forward = 1.0 if abs(diff) < 45.0 else 0.2  # Virar quase parado quando o alvo está de lado
+
+        # Frear se a velocidade atual levar ao Sol no próximo segundo (a aceleração é limitada)
+        velocity = player.velocity * [1.0, 0.0, 1.0]
+        speed2 = np.dot(velocity, velocity)
+        if speed2 > 0:
+            ahead = position + velocity * np.clip(-np.dot(position, velocity) / speed2, 0.0, 1.0)
+            if np.linalg.norm(ahead) < SUN_RADIUS + player.size + 0.5:
+                forward = 0.0
+        return forward, 0.0, turn
+
+    def reset(self):
+        """
+        Descarta a rota em cache (estado restaurado de um keyframe).
+        """
+        self.route = None
+        self.planning = None
+
+    def route_names(self, visited):
+        """
+        :param visited: Nomes já visitados (saem da rota em cache)
+        """
+        route = self.route
+        return [] if route is None else [name for name in route[1] if name not in visited]
@@ -0,0 +1,94 @@
+"""
+Compara a colisão contínua (esfera varrida, um teste por tick) com o
+subpasso ingênuo (k testes discretos por tick) em sistemas sintéticos:
+custo por tick e porcentagem de contatos perdidos (tunelamento).
+
+Uso: python benchmarks/bench_ccd.py [--ticks 2000] [--speed 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import collision
+
+ROCKET_RADIUS = 1.5
+
+
+def make_ticks(rng, n_bodies, n_ticks, speed):
+    """
+    Gera ticks aleatórios: segmento do foguete e corpos pequenos em movimento.
+    """
+    extent = max(20.0, n_bodies ** (1 / 3) * 6.0)
+    ticks = []
+    for _ in range(n_ticks):
+        p0 = rng.uniform(-extent, extent, 3)
+        direction = rng.normal(size=3)
+        p1 = p0 + direction / np.linalg.norm(direction) * speed
+        c0 = rng.uniform(-extent, extent, (n_bodies, 3))
+        c1 = c0 + rng.normal(scale=0.5, size=(n_bodies, 3))
+        radii = rng.uniform(0.2, 1.0, n_bodies)  # corpos do tamanho da Lua/Mercúrio
+        ticks.append((p0, p1, c0, c1, radii))
+    return ticks
+
+
+def substep_hits(p0, p1, c0, c1, radii, k):
+    hit = np.zeros(len(radii), dtype=bool)
+    for s in range(1, k + 1):
+        t = s / k
+        p = p0 + (p1 - p0) * t
+        c = c0 + (c1 - c0) * t
+        hit |= np.linalg.norm(p - c, axis=1) < ROCKET_RADIUS + radii
+    return hit
+
+
+def swept_hits(p0, p1, c0, c1, radii):
+    return np.isfinite(collision.swept_sphere_toi(p0, p1, ROCKET_RADIUS, c0, c1, radii))
+
+
+def bench(n_bodies, n_ticks, speed, substeps):
+    rng = np.random.default_rng(42)
+    ticks = make_ticks(rng, n_bodies, n_ticks, speed)
+
+    # Referência: o teste varrido é exato para o movimento linear dentro do tick
+    truth = [swept_hits(*tick) for tick in ticks]
+    total = sum(int(h.sum()) for h in truth)
+
+    rows = []
+    started = time.perf_counter()
+    for tick in ticks:
+        swept_hits(*tick)
+    rows.append(("varrida (CCD)", (time.perf_counter() - started) / n_ticks, 0))
+
+    for k in substeps:
+        started = time.perf_counter()
+        results = [substep_hits(*tick, k) for tick in ticks]
+        elapsed = (time.perf_counter() - started) / n_ticks
+        missed = sum(int((t & ~r).sum()) for t, r in zip(truth, results))
+        rows.append((f"subpasso k={k}", elapsed, missed))
+    return total, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--speed', type=float, default=20.0, help="Distância percorrida por tick")
+    parser.add_argument('--bodies', type=int, nargs='+', default=[10, 1000])
+    parser.add_argument('--substeps', type=int, nargs='+', default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    for n in args.bodies:
+        total, rows = bench(n, args.ticks, args.speed, args.substeps)
+        print(f"\n{n} corpos, {args.ticks} ticks, velocidade {args.speed}/tick, {total} contatos reais")
+        print(f"{'método':>16} {'µs/tick':>10} {'perdidos':>10}")
+        for name, per_tick, missed in rows:
+            pct = 100.0 * missed / total if total else 0.0
+            print(f"{name:>16} {per_tick * 1e6:>10.1f} {missed:>6} ({pct:4.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Micro-benchmarks dos caminhos quentes da simulação e do layout de texto:
+Planet.get_position (com cadeias de pais), Planet.update,
+Player.check_collision, Player.move_player, split_text nos textos de
+informação e o teste de proximidade do display (nearby_bodies), sem janela,
+em sistemas sintéticos de 10, 1 mil e 100 mil corpos. Para cada caso mostra
+ns por chamada, a memória alocada em uma chamada (pico do tracemalloc) e o
+expoente da curva de escala (0 = custo constante, 1 = linear no número de
+corpos). Os resultados podem ser salvos em JSON e comparados com a linha de
+base versionada; uma regressão acima do limite faz o script sair com código 1.
+
+Uso: python benchmarks/bench_hot_paths.py [--sizes 10 1000 100000] [--threshold 0.5]
+                                          [--output resultado.json] [--save-baseline]
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+main.headless = True  # Sem contexto OpenGL: nenhuma textura é carregada
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_hot_paths.json")
+
+
+def make_system(n_bodies, seed=42):
+    """
+    Gera um sistema sintético: ~70% planetas em órbita do Sol e ~30% luas
+    de um corpo anterior qualquer (que pode ser outra lua, formando cadeias).
+    """
+    rng = np.random.default_rng(seed)
+    random.seed(seed)  # Ângulos iniciais sorteados pelo Planet
+    extent = 10.0 + math.sqrt(n_bodies) * 5.0
+    bodies = []
+    for i in range(n_bodies):
+        parent = None
+        if bodies and rng.random() < 0.3:
+            parent = bodies[int(rng.integers(len(bodies)))]
+        bodies.append(main.Planet(
+            name=f"corpo {i}",
+            color=[1.0, 1.0, 1.0],
+            size=float(rng.uniform(0.2, 1.0) if parent else rng.uniform(0.5, 3.0)),
+            distance=float(rng.uniform(2.0, 4.0) if parent else rng.uniform(10.0, extent)),
+            orbit_speed=float(rng.uniform(0.05, 2.0)),
+            rotation_speed=float(rng.uniform(0.5, 3.0)),
+            texture_file="",
+            info="",
+            parent=parent,
+        ))
+    return bodies
+
+
+def chain_depth(body):
+    depth = 0
+    while body.parent is not None:
+        body, depth = body.parent, depth + 1
+    return depth
+
+
+def system_cases(bodies):
+    """
+    Casos que dependem do tamanho do sistema.
+    :return: Dicionário nome -> (lote, chamadas por lote, chamada única)
+    """
+    deepest = max(bodies, key=chain_depth)
+
+    def positions():
+        for body in bodies:
+            body.get_position()
+
+    def updates():
+        for body in bodies:
+            body.update()
+
+    # Foguete longe de tudo: o custo medido é o do teste completo, sem fim de jogo
+    player = main.Player([0.0, 1e7, 0.0])
+    player.previous_position = player.position.copy()
+    previous = main.collision.body_positions(bodies)
+
+    frame = [(body, np.array(body.get_position())) for body in bodies]
+    position = np.array([0.0, 2.0, 50.0])
+
+    return {
+        "Planet.get_position": (positions, len(bodies), deepest.get_position),
+        "Planet.update": (updates, len(bodies), bodies[-1].update),
+        "Player.check_collision": ((lambda: player.check_collision(bodies, previous)), 1,
+                                   (lambda: player.check_collision(bodies, previous))),
+        "nearby_bodies": ((lambda: main.nearby_bodies(frame, position)), 1,
+                          (lambda: main.nearby_bodies(frame, position))),
+    }
+
+
+def fixed_cases():
+    """
+    Casos que não dependem do tamanho do sistema (medidos uma vez).
+    """
+    main.planets.clear()
+    main.moons.clear()
+    main.create_celestial_bodies()
+    texts = [body.info for body in main.planets + main.moons]
+    longest = max(texts, key=len)
+
+    def layout():
+        for text in texts:
+            main.split_text(text)
+
+    player = main.Player([0.0, 2.0, 50.0])
+
+    def moves():
+        for _ in range(1000):
+            player.move_player(1.0, 0.5)
+
+    return {
+        "split_text": (layout, len(texts), lambda: main.split_text(longest)),
+        "Player.move_player": (moves, 1000, lambda: player.move_player(1.0, 0.5)),
+    }
+
+
+def ns_per_call(batch, calls, min_time, repeats):
+    """
+    Dobra o número de lotes até um ciclo durar min_time e fica com o menor de
+    `repeats` ciclos (como o timeit, com o coletor de lixo desligado).
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(loops):
+                batch()
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+            loops *= 2
+        best = elapsed
+        for _ in range(repeats - 1):
+            started = time.perf_counter()
+            for _ in range(loops):
+                batch()
+            best = min(best, time.perf_counter() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best / (loops * calls) * 1e9
+
+
+def allocations(single):
+    """
+    Memória de uma chamada medida pelo tracemalloc.
+    :return: (bytes no pico acima do início, blocos que continuam vivos depois)
+    """
+    single()  # Aquecimento: caches e imports fora da medição
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        blocks_before = len(tracemalloc.take_snapshot().traces)
+        tracemalloc.reset_peak()
+        single()
+        _, peak = tracemalloc.get_traced_memory()
+        blocks_after = len(tracemalloc.take_snapshot().traces)
+    finally:
+        tracemalloc.stop()
+    return peak - before, max(0, blocks_after - blocks_before)
+
+
+def measure(cases, min_time, repeats):
+    results = {}
+    for name, (batch, calls, single) in cases.items():
+        bytes_per_call, retained = allocations(single)
+        results[name] = {
+            "ns_por_chamada": ns_per_call(batch, calls, min_time, repeats),
+            "bytes_por_chamada": bytes_per_call,
+            "blocos_retidos": retained,
+        }
+    return results
+
+
+def scaling(results, sizes):
+    """
+    Expoente da curva ns x corpos (inclinação em escala log-log entre o menor e o maior sistema).
+    """
+    curves = {}
+    if len(sizes) < 2:
+        return curves
+    small, large = str(min(sizes)), str(max(sizes))
+    for name, by_size in results.items():
+        if small in by_size and large in by_size:
+            ratio = by_size[large]["ns_por_chamada"] / by_size[small]["ns_por_chamada"]
+            curves[name] = math.log(ratio) / math.log(max(sizes) / min(sizes))
+    return curves
+
+
+def compare(results, baseline, threshold):
+    """
+    :return: Lista de regressões (caso, tamanho, métrica, valor da base, valor atual)
+    """
+    regressions = []
+    for name, by_size in results.items():
+        for size, current in by_size.items():
+            base = baseline.get("resultados", {}).get(name, {}).get(size)
+            if base is None:
+                continue
+            if current["ns_por_chamada"] > base["ns_por_chamada"] * (1.0 + threshold):
+                regressions.append((name, size, "ns_por_chamada", base["ns_por_chamada"], current["ns_por_chamada"]))
+            # Alocações são quase determinísticas: só diferenças de mais de 64 bytes contam
+            limit = max(base["bytes_por_chamada"] * (1.0 + threshold), base["bytes_por_chamada"] + 64)
+            if current["bytes_por_chamada"] > limit:
+                regressions.append((name, size, "bytes_por_chamada", base["bytes_por_chamada"],
+                                    current["bytes_por_chamada"]))
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--min-time', type=float, default=0.1, help="Duração mínima de cada ciclo medido (s)")
+    parser.add_argument('--repeats', type=int, default=7)
+    # Micro-benchmarks variam bastante entre execuções na mesma máquina: limite folgado por padrão
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help="Piora relativa tolerada em relação à linha de base (0.5 = 50%%)")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--output', help="Arquivo JSON para salvar os resultados")
+    parser.add_argument('--save-baseline', action='store_true', help="Sobrescreve a linha de base com esta execução")
+    args = parser.parse_args()
+
+    results = {}
+    depths = {}
+    for n in args.sizes:
+        bodies = make_system(n)
+        depths[n] = max(chain_depth(body) for body in bodies)
+        for name, values in measure(system_cases(bodies), args.min_time, args.repeats).items():
+            results.setdefault(name, {})[str(n)] = values
+    for name, values in measure(fixed_cases(), args.min_time, args.repeats).items():
+        results[name] = {"fixo": values}
+    curves = scaling(results, args.sizes)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "maquina": platform.machine(),
+        "profundidade_maxima": {str(n): d for n, d in depths.items()},
+        "resultados": results,
+        "escala": curves,
+    }
+
+    print(f"{'caso':>24} {'corpos':>8} {'ns/chamada':>12} {'bytes/chamada':>14} {'blocos retidos':>15}")
+    for name, by_size in results.items():
+        for size, values in by_size.items():
+            print(f"{name:>24} {size:>8} {values['ns_por_chamada']:>12.1f} "
+                  f"{values['bytes_por_chamada']:>14} {values['blocos_retidos']:>15}")
+    print("\nCurvas de escala (expoente de ns/chamada em relação ao número de corpos):")
+    for name, exponent in curves.items():
+        print(f"{name:>24} {exponent:>6.2f}")
+    print("Profundidade máxima das cadeias de pais: "
+          + ", ".join(f"{n} corpos = {d}" for n, d in depths.items()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nLinha de base salva em {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nSem linha de base em {args.baseline} (use --save-baseline)")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"\nSem regressões acima de {args.threshold:.0%} em relação à linha de base")
+        return
+    print(f"\nRegressões acima de {args.threshold:.0%} em relação à linha de base:")
+    for name, size, metric, base, current in regressions:
+        print(f"{name:>24} {size:>8} {metric}: {base:.1f} -> {current:.1f} ({current / base - 1.0:+.0%})")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,67 @@
+"""
+Custo de CPU por quadro do sistema de partículas, sem janela: emissão,
+atualização vetorizada e preparo do envio (posições relativas à câmera e
+cores) com o sistema em regime (partículas nascendo e morrendo), comparado
+com o orçamento de 1 ms por quadro.
+
+Uso: python benchmarks/bench_particles.py [--live 1000 10000 50000] [--frames 600]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from particles import ParticleSystem
+
+FRAME_DT = 1.0 / 60
+LIFETIME = 1.0
+BUDGET_MS = 1.0
+
+
+def bench(live, frames):
+    system = ParticleSystem(capacity=live, seed=42)
+    # Vida média de 80% do máximo: emitir o suficiente para manter ~live partículas vivas
+    per_frame = live * FRAME_DT / (LIFETIME * 0.8)
+    eye = np.array([10.0, 5.0, 30.0])
+    pending = 0.0
+    costs = {"emissão": 0.0, "atualização": 0.0, "envio": 0.0}
+    for frame in range(frames + 120):
+        measuring = frame >= 120  # Dois segundos de aquecimento até o regime
+        pending += per_frame
+        count = int(pending)
+        pending -= count
+        started = time.perf_counter()
+        system.emit(count, (0.0, 0.0, 0.0), (0.0, 0.0, -6.0), 1.0, LIFETIME, (1.0, 0.6, 0.2, 0.9))
+        emitted = time.perf_counter()
+        system.update(FRAME_DT)
+        updated = time.perf_counter()
+        system.stage(eye)
+        staged = time.perf_counter()
+        if measuring:
+            costs["emissão"] += emitted - started
+            costs["atualização"] += updated - emitted
+            costs["envio"] += staged - updated
+    return system.count, system.high, {name: total / frames * 1000.0 for name, total in costs.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--live', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--frames', type=int, default=600)
+    args = parser.parse_args()
+
+    print(f"{'vivas':>8} {'vértices':>9} {'emissão':>9} {'atualiz.':>9} {'envio':>9} {'total ms':>9}")
+    for live in args.live:
+        count, high, costs = bench(live, args.frames)
+        total = sum(costs.values())
+        flag = "" if total <= BUDGET_MS else f"  acima do orçamento de {BUDGET_MS:.0f} ms"
+        print(f"{count:>8} {high:>9} {costs['emissão']:>9.3f} {costs['atualização']:>9.3f} "
+              f"{costs['envio']:>9.3f} {total:>9.3f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Custo da telemetria no quadro: mede as atualizações feitas a cada quadro
+(histogramas, medidores e contador) sem servidor, com o servidor ocioso e
+durante coletas contínuas, e o tempo de uma coleta em /metrics.
+
+Uso: python benchmarks/bench_telemetry.py [--frames 200000]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry import MetricsRegistry, MetricsServer
+
+
+def build_registry():
+    metrics = MetricsRegistry()
+    frame = metrics.histogram("frame_time_ms", "Tempo de CPU por quadro (ms)", [2, 4, 8, 12, 16.7, 25, 33.3, 50, 100])
+    tick = metrics.histogram("sim_tick_ms", "Tempo de um tick (ms)", [0.25, 0.5, 1, 2, 4, 8, 16])
+    frames = metrics.counter("frames_total", "Quadros desenhados")
+    gauges = [metrics.gauge(f"gauge_{i}", "Medidor") for i in range(3)]
+    metrics.gauge("elapsed_seconds", "Tempo de jogo (s)", time.time)
+    return metrics, frame, tick, frames, gauges
+
+
+def per_frame_cost(frames_count, frame, tick, frames, gauges):
+    # Mesmas atualizações que display() e simulation_step() fazem por quadro
+    started = time.perf_counter()
+    for i in range(frames_count):
+        frames.inc()
+        frame.observe(i % 40 * 0.5)
+        tick.observe(i % 10 * 0.1)
+        for gauge in gauges:
+            gauge.set(i)
+    return (time.perf_counter() - started) / frames_count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=200000)
+    args = parser.parse_args()
+
+    metrics, frame, tick, frames, gauges = build_registry()
+    baseline = per_frame_cost(args.frames, frame, tick, frames, gauges)
+    print(f"Atualizações por quadro, sem servidor:        {baseline:.2f} µs")
+
+    server = MetricsServer(metrics, port=0)
+    server.start()
+    idle = per_frame_cost(args.frames, frame, tick, frames, gauges)
+    print(f"Atualizações por quadro, servidor ocioso:     {idle:.2f} µs "
+          f"({idle / 16667 * 100:.4f}% de um quadro de 60 Hz)")
+
+    url = f"http://127.0.0.1:{server.port}/metrics"
+    stop = threading.Event()
+    scrape_times = []
+
+    def scraper():
+        while not stop.is_set():
+            started = time.perf_counter()
+            urllib.request.urlopen(url).read()
+            scrape_times.append(time.perf_counter() - started)
+
+    thread = threading.Thread(target=scraper, daemon=True)
+    thread.start()
+    busy = per_frame_cost(args.frames, frame, tick, frames, gauges)
+    stop.set()
+    thread.join()
+    print(f"Atualizações por quadro, coleta contínua:     {busy:.2f} µs")
+    print(f"Coleta de /metrics: {sum(scrape_times) / len(scrape_times) * 1000:.2f} ms em média "
+          f"({len(scrape_times)} coletas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Teste de carga do servidor de simulação: mede o custo por tick e a banda
+enviada com 1, 10 e 100 clientes simulados conectados em localhost, com a
+parte de cada tipo de mensagem (keyframes, deltas e placar).
+
+Uso: python benchmarks/load_test_server.py [--duration 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import network
+import server
+
+
+async def simulated_client(port, stop_event, received):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    base = None
+    try:
+        while not stop_event.is_set():
+            # Um comando aleatório a cada ~100 ms, como um jogador segurando teclas
+            if random.random() < 0.2:
+                writer.write(network.encode_frame(network.MSG_INPUT, random.choice('wsadqeWSADQE').encode('ascii')))
+            try:
+                header = await asyncio.wait_for(reader.readexactly(network.FRAME_HEADER.size), 0.05)
+            except asyncio.TimeoutError:
+                continue
+            length, msg_type = network.FRAME_HEADER.unpack(header)
+            payload = await reader.readexactly(length)
+            received[0] += len(header) + length
+            received[msg_type] = received.get(msg_type, 0) + len(header) + length
+            # Decodificar como o renderizador faria, para validar o fluxo de deltas
+            if msg_type == network.MSG_KEYFRAME:
+                base = network.Snapshot.decode_keyframe(payload)
+            elif msg_type == network.MSG_DELTA:
+                base = network.Snapshot.decode_delta(payload, base)
+    finally:
+        writer.close()
+
+
+async def run_load(n_clients, duration, snapshot_rate):
+    sim = server.SimulationServer(snapshot_rate=snapshot_rate, seed=1234)
+    tcp = await asyncio.start_server(sim.handle_client, '127.0.0.1', 0)
+    port = tcp.sockets[0].getsockname()[1]
+    stop_event = asyncio.Event()
+    received = {0: 0}  # 0 = total; demais chaves = tipo de mensagem
+
+    sim_task = asyncio.create_task(sim.run(stop_event))
+    clients = [asyncio.create_task(simulated_client(port, stop_event, received)) for _ in range(n_clients)]
+    await asyncio.sleep(0.5)  # conexões estabelecidas
+    sim.tick_costs.clear()
+    start = dict(received)
+    await asyncio.sleep(duration)
+    stats = sim.stats()
+    total = received[0] - start[0]
+    by_type = {msg_type: count - start.get(msg_type, 0) for msg_type, count in received.items() if msg_type}
+
+    stop_event.set()
+    await asyncio.gather(sim_task, *clients, return_exceptions=True)
+    tcp.close()
+    await tcp.wait_closed()
+
+    stats['kbps_total'] = total * 8 / 1000.0 / duration
+    stats['kbps_por_cliente'] = stats['kbps_total'] / n_clients
+    for name, msg_type in (('keyframes', network.MSG_KEYFRAME), ('deltas', network.MSG_DELTA),
+                           ('placar', network.MSG_LEADERBOARD)):
+        stats[f'kbps_{name}'] = by_type.get(msg_type, 0) * 8 / 1000.0 / duration
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--snapshot-rate', type=int, default=20)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"{'clientes':>8} {'tick médio (ms)':>16} {'tick p99 (ms)':>14} {'kbit/s total':>13} {'kbit/s/cliente':>15} "
+          f"{'keyframes':>10} {'deltas':>10} {'placar':>10} {'descartados':>12}")
+    for n in args.clients:
+        stats = asyncio.run(run_load(n, args.duration, args.snapshot_rate))
+        print(f"{n:>8} {stats['tick_medio_ms']:>16.3f} {stats['tick_p99_ms']:>14.3f} "
+              f"{stats['kbps_total']:>13.1f} {stats['kbps_por_cliente']:>15.2f} {stats['kbps_keyframes']:>10.1f} "
+              f"{stats['kbps_deltas']:>10.1f} {stats['kbps_placar']:>10.1f} {stats['snapshots_descartados']:>12}")
+
+
+if __name__ == "__main__":
+    main()
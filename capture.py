@@ -0,0 +1,246 @@
+"""
+Captura de tela e vídeo sem travar o pipeline: cada quadro é lido para um
+pixel buffer object (PBO) em rodízio e só é mapeado um ou dois quadros
+depois, quando a cópia da GPU já terminou. A codificação (sequência PNG ou
+quadros brutos enviados a um codificador local, como o ffmpeg) roda em
+threads de fundo com uma fila limitada; quadros que não cabem na fila são
+descartados e contados. Os quadros ainda nos PBOs ao parar a gravação
+esperam vaga na fila, em vez de serem descartados.
+"""
+import ctypes
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+from PIL import Image
+from OpenGL.GL import *
+
+from resources import BUFFER, registry
+
+
+# Classe para ler quadros da GPU de forma assíncrona com PBOs
+class PboReader:
+    def __init__(self, count=3):
+        """
+        :param count: Quantidade de PBOs (2 = resultado com 1 quadro de atraso, 3 = 2 quadros)
+        """
+        self.count = count
+        self.pbos = None
+        self.size = None
+        self.pending = []  # (pbo, largura, altura, etiqueta) na ordem de leitura
+        self.index = 0
+
+    def _allocate(self, width, height):
+        if self.pbos is None:
+            self.pbos = list(glGenBuffers(self.count))
+        nbytes = width * height * 3
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, nbytes, None, GL_STREAM_READ)
+            registry.register(BUFFER, pbo, nbytes, "PBO de captura", owner=self)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.size = (width, height)
+        self.pending.clear()
+
+    def read(self, width, height, tag=None):
+        """
+        Inicia a leitura do quadro atual e devolve o quadro mais antigo já pronto.
+        :return: (largura, altura, bytes RGB de baixo para cima, etiqueta) ou None
+        """
+        if self.size != (width, height):
+            self._allocate(width, height)
+        ready = None
+        if len(self.pending) == self.count:
+            ready = self._map(*self.pending.pop(0))
+
+        pbo = self.pbos[self.index]
+        self.index = (self.index + 1) % self.count
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.pending.append((pbo, width, height, tag))
+        return ready
+
+    def release(self):
+        if self.pbos is not None:
+            for pbo in self.pbos:
+                registry.release(BUFFER, pbo)
+            self.pbos = None
+
+    def flush(self):
+        """
+        Devolve todos os quadros ainda pendentes (ao parar a gravação).
+        """
+        frames = [self._map(*entry) for entry in self.pending]
+        self.pending.clear()
+        return frames
+
+    def _map(self, pbo, width, height, tag):
+        nbytes = width * height * 3
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        pointer = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        data = ctypes.string_at(pointer, nbytes) if pointer else None
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        if data is None:
+            return None
+        return width, height, data, tag
+
+
+# Classe para codificar quadros em threads de fundo com fila limitada
+class FrameEncoder:
+    def __init__(self, output, video=False, fps=60, workers=2, queue_size=8, prefix="quadro"):
+        """
+        :param output: Diretório (sequência PNG) ou arquivo de vídeo (codificador externo)
+        :param video: Enviar quadros brutos ao ffmpeg em vez de gravar PNGs
+        :param fps: Taxa de quadros informada ao codificador
+        :param workers: Threads de codificação PNG (vídeo usa uma só, para manter a ordem)
+        :param queue_size: Quadros aguardando codificação antes de começar a descartar
+        :param prefix: Prefixo dos arquivos PNG
+        """
+        if video and shutil.which('ffmpeg') is None:
+            # Sem o codificador, cada quadro falharia (e seria contado como descartado)
+            raise FileNotFoundError("ffmpeg não encontrado no PATH: instale-o para gravar vídeo")
+        self.output = output
+        self.prefix = prefix
+        self.video = video
+        self.fps = fps
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.encoder = None
+        self.frame_size = None
+        self.written = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+        if not video:
+            os.makedirs(output, exist_ok=True)
+        count = 1 if video else workers
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(count)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, frame, block=False):
+        """
+        Enfileira um quadro (largura, altura, bytes, número).
+        :param block: Esperar vaga na fila (fim da gravação) em vez de descartar
+        """
+        if block:
+            self.queue.put(frame)
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def _work(self):
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+            try:
+                if self.video:
+                    self._write_video(frame)
+                else:
+                    self._write_png(frame)
+                with self.lock:
+                    self.written += 1
+            except (OSError, ValueError) as e:
+                with self.lock:
+                    if not self.dropped:
+                        print(f"Erro ao codificar quadro: {e}")
+                    self.dropped += 1
+
+    def _write_png(self, frame):
+        width, height, data, number = frame
+        image = Image.frombytes('RGB', (width, height), data).transpose(Image.FLIP_TOP_BOTTOM)
+        image.save(os.path.join(self.output, f"{self.prefix}_{number:06d}.png"), compress_level=1)
+
+    def _write_video(self, frame):
+        width, height, data, _ = frame
+        if self.encoder is None:
+            self.frame_size = (width, height)
+            self.encoder = subprocess.Popen(
+                ['ffmpeg', '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+                 '-vf', 'vflip', '-pix_fmt', 'yuv420p', self.output],
+                stdin=subprocess.PIPE)
+        if (width, height) != self.frame_size:
+            raise ValueError("tamanho do quadro mudou durante a gravação de vídeo")
+        self.encoder.stdin.write(data)
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+            self.encoder.wait()
+
+
+# Classe que junta a leitura por PBO e a codificação em segundo plano
+class CaptureSession:
+    def __init__(self, output, video=False, fps=60, pbo_count=3, single_frame=False, prefix="quadro"):
+        """
+        :param output: Diretório dos PNGs ou arquivo de vídeo
+        :param video: Gravar vídeo pelo ffmpeg em vez de PNGs
+        :param fps: Taxa de quadros do vídeo
+        :param pbo_count: PBOs em rodízio (2 ou 3)
+        :param single_frame: Capturar apenas um quadro (captura de tela)
+        :param prefix: Prefixo dos arquivos PNG
+        """
+        self.reader = PboReader(pbo_count)
+        self.encoder = FrameEncoder(output, video=video, fps=fps, prefix=prefix)
+        self.single_frame = single_frame
+        self.frame_number = 0
+        self.frames_waited = 0
+        self.finished = False
+        self.finish_thread = None
+
+    def capture(self, width, height):
+        """
+        Chamado depois de desenhar o quadro e antes da troca de buffers.
+        """
+        if self.finished:
+            return
+        if self.single_frame and self.frame_number > 0:
+            # Captura de tela: esperar a cópia terminar antes de mapear o PBO
+            self.frames_waited += 1
+            if self.frames_waited >= self.reader.count - 1:
+                self.stop()
+            return
+        ready = self.reader.read(width, height, self.frame_number)
+        self.frame_number += 1
+        if ready is not None:
+            self.encoder.submit(ready)
+
+    def stop(self, flush=True):
+        """
+        :param flush: Ler os PBOs pendentes (exige o contexto GL; False ao sair do programa)
+        """
+        if self.finished:
+            return
+        self.finished = True
+        if flush:
+            for frame in self.reader.flush():
+                if frame is not None:
+                    self.encoder.submit(frame, block=True)  # Últimos quadros do vídeo: não descartar
+            self.reader.release()
+        # A codificação termina em segundo plano para não travar o quadro
+        self.finish_thread = threading.Thread(target=self._finish, daemon=True)
+        self.finish_thread.start()
+
+    def join(self):
+        if self.finish_thread is not None:
+            self.finish_thread.join()
+
+    def _finish(self):
+        self.encoder.close()
+        print(f"Captura em {self.encoder.output}: {self.encoder.written} quadros gravados, "
+              f"{self.encoder.dropped} descartados")
+
+    def status(self):
+        return self.frame_number, self.encoder.written, self.encoder.dropped
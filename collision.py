@@ -0,0 +1,57 @@
+"""
+Detecção contínua de colisão (CCD) entre o foguete e os corpos celestes.
+
+Em cada tick o foguete percorre o segmento p0 -> p1 e cada corpo vai de c0 a
+c1 (aproximação linear da órbita dentro do tick). No referencial do corpo o
+movimento relativo é linear, então o instante de impacto t em [0, 1] é a menor
+raiz de |d0 + v t|^2 = (r_foguete + r_corpo)^2, resolvida para todos os corpos
+de uma vez com NumPy.
+"""
+import numpy as np
+
+
+def swept_sphere_toi(p0, p1, radius, centers0, centers1, radii):
+    """
+    Instante de impacto de uma esfera móvel contra várias esferas móveis.
+    :param p0: Posição do foguete no início do tick, shape (..., 3)
+    :param p1: Posição do foguete no fim do tick, shape (..., 3)
+    :param radius: Raio do foguete (escalar ou shape (...))
+    :param centers0: Centros dos corpos no início do tick, shape (m, 3)
+    :param centers1: Centros dos corpos no fim do tick, shape (m, 3)
+    :param radii: Raios dos corpos, shape (m,)
+    :return: Instantes de impacto em [0, 1], shape (..., m); inf quando não há contato
+    """
+    p0 = np.asarray(p0, dtype=np.float64)
+    p1 = np.asarray(p1, dtype=np.float64)
+    d0 = p0[..., None, :] - centers0                         # separação inicial
+    v = (p1 - p0)[..., None, :] - (centers1 - centers0)       # velocidade relativa
+    r = np.asarray(radius, dtype=np.float64)[..., None] + radii
+
+    c = np.einsum('...i,...i->...', d0, d0) - r * r
+    b = np.einsum('...i,...i->...', d0, v)
+    a = np.einsum('...i,...i->...', v, v)
+    disc = b * b - a * c
+
+    toi = np.full(c.shape, np.inf)
+    # Já em contato no início do tick
+    toi[c <= 0] = 0.0
+    # Aproximando-se (b < 0) com raiz real: primeira raiz da quadrática
+    approaching = (c > 0) & (b < 0) & (disc >= 0) & (a > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = (-b - np.sqrt(np.maximum(disc, 0.0))) / np.where(a > 0, a, 1.0)
+    hit = approaching & (t <= 1.0)
+    toi[hit] = t[hit]
+    return toi
+
+
+def body_positions(bodies):
+    """
+    Posições atuais dos corpos como um array (m, 3).
+    """
+    if not bodies:
+        return np.zeros((0, 3))
+    return np.array([body.get_position() for body in bodies], dtype=np.float64)
+
+
+def body_radii(bodies):
+    return np.array([body.size for body in bodies], dtype=np.float64)
@@ -0,0 +1,86 @@
+"""
+Profundidade invertida (reversed-Z) para distâncias em escala real: com
+glClipControl em [0, 1], uma projeção perspectiva sem plano distante grava
+1 no plano próximo e tende a 0 no infinito. Em um buffer de profundidade de
+ponto flutuante, o expoente do float compensa a queda 1/z, então a precisão
+relativa fica praticamente constante de alguns metros a dezenas de UA e o
+plano distante deixa de existir. Sem suporte (OpenGL < 4.5 e sem
+ARB_clip_control), volta à projeção comum com plano distante fixo.
+"""
+import math
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+
+# Função para a matriz de projeção perspectiva infinita com profundidade invertida
+def reversed_z_perspective(fovy, aspect, near):
+    """
+    Matriz no layout de glLoadMatrixf (vetor-linha, como o grafo de cena):
+    z_clip = near e w_clip = -z_olho, logo profundidade = near / distância.
+    """
+    f = 1.0 / math.tan(math.radians(fovy) / 2.0)
+    matrix = np.zeros((4, 4), dtype=np.float32)
+    matrix[0, 0] = f / aspect
+    matrix[1, 1] = f
+    matrix[2, 3] = -1.0
+    matrix[3, 2] = near
+    return matrix
+
+
+# Classe para escolher e configurar o modo de profundidade
+class ReversedDepth:
+    def __init__(self, fovy=60.0, near=0.1, fallback_near=1.0, fallback_far=200.0):
+        """
+        :param fovy: Campo de visão vertical em graus
+        :param near: Plano próximo com profundidade invertida
+        :param fallback_near: Plano próximo da projeção comum
+        :param fallback_far: Plano distante da projeção comum (sem suporte a reversed-Z)
+        """
+        self.fovy = fovy
+        self.near = near
+        self.fallback_near = fallback_near
+        self.fallback_far = fallback_far
+        self.enabled = False
+
+    def enable(self):
+        """
+        Ativa a profundidade invertida se o contexto suportar. Retorna se ficou ativa.
+        """
+        try:
+            if not bool(glClipControl):
+                raise RuntimeError("glClipControl ausente")
+            glClipControl(GL_LOWER_LEFT, GL_ZERO_TO_ONE)
+            glClearDepth(0.0)
+            glDepthFunc(GL_GREATER)
+            self.enabled = True
+        except Exception as e:
+            print(f"Profundidade invertida indisponível, usando plano distante fixo: {e}")
+            self.enabled = False
+        return self.enabled
+
+    def projection(self, width, height):
+        """
+        Carrega a projeção perspectiva de uma vista (na matriz de projeção atual).
+        """
+        aspect = float(width) / float(max(height, 1))
+        glLoadIdentity()
+        if self.enabled:
+            glLoadMatrixf(reversed_z_perspective(self.fovy, aspect, self.near))
+        else:
+            gluPerspective(self.fovy, aspect, self.fallback_near, self.fallback_far)
+
+    def ortho(self, left, right, bottom, top, near, far):
+        """
+        Carrega uma projeção ortográfica com a convenção de profundidade em uso.
+        :param near: Distância (ao longo de -z) mais próxima a manter
+        :param far: Distância mais distante a manter
+        """
+        glLoadIdentity()
+        if self.enabled:
+            # glOrtho leva -n' -> -1 e -f' -> +1; com n' = 2*far - near e f' = near, a faixa útil
+            # [0, 1] do clip control fica com near -> 1 e far -> 0 (invertida, como a perspectiva)
+            glOrtho(left, right, bottom, top, 2.0 * far - near, near)
+        else:
+            glOrtho(left, right, bottom, top, near, far)
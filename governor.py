@@ -0,0 +1,75 @@
+"""
+Governador de tempo de quadro: observa os tempos recentes de CPU/GPU e sobe
+ou desce um degrau de qualidade (escala de renderização, tesselação das
+esferas e bias de mipmap) para manter o tempo de quadro alvo.
+"""
+from collections import deque
+
+import numpy as np
+
+# Degraus de qualidade, do melhor para o mais leve: (escala, fatias da esfera, bias de mip)
+QUALITY_LEVELS = [
+    (1.0, 50, 0.0),
+    (0.85, 50, 0.0),
+    (0.75, 32, 0.0),
+    (0.66, 32, 0.5),
+    (0.5, 24, 0.5),
+    (0.5, 16, 1.0),
+]
+
+
+# Classe para ajustar a qualidade de renderização ao tempo de quadro alvo
+class FrameTimeGovernor:
+    def __init__(self, target_fps=60, window=30, cooldown=60):
+        """
+        :param target_fps: Taxa de quadros alvo
+        :param window: Quadros usados para estimar o tempo de quadro
+        :param cooldown: Quadros mínimos entre duas mudanças de degrau
+        """
+        self.target_ms = 1000.0 / target_fps
+        self.samples = deque(maxlen=window)
+        self.cooldown = cooldown
+        self.frames_since_change = 0
+        self.level = 0
+        self.enabled = True
+
+    @property
+    def render_scale(self):
+        return QUALITY_LEVELS[self.level][0]
+
+    @property
+    def sphere_slices(self):
+        return QUALITY_LEVELS[self.level][1]
+
+    @property
+    def mip_bias(self):
+        return QUALITY_LEVELS[self.level][2]
+
+    def record(self, cpu_ms, gpu_ms=None):
+        """
+        Registra o custo de um quadro (o maior entre CPU e GPU) e ajusta o degrau.
+        :return: True se o degrau de qualidade mudou
+        """
+        cost = cpu_ms if gpu_ms is None else max(cpu_ms, gpu_ms)
+        self.samples.append(cost)
+        self.frames_since_change += 1
+        if not self.enabled or len(self.samples) < self.samples.maxlen:
+            return False
+
+        # Percentil 90 para reagir a engasgos sem oscilar com um quadro isolado
+        recent = float(np.percentile(self.samples, 90))
+        if recent > self.target_ms * 1.05 and self.level < len(QUALITY_LEVELS) - 1:
+            return self._change(1)
+        # Subir só com folga e depois de um tempo estável (histerese)
+        if recent < self.target_ms * 0.7 and self.level > 0 and self.frames_since_change >= self.cooldown:
+            return self._change(-1)
+        return False
+
+    def _change(self, step):
+        self.level += step
+        self.frames_since_change = 0
+        self.samples.clear()
+        return True
+
+    def recent_ms(self):
+        return float(np.mean(self.samples)) if self.samples else 0.0
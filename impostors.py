@@ -0,0 +1,214 @@
+"""
+Impostores para corpos distantes: quando o raio projetado de um planeta ou
+lua fica abaixo de alguns pixels, ele é desenhado como um quad voltado para
+a câmera com a imagem da própria esfera. Cada corpo (por vista) tem um
+espaço em um atlas com alfa, desenhado com a esfera completa e as luzes
+atuais, e só é refeito quando a direção da câmera ou a do Sol, vistas do
+corpo, mudam mais que um limiar. Todos os impostores de uma vista vão para
+a GPU em uma única chamada de desenho. Com o atlas cheio, o espaço usado há
+mais tempo passa para o corpo novo, então catálogos maiores que o atlas
+continuam no lote.
+"""
+import math
+
+import numpy as np
+from OpenGL.GL import *
+
+from views import RenderTarget
+
+# Cantos do quad em unidades de (direita, cima) da câmera e coordenadas no espaço do atlas
+CORNERS = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=np.float32)
+CORNER_UV = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float32)
+
+
+# Classe para um espaço do atlas com as direções usadas na última renderização
+class ImpostorSlot:
+    def __init__(self, index):
+        self.index = index
+        self.view_dir = None
+        self.sun_dir = None
+        self.last_used = 0  # Passe de vista em que o espaço foi desenhado pela última vez
+
+
+# Classe para o atlas de impostores e o lote desenhado em uma chamada
+class ImpostorAtlas:
+    def __init__(self, depth, slot_size=64, slots_per_side=8, threshold_px=12.0, angle_threshold=5.0,
+                 renders_per_frame=4):
+        """
+        :param depth: ReversedDepth em uso (campo de visão e projeção ortográfica dos espaços)
+        :param slot_size: Lado de cada espaço do atlas em pixels
+        :param slots_per_side: Espaços por lado do atlas
+        :param threshold_px: Raio projetado (pixels) abaixo do qual o corpo vira impostor
+        :param angle_threshold: Mudança de direção (graus) da câmera ou do Sol que refaz o espaço
+        :param renders_per_frame: Máximo de espaços refeitos por vista
+        """
+        self.depth = depth
+        self.slot_size = slot_size
+        self.slots_per_side = slots_per_side
+        self.threshold_px = threshold_px
+        self.min_cos = math.cos(math.radians(angle_threshold))
+        self.renders_per_frame = renders_per_frame
+        self.target = RenderTarget("impostores", alpha=True, float_depth=True)
+        self.enabled = True
+        self.slots = {}
+        self.free = list(range(slots_per_side * slots_per_side - 1, -1, -1))
+        self.passes = 0
+        self.reclaimed = 0
+        self.view = None
+        self.focal_px = 1.0
+        self.right = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+        self.up = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+        self.forward = np.array([0.0, 0.0, -1.0])
+        self.sun = np.zeros(3)
+        self.renders_left = 0
+        self.batch = []
+        self.stats = {}  # Por vista: [impostores desenhados, espaços refeitos] no último desenho
+
+    def begin_view(self, view, height, sun):
+        """
+        Chamado com a câmera já definida (a cena é relativa a ela).
+        :param view: Nome da vista
+        :param height: Altura da vista em pixels
+        :param sun: Posição do Sol relativa à câmera
+        """
+        self.view = view
+        self.focal_px = 0.5 * height / math.tan(math.radians(self.depth.fovy) / 2.0)
+        # Eixos da câmera em coordenadas do mundo: colunas da rotação da matriz de visão
+        view_matrix = np.array(glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float32).reshape(4, 4)
+        self.right = view_matrix[:3, 0].copy()
+        self.up = view_matrix[:3, 1].copy()
+        self.forward = -view_matrix[:3, 2].astype(np.float64)
+        self.sun = np.asarray(sun, dtype=np.float64)
+        self.renders_left = self.renders_per_frame
+        self.batch = []
+        self.passes += 1
+        self.stats[view] = [0, 0]
+
+    def draw(self, key, matrix, radius, draw_body):
+        """
+        Enfileira o corpo como impostor se ele estiver pequeno na tela.
+        :param key: Identificador do corpo (índice do nó no grafo de cena)
+        :param matrix: Matriz do corpo relativa à câmera
+        :param radius: Raio do corpo
+        :param draw_body: Função (matriz, fatias) que desenha a esfera completa
+        :return: False se o corpo deve ser desenhado normalmente (True: enfileirado ou atrás da câmera)
+        """
+        if not self.enabled or not self.target.available:
+            return False
+        center = matrix[3, :3].astype(np.float64)
+        distance = float(np.linalg.norm(center))
+        if distance <= radius or radius * self.focal_px / distance >= self.threshold_px:
+            return False
+        if np.dot(center, self.forward) < -radius:
+            return True  # Pequeno e atrás da câmera: nada a desenhar nem a refazer
+
+        slot = self.slots.get((self.view, key))
+        if slot is None:
+            slot = self._allocate((self.view, key))
+            if slot is None:
+                return False  # Atlas cheio com espaços em uso nesta vista: desenho completo
+        slot.last_used = self.passes
+
+        view_dir = -center / distance
+        sun_dir = self.sun - center
+        sun_dir /= max(np.linalg.norm(sun_dir), 1e-9)
+        stale = (slot.view_dir is None or np.dot(view_dir, slot.view_dir) < self.min_cos
+                 or np.dot(sun_dir, slot.sun_dir) < self.min_cos)
+        if stale:
+            if self.renders_left > 0 and self._render(slot, matrix, center, radius, draw_body):
+                slot.view_dir, slot.sun_dir = view_dir, sun_dir
+                self.renders_left -= 1
+                self.stats[self.view][1] += 1
+            elif slot.view_dir is None:
+                return False  # Ainda sem imagem: desenho completo neste quadro
+
+        self.batch.append((center, radius, slot.index))
+        self.stats[self.view][0] += 1
+        return True
+
+    def _allocate(self, owner):
+        """
+        Dá um espaço ao corpo: um livre ou, com o atlas cheio, o usado há mais tempo.
+        :param owner: Par (vista, corpo)
+        :return: ImpostorSlot sem imagem, ou None
+        """
+        if self.free:
+            index = self.free.pop()
+        else:
+            if self.renders_left <= 0:
+                return None  # O espaço tomado ficaria sem imagem neste quadro
+            previous, victim = min(self.slots.items(), key=lambda item: item[1].last_used)
+            if victim.last_used >= self.passes:
+                return None  # Todos os espaços já estão no lote desta vista
+            del self.slots[previous]
+            index = victim.index
+            self.reclaimed += 1
+        slot = self.slots[owner] = ImpostorSlot(index)
+        return slot
+
+    def _slot_origin(self, index):
+        return (index % self.slots_per_side) * self.slot_size, (index // self.slots_per_side) * self.slot_size
+
+    def _render(self, slot, matrix, center, radius, draw_body):
+        size = self.slot_size * self.slots_per_side
+        if not self.target.ensure(size, size):
+            return False
+        # Centro do corpo no espaço da câmera: enquadrar só a esfera, com a mesma matriz de visão
+        view_matrix = np.array(glGetFloatv(GL_MODELVIEW_MATRIX), dtype=np.float64).reshape(4, 4)
+        cx, cy, cz, _ = np.append(center, 1.0) @ view_matrix
+        r = radius * 1.05
+        x, y = self._slot_origin(slot.index)
+
+        glPushAttrib(GL_VIEWPORT_BIT | GL_SCISSOR_BIT | GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT)
+        self.target.bind()
+        glViewport(x, y, self.slot_size, self.slot_size)
+        glEnable(GL_SCISSOR_TEST)
+        glScissor(x, y, self.slot_size, self.slot_size)
+        glClearColor(0.0, 0.0, 0.0, 0.0)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        self.depth.ortho(cx - r, cx + r, cy - r, cy + r, -cz - r, -cz + r)
+        glMatrixMode(GL_MODELVIEW)
+        draw_body(matrix, 16)  # Luzes no espaço da câmera: mesma iluminação do desenho completo
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        self.target.unbind()
+        glPopAttrib()
+        return True
+
+    def flush(self):
+        """
+        Desenha todos os impostores enfileirados na vista com uma única chamada.
+        :return: Quantidade de impostores desenhados
+        """
+        if not self.batch:
+            return 0
+        count = len(self.batch)
+        centers = np.array([item[0] for item in self.batch], dtype=np.float32)
+        radii = np.array([item[1] for item in self.batch], dtype=np.float32)
+        origins = np.array([self._slot_origin(item[2]) for item in self.batch], dtype=np.float32)
+        self.batch = []
+
+        offsets = CORNERS[:, 0:1] * self.right + CORNERS[:, 1:2] * self.up          # (4, 3)
+        vertices = centers[:, None, :] + radii[:, None, None] * offsets[None, :, :]  # (n, 4, 3)
+        size = float(self.slot_size * self.slots_per_side)
+        uvs = (origins[:, None, :] + CORNER_UV[None, :, :] * self.slot_size) / size
+
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT)
+        glDisable(GL_LIGHTING)  # A iluminação já está na imagem
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.target.texture_id)
+        glEnable(GL_ALPHA_TEST)
+        glAlphaFunc(GL_GREATER, 0.5)
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, np.ascontiguousarray(vertices.reshape(-1, 3)))
+        glTexCoordPointer(2, GL_FLOAT, 0, np.ascontiguousarray(uvs.reshape(-1, 2), dtype=np.float32))
+        glDrawArrays(GL_QUADS, 0, count * 4)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glPopAttrib()
+        return count
@@ -0,0 +1,96 @@
+"""
+Entrada por estado de teclas: registra teclas pressionadas/soltas e é
+amostrada uma vez por tick da simulação, independente da taxa de repetição
+do sistema operacional. Também mede a latência entrada -> tela: cada tecla
+recebe um carimbo de tempo ao chegar, é marcada quando um tick a consome e
+a latência é registrada quando o quadro com esse tick é apresentado.
+
+Com a simulação em thread própria, os carimbos passam da simulação para a
+renderização por filas (deque) esvaziadas com popleft: cada carimbo sai de
+uma fila exatamente uma vez, mesmo com a outra thread acrescentando ao
+mesmo tempo.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+# Eixos de cada tecla: (frente, direita, giro)
+KEY_AXES = {
+    'w': (1, 0, 0),
+    's': (-1, 0, 0),
+    'a': (0, -1, 0),
+    'd': (0, 1, 0),
+    'q': (0, 0, -1),  # Rotacionar para a direita (yaw diminui)
+    'e': (0, 0, 1),   # Rotacionar para a esquerda
+}
+
+
+# Classe para guardar o estado das teclas e as métricas de latência
+class InputSystem:
+    def __init__(self, track_latency=True, latency_samples=240):
+        """
+        :param track_latency: Medir latência (desligado no servidor, que não apresenta quadros)
+        :param latency_samples: Quantidade de medições de latência guardadas
+        """
+        self.track_latency = track_latency
+        self.held = set()
+        self.waiting = deque()   # carimbos de teclas ainda não consumidas por um tick
+        self.sampled = deque()   # carimbos consumidos, aguardando o próximo quadro
+        self.latencies = deque(maxlen=latency_samples)
+        self.mean_ms = 0.0  # Média publicada como número simples (lida pela telemetria em outra thread)
+
+    def key_down(self, key, timestamp=None):
+        if key not in KEY_AXES:
+            return
+        self.held.add(key)
+        self._stamp(timestamp)
+
+    def key_up(self, key, timestamp=None):
+        if key not in self.held:
+            return
+        self.held.discard(key)
+        self._stamp(timestamp)
+
+    def _stamp(self, timestamp):
+        if self.track_latency:
+            self.waiting.append(time.perf_counter() if timestamp is None else timestamp)
+
+    def release_all(self):
+        self.held.clear()
+
+    def axes(self):
+        """
+        Amostra as teclas seguradas neste tick.
+        :return: (frente, direita, giro), cada um em [-1, 1]
+        """
+        forward = right = turn = 0
+        for key in self.held:
+            f, r, t = KEY_AXES[key]
+            forward += f
+            right += r
+            turn += t
+        while self.waiting:
+            self.sampled.append(self.waiting.popleft())
+        return forward, right, turn
+
+    def frame_presented(self, timestamp=None):
+        """
+        Chamado logo após a troca de buffers: fecha a medição das entradas
+        que já foram aplicadas por algum tick.
+        """
+        if not self.sampled:
+            return
+        now = time.perf_counter() if timestamp is None else timestamp
+        while self.sampled:
+            self.latencies.append(now - self.sampled.popleft())
+        self.mean_ms = 1000.0 * sum(self.latencies) / len(self.latencies)
+
+    def latency_stats(self):
+        """
+        :return: (média, p95) da latência entrada -> tela em milissegundos, ou None
+        """
+        if not self.latencies:
+            return None
+        values = np.array(self.latencies) * 1000.0
+        return float(values.mean()), float(np.percentile(values, 95))
@@ -1,13 +1,36 @@
+import os
 import sys
 import math
 import random
+import zlib
 import numpy as np
 import time
+import threading
+from collections import deque
 from PIL import Image
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
 
+import collision
+from autopilot import Autopilot
+from depth import ReversedDepth
+from input_system import InputSystem
+from occlusion import OcclusionCuller
+from particles import ParticleEmitter, ParticleSystem, load_sprite
+from picking import PickingPass
+from procedural import GASEOUS, ROCKY, ProceduralTextureCache, SurfaceSpec
+from governor import FrameTimeGovernor
+from impostors import ImpostorAtlas
+from redraw import RedrawScheduler
+from scene_graph import SceneGraph, SceneNode, rotation, translation
+from sim_worker import SimulationWorker, StateBuffers
+from telemetry import MetricsRegistry
+from resources import TEXTURE, registry, texture_bytes
+from ui import LINE_HEIGHT, InfoScreen, LabelLayer, TextPanel
+from views import GpuTimer, Minimap, RenderTarget, draw_textured_quad, sphere_in_view
+from virtual_texture import VirtualTextureCache
+
 # Constantes para menus
 LIGHT_ON = 0
 LIGHT_OFF = 1
@@ -47,11 +70,155 @@ collided_planet = None
 # Texturas
 background_texture_id = None
 sun_texture_id = None
-saturn_ring_texture_id = None
 
 # Variável para pausar o jogo
 paused = False
 
+# Duração de um tick da simulação (glutTimerFunc de 16 ms)
+TICK_DT = 1.0 / 60
+
+# Estado das teclas de movimento, amostrado uma vez por tick
+MOVEMENT_KEYS = 'wsadqe'
+controls = InputSystem()
+
+# Piloto automático pelos planetas não visitados (tecla N); a rota é planejada em segundo plano
+AUTOPILOT_KEY = 'n'
+autopilot = Autopilot(TICK_DT)
+
+# Sobreposição de desempenho (tecla F)
+show_perf_overlay = False
+
+# Modos de vista: apenas a câmera atual, com minimapa (tecla M) ou tela dividida (tecla V)
+VIEW_SINGLE = 0
+VIEW_MINIMAP = 1
+VIEW_SPLIT = 2
+view_mode = VIEW_SINGLE
+minimap = Minimap()
+
+# Escala dinâmica de resolução: a cena é desenhada em um FBO menor e ampliada
+governor = FrameTimeGovernor()
+scene_target = RenderTarget("cena", float_depth=True)
+gpu_timer = GpuTimer()
+
+# Profundidade invertida (desligar com --no-reversed-z) e escala das distâncias ao Sol (--distance-scale)
+depth = ReversedDepth()
+distance_scale = 1.0
+
+# Impostores para corpos pequenos na tela (desligar com --no-impostors)
+impostors = ImpostorAtlas(depth)
+impostor_bodies = {}  # Índice do nó no grafo -> planeta ou lua
+
+# Partículas: escapamento do foguete e explosões das visitas (desligar com --no-particles)
+particles = ParticleSystem()
+exhaust = ParticleEmitter(particles, rate=900.0, speed=6.0, spread=0.8, lifetime=0.5,
+                          color=(1.0, 0.75, 0.35, 0.9), jitter=0.1)
+particle_events = deque(maxlen=64)  # Visitas registradas pela simulação (None = reinício), consumidas pelo desenho
+particles_clock = None
+particles_ms = 0.0
+
+# Seleção com o clique esquerdo por um buffer de identificadores (desligar com --no-picking)
+picking = PickingPass(depth)
+selected_name = None  # Último objeto clicado, mostrado no HUD
+
+# Captura assíncrona: vídeo/sequência (tecla K ou --capture) e captura de tela (tecla C)
+capture_session = None
+screenshot_session = None
+
+# Janela oculta (--hidden): tudo é desenhado em um FBO do tamanho da janela
+hidden_window = False
+offscreen_target = None
+
+# Interface em modo retido: cada painel fica em uma textura própria
+hud = TextPanel("HUD")
+labels = LabelLayer("rótulos")  # Tempo do piloto automático e marcador: mudam a cada quadro
+end_screen = TextPanel("fim de jogo", background=(0.0, 0.0, 0.0, 0.8))
+info_screen = InfoScreen(lambda text: split_text(text, max_length=60))
+
+# Grafo de cena (montado em init_scene) com as matrizes de mundo em cache
+scene_graph = None
+solar_system_node = None
+rocket_node = None
+orbit_nodes = []
+
+# Estado publicado a cada tick (buffer triplo) e lido pela renderização sem travas
+state_buffers = None
+render_state = None
+sim_worker = None  # Simulação em thread própria (--sim-thread)
+game_lock = threading.RLock()  # Escritas no estado de jogo fora da simulação (telas de informação, menus)
+
+# Telemetria (--metrics-port): atualizada pelos laços de desenho e simulação
+metrics = MetricsRegistry()
+metric_frames = metrics.counter("frames_total", "Quadros desenhados")
+metric_frame_ms = metrics.histogram("frame_time_ms", "Tempo de CPU por quadro (ms)",
+                                    [2, 4, 8, 12, 16.7, 25, 33.3, 50, 100])
+metric_gpu_ms = metrics.gauge("gpu_time_ms", "Tempo de GPU do último quadro medido (ms)")
+metric_tick_ms = metrics.histogram("sim_tick_ms", "Tempo de um tick da simulação (ms)",
+                                   [0.25, 0.5, 1, 2, 4, 8, 16])
+metric_draw_calls = metrics.gauge("draw_calls", "Nós do grafo de cena desenhados no último quadro")
+metric_visible = metrics.gauge("visible_bodies", "Planetas e luas no volume de visão da vista principal")
+metric_occluded = metrics.gauge("occluded_bodies", "Corpos escondidos por oclusão na vista principal")
+metric_impostors = metrics.gauge("impostors", "Corpos desenhados como impostores na vista principal")
+metric_particles = metrics.gauge("particles", "Partículas vivas")
+metric_texture_bytes = metrics.gauge("texture_memory_bytes", "Memória de GPU registrada (bytes)")
+metric_input_latency = metrics.gauge("input_latency_ms", "Latência média entrada -> tela (ms)")
+frame_draw_calls = 0
+
+# Consultas de oclusão (desligar com --no-occlusion)
+occlusion = OcclusionCuller()
+
+# Redesenho por eventos: quadros parados (pausa, telas de informação) não são redesenhados
+redraw = RedrawScheduler()
+
+# Texturas virtuais em blocos (textures/vt/), compartilhando um atlas de tamanho fixo
+virtual_textures = VirtualTextureCache()
+
+# Texturas procedurais (textures/procedural/) para corpos sem arquivo, geradas em um pool de processos
+procedural_textures = ProceduralTextureCache()
+
+# Modo sem janela (servidor/ferramentas): não carrega texturas nem usa OpenGL
+headless = False
+
+# Cliente de rede (None = simulação local)
+network_client = None
+
+# Determinismo: semente dos ângulos iniciais e contador de ticks simulados
+simulation_seed = 0
+simulation_tick = 0
+
+# Gravação e replay de partidas (None = desativados)
+recorder = None
+replay_player = None
+
+# Função para ler uma imagem de textura (pode rodar fora da thread do OpenGL)
+def decode_texture(texture_file):
+    """
+    :return: (largura, altura, formato GL, bytes) com a imagem invertida para o OpenGL
+    """
+    image = Image.open(texture_file)
+    image = image.transpose(Image.FLIP_TOP_BOTTOM)
+    if image.mode == "RGBA":
+        return image.width, image.height, GL_RGBA, image.convert("RGBA").tobytes()
+    return image.width, image.height, GL_RGB, image.convert("RGB").tobytes()
+
+# Função para criar uma textura e registrá-la no registro de recursos de GPU
+def create_texture(decoded, label, wrap=GL_REPEAT, mipmaps=True, owner=None, on_evict=None):
+    width, height, format, img_data = decoded
+    texture_id = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, texture_id)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, wrap)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, wrap)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+    if mipmaps:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        gluBuild2DMipmaps(GL_TEXTURE_2D, format, width, height, format, GL_UNSIGNED_BYTE, img_data)
+    else:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexImage2D(GL_TEXTURE_2D, 0, format, width, height, 0, format, GL_UNSIGNED_BYTE, img_data)
+    channels = 4 if format == GL_RGBA else 3
+    registry.register(TEXTURE, texture_id, texture_bytes(width, height, channels, mipmaps), label,
+                      owner=owner, on_evict=on_evict)
+    return texture_id
+
 # Classe para representar cada planeta
 class Planet:
     def __init__(self, name, color, size, distance, orbit_speed, rotation_speed, texture_file, info, parent=None):
@@ -62,7 +229,7 @@ class Planet:
         :param distance: Distância do Sol ou do planeta pai (escala ajustada)
         :param orbit_speed: Velocidade de órbita (graus por frame)
         :param rotation_speed: Velocidade de rotação (graus por frame)
-        :param texture_file: Caminho para a textura do planeta
+        :param texture_file: Caminho para a textura do planeta (None ou inexistente = superfície procedural)
         :param info: Informações sobre o planeta
         :param parent: Planeta ao qual este planeta está orbitando (para luas)
         """
@@ -76,32 +243,49 @@ class Planet:
         self.info = info
         self.orbit_angle = random.uniform(0, 360)  # Ângulo inicial aleatório
         self.rotation_angle = random.uniform(0, 360)  # Ângulo de rotação inicial aleatório
-        self.texture_id = self.load_texture()
+        self.virtual_texture = None if headless or texture_file is None else virtual_textures.open(texture_file, color)
+        self.texture_evicted = False
+        self.visible = False  # No volume de visão da última vista desenhada
         self.parent = parent  # Planeta pai
+        self.texture_id = self.load_texture()
 
     def load_texture(self):
+        if headless or self.virtual_texture is not None:
+            return None  # Com textura virtual, o mapa inteiro nunca é carregado
+        if self.texture_file is None or not os.path.exists(self.texture_file):
+            # Sem arquivo: mapa gerado (ou lido do cache) em outro processo; até chegar, a cor do planeta
+            procedural_textures.request(self.surface_spec(), self.procedural_ready)
+            return None
         try:
-            image = Image.open(self.texture_file)
-            image = image.transpose(Image.FLIP_TOP_BOTTOM)
-            img_mode = image.mode
-            if img_mode == "RGBA":
-                img_data = image.convert("RGBA").tobytes()
-                format = GL_RGBA
-            else:
-                img_data = image.convert("RGB").tobytes()
-                format = GL_RGB
-            texture_id = glGenTextures(1)
-            glBindTexture(GL_TEXTURE_2D, texture_id)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-            gluBuild2DMipmaps(GL_TEXTURE_2D, format, image.width, image.height, format, GL_UNSIGNED_BYTE, img_data)
-            return texture_id
+            return self.upload_texture(decode_texture(self.texture_file))
         except Exception as e:
             print(f"Erro ao carregar textura para {self.name}: {e}")
             return None
 
+    def upload_texture(self, decoded):
+        # Descartável: com o orçamento de VRAM estourado, o planeta volta à própria cor
+        return create_texture(decoded, f"textura de {self.name}", owner=self, on_evict=self.evict_texture)
+
+    def surface_spec(self):
+        # Semente pelo nome: o mesmo corpo tem sempre a mesma superfície (e o mesmo arquivo no cache)
+        kind = GASEOUS if self.parent is None and self.size >= 1.6 else ROCKY
+        return SurfaceSpec(zlib.crc32(self.name.encode("utf-8")), kind, self.color)
+
+    def procedural_ready(self, decoded, path):
+        # Recargas depois de um descarte leem o PNG do cache como uma textura comum
+        self.texture_file = path
+        self.texture_reloaded((*decoded[:2], GL_RGB, decoded[2]))
+
+    def evict_texture(self):
+        self.texture_id = None
+        self.texture_evicted = True
+
+    def texture_reloaded(self, decoded):
+        if self.texture_id is not None:
+            registry.release(TEXTURE, self.texture_id)  # Substituída (mapa procedural depois de uma recarga)
+        self.texture_id = self.upload_texture(decoded)
+        self.texture_evicted = False
+
     def update(self):
         # Atualizar ângulo de órbita
         self.orbit_angle += self.orbit_speed
@@ -129,25 +313,40 @@ class Planet:
             z = self.distance * math.sin(rad)
             return [x, self.size, z]
 
-    def draw(self):
+    def orbit_matrix(self, orbit_angle):
+        """
+        Matriz local da órbita no grafo de cena: relativa ao Sol ou à órbita do planeta pai.
+        """
+        rad = math.radians(orbit_angle)
+        height = 0 if self.parent else self.size  # Luas ficam na altura do planeta pai
+        return translation(self.distance * math.cos(rad), height, self.distance * math.sin(rad))
+
+    def draw(self, matrix, slices=50):
+        """
+        :param matrix: Matriz de mundo do nó do planeta no grafo de cena
+        :param slices: Tesselação da esfera
+        """
         glPushMatrix()
-        pos = self.get_position()
-        glTranslatef(*pos)
-        glRotatef(self.rotation_angle, 0, 1, 0)
+        glMultMatrixf(matrix)
+        self.visible = sphere_in_view(self.size)
+        if self.virtual_texture is not None:
+            self.virtual_texture.draw(self.size, slices)
+            glPopMatrix()
+            return
+        if (self.texture_id or self.texture_evicted) and self.visible:
+            if self.texture_id:
+                registry.touch(TEXTURE, self.texture_id)
+            else:
+                # Textura descartada pelo orçamento: recarregar em segundo plano
+                registry.request_reload(self.name, lambda: decode_texture(self.texture_file),
+                                        self.texture_reloaded)
         if self.texture_id:
             glEnable(GL_TEXTURE_2D)
             glBindTexture(GL_TEXTURE_2D, self.texture_id)
             glColor3f(1.0, 1.0, 1.0)  # Resetar a cor para branco antes de aplicar a textura
         else:
             glColor3f(*self.color)
-        quad = gluNewQuadric()
-        if self.texture_id:
-            gluQuadricTexture(quad, GL_TRUE)
-            gluQuadricNormals(quad, GLU_SMOOTH)
-        else:
-            gluQuadricNormals(quad, GLU_SMOOTH)
-        gluSphere(quad, self.size, 50, 50)
-        gluDeleteQuadric(quad)
+        gluSphere(registry.quadric(bool(self.texture_id)), self.size, slices, slices)
         if self.texture_id:
             glDisable(GL_TEXTURE_2D)
         glPopMatrix()
@@ -171,24 +370,10 @@ class Ring:
         self.texture_id = self.load_texture()
 
     def load_texture(self):
+        if headless:
+            return None
         try:
-            image = Image.open(self.texture_file)
-            image = image.transpose(Image.FLIP_TOP_BOTTOM)
-            img_mode = image.mode
-            if img_mode == "RGBA":
-                img_data = image.convert("RGBA").tobytes()
-                format = GL_RGBA
-            else:
-                img_data = image.convert("RGB").tobytes()
-                format = GL_RGB
-            texture_id = glGenTextures(1)
-            glBindTexture(GL_TEXTURE_2D, texture_id)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-            gluBuild2DMipmaps(GL_TEXTURE_2D, format, image.width, image.height, format, GL_UNSIGNED_BYTE, img_data)
-            return texture_id
+            return create_texture(decode_texture(self.texture_file), f"anéis de {self.planet.name}", owner=self)
         except Exception as e:
             print(f"Erro ao carregar textura dos anéis para {self.planet.name}: {e}")
             return None
@@ -199,26 +384,40 @@ class Ring:
         if self.rotation_angle >= 360:
             self.rotation_angle -= 360
 
-    def draw(self):
+    def draw(self, matrix, slices=None):
+        """
+        :param matrix: Matriz de mundo do nó dos anéis (já alinhada com a rotação do planeta)
+        """
         if self.texture_id is None:
             return  # Não há textura para os anéis
 
         glPushMatrix()
-        pos = self.planet.get_position()
-        glTranslatef(*pos)
-        glRotatef(self.planet.rotation_angle, 0, 1, 0)  # Alinhar com a rotação do planeta
-        glRotatef(self.rotation_angle, 0, 0, 1)  # Rotação adicional dos anéis
+        glMultMatrixf(matrix)
 
         glEnable(GL_TEXTURE_2D)
         glBindTexture(GL_TEXTURE_2D, self.texture_id)
+        registry.touch(TEXTURE, self.texture_id)
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
         glColor4f(1.0, 1.0, 1.0, 0.8)  # Ajustar a transparência conforme necessário
+        self.draw_strip()
+        glDisable(GL_BLEND)
+        glDisable(GL_TEXTURE_2D)
+        glPopMatrix()
 
-        num_segments = 100
-        theta = 0
-        delta_theta = 2 * math.pi / num_segments
+    def draw_pick(self, matrix, slices=None):
+        """
+        Mesma faixa sem textura nem mistura, para o passe de seleção.
+        """
+        if self.texture_id is None:
+            return  # Anéis que não aparecem também não são clicáveis
+        glPushMatrix()
+        glMultMatrixf(matrix)
+        self.draw_strip()
+        glPopMatrix()
 
+    def draw_strip(self, num_segments=100):
+        delta_theta = 2 * math.pi / num_segments
         glBegin(GL_TRIANGLE_STRIP)
         for i in range(num_segments + 1):
             theta = i * delta_theta
@@ -232,24 +431,41 @@ class Ring:
             glVertex3f(x_outer, 0, z_outer)
         glEnd()
 
-        glDisable(GL_BLEND)
-        glDisable(GL_TEXTURE_2D)
-        glPopMatrix()
-
 # Classe para representar o jogador
 class Player:
     def __init__(self, position):
         self.position = np.array(position, dtype='float64')  # [x, y, z]
+        self.previous_position = self.position.copy()  # Posição no início do tick (colisão contínua)
         self.yaw = 0    # Rotação em torno do eixo Y (em graus)
         self.size = 1.5
+        self.speed = 1.0  # Multiplicador de velocidade do foguete
+        self.velocity = np.zeros(3)   # Velocidade atual (unidades por segundo)
+        self.max_speed = 30.0         # Velocidade máxima com speed = 1
+        self.acceleration = 120.0     # Aceleração (unidades por segundo²)
+        self.turn_rate = 150.0        # Velocidade de giro (graus por segundo)
         self.planetas_coletados = []
         self.flame_animation_time = 0  # Tempo para animação das chamas
         self.is_moving = False        # Nova variável para controlar se está se movendo
 
-    def draw_rocket(self):
+    def rocket_matrix(self, x, y, z, yaw):
+        # Matriz local do foguete no grafo de cena (vetor-linha: rotação antes da translação)
+        return rotation(yaw, 'y') @ translation(x, y, z)
+
+    def flame_matrix(self, animation_time):
+        flame_position_offset = 0.2 * math.sin(animation_time * 2)
+        return rotation(-180, 'x') @ translation(0, 0, 2.1 + flame_position_offset)
+
+    def draw_rocket(self, animate=True, matrix=None, origin=None):
+        """
+        :param matrix: Matriz do nó do foguete relativa à câmera; None = posição atual (foguetes remotos)
+        :param origin: Posição da câmera, subtraída da posição atual em float64
+        """
         glPushMatrix()
-        glTranslatef(*self.position)
-        glRotatef(self.yaw, 0, 1, 0)   # Rotação em Y (Yaw)
+        if matrix is None:
+            glTranslatef(*(self.position if origin is None else self.position - origin))
+            glRotatef(self.yaw, 0, 1, 0)   # Rotação em Y (Yaw)
+        else:
+            glMultMatrixf(matrix)
 
         # Corpo do foguete
         glColor3f(0.439, 0.502, 0.565)  # Cor principal do corpo
@@ -296,22 +512,26 @@ class Player:
         glutSolidCone(.3, .1, 32, 32)
         glPopMatrix()
 
-        # Desenhar as chamas somente se estiver se movendo
-        if self.is_moving:
-            self.draw_flames()
+        # Desenhar as chamas somente se estiver se movendo (no grafo, as chamas são um nó filho)
+        if matrix is None and self.is_moving:
+            self.draw_flames(animate)
 
         glPopMatrix()
 
-    def draw_flames(self):
+    def draw_flames(self, animate=True, matrix=None):
+        """
+        :param matrix: Matriz de mundo do nó das chamas; None = relativa ao foguete atual
+        """
+        if not self.is_moving:
+            return
         # Atualizar tempo de animação
-        self.flame_animation_time += 0.05
+        if animate:
+            self.flame_animation_time += 0.05
         flame_scale = 1.0 + 0.1 * math.sin(self.flame_animation_time)
-        flame_position_offset = 0.2 * math.sin(self.flame_animation_time * 2)
 
         glPushMatrix()
-        # Posicionar as chamas na base do foguete
-        glTranslatef(0, 0, 2.1 + flame_position_offset)
-        glRotatef(-180, 1.0, 0.0, 0.0)  # Ajustar orientação para apontar para baixo
+        # Posicionar as chamas na base do foguete, apontando para baixo
+        glMultMatrixf(self.flame_matrix(self.flame_animation_time) if matrix is None else matrix)
 
         # Configurar blending para transparência
         glEnable(GL_BLEND)
@@ -337,13 +557,43 @@ class Player:
         glPopMatrix()
 
     def move_player(self, forward, right):
-        rad = math.radians(player.yaw)
+        rad = math.radians(self.yaw)
         move_vector = np.array([right * math.cos(rad) + forward * math.sin(rad),
                             0,
                             right * math.sin(rad) - forward * math.cos(rad)])
-        self.position += move_vector * 1.0
+        self.position += move_vector * self.speed
         self.is_moving = True
 
+    def apply_controls(self, forward, right, turn, dt):
+        """
+        Aplica os eixos amostrados neste tick com aceleração até a velocidade máxima.
+        :param forward: Eixo frente/trás em [-1, 1]
+        :param right: Eixo direita/esquerda em [-1, 1]
+        :param turn: Eixo de giro em [-1, 1] (positivo = esquerda)
+        :param dt: Duração do tick em segundos
+        """
+        if turn:
+            self.yaw = (self.yaw + turn * self.turn_rate * dt) % 360
+
+        rad = math.radians(self.yaw)
+        direction = np.array([right * math.cos(rad) + forward * math.sin(rad),
+                              0,
+                              right * math.sin(rad) - forward * math.cos(rad)])
+        norm = np.linalg.norm(direction)
+        if norm > 0:
+            direction /= norm  # Diagonal não é mais rápida
+        target = direction * self.max_speed * self.speed
+
+        # Aproximar a velocidade do alvo limitado pela aceleração (freia sem teclas)
+        change = target - self.velocity
+        max_change = self.acceleration * self.speed * dt
+        length = np.linalg.norm(change)
+        if length > max_change:
+            change *= max_change / length
+        self.velocity += change
+        self.position += self.velocity * dt
+        self.is_moving = norm > 0
+
     def rotate_right(self, angle):
         self.yaw -= angle
         if self.yaw < 0:
@@ -354,32 +604,55 @@ class Player:
         if self.yaw >= 360:
             self.yaw -= 360
 
-    def check_collision(self, celestial_bodies):
+    def find_collision(self, celestial_bodies, previous_positions=None):
+        """
+        Procura colisões sem alterar o estado global do jogo. Testa o segmento
+        percorrido desde o início do tick (esfera varrida), então o foguete não
+        atravessa corpos pequenos mesmo com passos grandes.
+        :param celestial_bodies: Corpos celestes a testar
+        :param previous_positions: Posições dos corpos no início do tick (None = paradas)
+        :return: Tupla (colidiu_com_sol, corpo_visitado ou None)
+        """
+        current = collision.body_positions(celestial_bodies)
+        if previous_positions is None:
+            previous_positions = current
+
+        # O Sol entra como primeiro corpo (fixo na origem, raio 5)
+        sun = np.zeros((1, 3))
+        centers0 = np.vstack([sun, previous_positions])
+        centers1 = np.vstack([sun, current])
+        radii = np.concatenate([[5.0], collision.body_radii(celestial_bodies)])
+
+        toi = collision.swept_sphere_toi(self.previous_position, self.position, self.size,
+                                         centers0, centers1, radii)
+        for i, body in enumerate(celestial_bodies):
+            if body.name in self.planetas_coletados:
+                toi[i + 1] = np.inf
+
+        first = int(np.argmin(toi))
+        if not np.isfinite(toi[first]):
+            return False, None
+        if first == 0:
+            return True, None
+        return False, celestial_bodies[first - 1]
+
+    def check_collision(self, celestial_bodies, previous_positions=None):
         global collision_detected, collided_planet, game_over
 
-        # Cheque de colisão com o sol 
-        sun_position = np.array([0, 0, 0])
-        distance_to_sun = np.linalg.norm(self.position - sun_position)
-        
-        if distance_to_sun < self.size + 5:  # Aumentado o tamanho do Sol para 5
+        hit_sun, body = self.find_collision(celestial_bodies, previous_positions)
+        if hit_sun:
             game_over = True
             end_game()
             return
 
-        for body in celestial_bodies:
-            if body.name in self.planetas_coletados:
-                continue
-
-            body_pos = np.array(body.get_position())
-            distance = np.linalg.norm(self.position - body_pos)
-
-            if distance < self.size + body.size:
-                collision_detected = True
-                collided_planet = body
-                self.planetas_coletados.append(body.name)
-                if len(self.planetas_coletados) == len(planets):
-                    end_game()
-                break
+        if body is not None:
+            collision_detected = True
+            collided_planet = body
+            self.planetas_coletados.append(body.name)
+            # Efeito da visita: o desenho consome o evento (a simulação pode estar em outra thread)
+            particle_events.append((self.position.copy(), np.array(body.get_position()), body.color))
+            if len(self.planetas_coletados) == len(planets):
+                end_game()
 
 # Instância do jogador
 player = Player([0, 2, 50])  # Posição inicial ajustada para uma visualização melhor
@@ -389,7 +662,7 @@ rings = []
 
 # Inicialização da cena
 def init_scene():
-    global planets, moons, background_texture_id, sun_texture_id, saturn_ring_texture_id, rings
+    global planets, moons, background_texture_id, sun_texture_id, rings, state_buffers
     # Definir luzes
     glEnable(GL_LIGHTING)
     glEnable(GL_LIGHT0)  # Luz do Sol
@@ -415,71 +688,46 @@ def init_scene():
 
     # Carregar Textura de Background
     try:
-        image = Image.open("textures/milky_way.jpg")  # Certifique-se de que o arquivo esteja no diretório correto
-        image = image.transpose(Image.FLIP_TOP_BOTTOM)
-        img_mode = image.mode
-        if img_mode == "RGBA":
-            img_data = image.convert("RGBA").tobytes()
-            format = GL_RGBA
-        else:
-            img_data = image.convert("RGB").tobytes()
-            format = GL_RGB
-        background_texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, background_texture_id)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexImage2D(GL_TEXTURE_2D, 0, format, image.width, image.height,
-                     0, format, GL_UNSIGNED_BYTE, img_data)
+        background_texture_id = create_texture(decode_texture("textures/milky_way.jpg"), "fundo",
+                                               wrap=GL_CLAMP_TO_EDGE, mipmaps=False)
     except Exception as e:
         print(f"Erro ao carregar textura de fundo: {e}")
         background_texture_id = None
 
     # Carregar Textura do Sol
     try:
-        image = Image.open("textures/sun.jpg")  # Certifique-se de que o arquivo esteja no diretório correto
-        image = image.transpose(Image.FLIP_TOP_BOTTOM)
-        img_mode = image.mode
-        if img_mode == "RGBA":
-            img_data = image.convert("RGBA").tobytes()
-            format = GL_RGBA
-        else:
-            img_data = image.convert("RGB").tobytes()
-            format = GL_RGB
-        sun_texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, sun_texture_id)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-        gluBuild2DMipmaps(GL_TEXTURE_2D, format, image.width, image.height, format, GL_UNSIGNED_BYTE, img_data)
+        sun_texture_id = create_texture(decode_texture("textures/sun.jpg"), "Sol")
     except Exception as e:
         print(f"Erro ao carregar textura do Sol: {e}")
         sun_texture_id = None
 
-    # Carregar Textura dos Anéis de Saturno
+    # Sprite das partículas: fire.png com queda radial
     try:
-        image = Image.open("textures/saturn_ring.png")  # Certifique-se de que o arquivo esteja no diretório correto
-        image = image.transpose(Image.FLIP_TOP_BOTTOM)
-        img_mode = image.mode
-        if img_mode == "RGBA":
-            img_data = image.convert("RGBA").tobytes()
-            format = GL_RGBA
-        else:
-            img_data = image.convert("RGB").tobytes()
-            format = GL_RGB
-        saturn_ring_texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, saturn_ring_texture_id)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-        gluBuild2DMipmaps(GL_TEXTURE_2D, format, image.width, image.height, format, GL_UNSIGNED_BYTE, img_data)
+        particles.texture_id = create_texture(load_sprite("textures/fire.png"), "partículas",
+                                              wrap=GL_CLAMP_TO_EDGE)
     except Exception as e:
-        print(f"Erro ao carregar textura dos anéis de Saturno: {e}")
-        saturn_ring_texture_id = None
-
+        print(f"Erro ao carregar textura das partículas: {e}")
+        particles.texture_id = None
+
+    create_celestial_bodies()
+    scale_distances(distance_scale)
+    state_buffers = StateBuffers(len(planets + moons), len(rings))
+    acquire_render_state()
+    build_scene_graph()
+
+# Função para afastar os planetas do Sol (raios e órbitas das luas não mudam)
+def scale_distances(scale):
+    if scale == 1.0:
+        return
+    for planet in planets:
+        planet.distance *= scale
+    # Mesmo tempo de viagem entre planetas; o plano distante só importa sem profundidade invertida
+    player.max_speed *= scale
+    player.acceleration *= scale
+    depth.fallback_far *= scale
+
+# Criação do catálogo de corpos celestes (não depende de OpenGL quando headless)
+def create_celestial_bodies():
     # Criar planetas com descrições detalhadas (sem tópicos)
     # Parâmetros: nome, cor, tamanho, distância do Sol, velocidade de órbita, velocidade de rotação, arquivo de textura, informações
     # Aumentando os tamanhos dos planetas multiplicando por 1.5
@@ -610,83 +858,24 @@ A Lua é o único satélite natural da Terra e o quinto maior do sistema solar.
     )
     moons.append(moon)
 
-# Função para desenhar texto na tela
-def draw_text(x, y, text, color):
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, window_width, 0, window_height)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    glColor3f(*color)
-    glRasterPos2f(x, y)
-    for char in text:
-        glutBitmapCharacter(GLUT_BITMAP_HELVETICA_18, ord(char))  # Usar fonte maior para melhor legibilidade
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+# Função para os corpos perto o bastante do foguete para exibir o nome
+def nearby_bodies(frame, position):
+    """
+    :param frame: Pares (corpo, posição) do quadro atual
+    :param position: Posição do foguete
+    """
+    nearby = []
+    for body, pos in frame:
+        distance = np.linalg.norm(position - np.array(pos))
+        if distance < body.size + 5:  # Ajustar limiar de proximidade
+            nearby.append(body)
+    return nearby
 
 # Função para desenhar a tela de informações do planeta
 def draw_info_screen(planet):
-    glDisable(GL_LIGHTING)
-    glDisable(GL_LIGHT0)
-    glDisable(GL_LIGHT1)
-    glDisable(GL_TEXTURE_2D)
-    glDisable(GL_DEPTH_TEST)
-
-    # Fundo semi-transparente
-    glColor4f(0, 0, 0, 0.8)
-    glBegin(GL_QUADS)
-    glVertex2f(50, 50)
-    glVertex2f(750, 50)
-    glVertex2f(750, 550)
-    glVertex2f(50, 550)
-    glEnd()
-
-    # Margens internas
-    glColor4f(1, 1, 1, 1)
-    glBegin(GL_LINE_LOOP)
-    glVertex2f(50, 50)
-    glVertex2f(750, 50)
-    glVertex2f(750, 550)
-    glVertex2f(50, 550)
-    glEnd()
-
-    # Texto informativo
-    glColor3f(1.0, 1.0, 1.0)
-
-    # Posição inicial ajustada para começar abaixo do topo
-    x_start = 60
-    y_start = 520  # Um pouco abaixo do topo da janela
-    y_offset = y_start
-    line_height = 15  # Espaçamento vertical entre linhas
-
-    # Dividir o texto em múltiplas linhas se necessário
-    info_lines = split_text(planet.info, max_length=60)
-
-    for line in info_lines:
-        if line.strip() == "":
-            y_offset -= (line_height + 5)  # Espaço extra para separar parágrafos
-            continue
-        draw_text(x_start, y_offset, line, [1.0, 1.0, 1.0])
-        y_offset -= line_height
-
-        # Verificar se a próxima linha ainda está dentro da área visível
-        if y_offset < 80:
-            break  # Pare de desenhar se chegar perto da parte inferior
-
-    # Instrução para fechar
-    draw_text(x_start, 70, "Pressione ESC para fechar.", [1.0, 1.0, 1.0])
-
-    glEnable(GL_DEPTH_TEST)
-    glEnable(GL_TEXTURE_2D)
-    glEnable(GL_LIGHTING)
-    if light_enabled:
-        glEnable(GL_LIGHT0)
-    if light_enabled:
-        glEnable(GL_LIGHT1)
+    # Painel retido: o texto é quebrado e montado em textura só quando o planeta muda
+    info_screen.show(planet, planet.info)
+    info_screen.draw(window_width, window_height)
 
 # Função auxiliar para dividir texto em linhas
 def split_text(text, max_length=60):
@@ -756,9 +945,12 @@ def draw_background():
     glMatrixMode(GL_MODELVIEW)
 
 # Função para desenhar o Sol com textura e emissão
-def draw_sun():
+def draw_sun(matrix, slices=50):
+    """
+    :param matrix: Matriz do Sol relativa à câmera
+    """
     glPushMatrix()
-    glTranslatef(0, 0, 0)  # O Sol está no centro
+    glMultMatrixf(matrix)
 
     if sun_texture_id:
         glEnable(GL_TEXTURE_2D)
@@ -770,14 +962,7 @@ def draw_sun():
     # Definir material emissivo para o Sol
     glMaterialfv(GL_FRONT_AND_BACK, GL_EMISSION, [1.0, 1.0, 1.0, 1.0])
 
-    quad = gluNewQuadric()
-    if sun_texture_id:
-        gluQuadricTexture(quad, GL_TRUE)
-        gluQuadricNormals(quad, GLU_SMOOTH)
-    else:
-        gluQuadricNormals(quad, GLU_SMOOTH)
-    gluSphere(quad, 5, 50, 50)  # Aumentado de 2 para 5
-    gluDeleteQuadric(quad)
+    gluSphere(registry.quadric(bool(sun_texture_id)), 5, slices, slices)  # Aumentado de 2 para 5
 
     if sun_texture_id:
         glDisable(GL_TEXTURE_2D)
@@ -787,62 +972,247 @@ def draw_sun():
 
     glPopMatrix()
 
-# Função de desenho da cena
-def display():
-    global start_time
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-    if game_over:
-        draw_end_game_screen()
-
-    else:
-        # Desenhar Background
-        draw_background()
+# Função para a esfera sem textura de um corpo no passe de seleção
+def draw_pick_sphere(matrix, radius, slices):
+    glPushMatrix()
+    glMultMatrixf(matrix)
+    gluSphere(registry.quadric(False), radius, slices, slices)
+    glPopMatrix()
 
-        glLoadIdentity()
+# Função para montar os dados compartilhados por todas as vistas do quadro
+def build_frame():
+    """
+    Atualiza o grafo de cena uma única vez por quadro; as vistas (principal,
+    minimapa, tela dividida) e o teste de proximidade usam as matrizes em cache.
+    :return: Lista de (corpo, posição) para planetas e luas, na ordem de desenho
+    """
+    scene_graph.update()
+    return [(body, node.position.copy()) for body, node in orbit_nodes]
+
+# Função para montar o grafo de cena: Sol -> órbitas -> planetas/luas -> anéis, foguete -> chamas
+def build_scene_graph():
+    global scene_graph, solar_system_node, rocket_node, orbit_nodes, impostor_bodies
+    scene_graph = SceneGraph()
+    solar_system_node = scene_graph.root.add(SceneNode("sistema solar", draw=draw_sun, bounds=5.0, occluder=True))
+    orbit_nodes = []
+    body_nodes = {}
+    spins = []
+    # As entradas vêm do estado publicado pela simulação (render_state), não dos objetos
+    for i, body in enumerate(planets + moons):
+        # Luas orbitam a posição do planeta pai, sem herdar a rotação dele
+        parent = solar_system_node if body.parent is None else body_nodes[id(body.parent)][0]
+        orbit = parent.add(SceneNode(f"órbita de {body.name}", inputs=lambda i=i: (render_state.angles[i, 0],),
+                                     build=body.orbit_matrix))
+        spin = orbit.add(SceneNode(body.name, inputs=lambda i=i: (render_state.angles[i, 1],),
+                                   build=lambda angle: rotation(angle, 'y'), draw=body.draw, bounds=body.size,
+                                   occluder=occlusion.is_occluder(body.size)))
+        body_nodes[id(body)] = (orbit, spin)
+        spins.append((spin, body))
+        orbit_nodes.append((body, orbit))
+    ring_nodes = {}
+    for j, ring in enumerate(rings):
+        spin = body_nodes[id(ring.planet)][1]
+        node = spin.add(SceneNode(f"anéis de {ring.planet.name}", inputs=lambda j=j: (render_state.ring_angles[j],),
+                                  build=lambda angle: rotation(angle, 'z'), draw=ring.draw, transparent=True,
+                                  bounds=ring.outer_radius))
+        ring_nodes[node] = ring
+
+    rocket_node = scene_graph.root.add(SceneNode(
+        "foguete", inputs=lambda: (*render_state.position, render_state.yaw), build=player.rocket_matrix,
+        draw=lambda matrix, slices: player.draw_rocket(matrix=matrix)))
+    rocket_node.add(SceneNode("chamas", inputs=lambda: (player.flame_animation_time,), build=player.flame_matrix,
+                              draw=draw_player_flames))
+    scene_graph.finalize()
+    impostor_bodies = {spin.index: body for spin, body in spins}
+
+    # Formas do passe de seleção: índice do nó -> objeto, consultado em tempo constante
+    picking.clear()
+    picking.register(solar_system_node.index, lambda matrix, slices: draw_pick_sphere(matrix, 5, slices))
+    for spin, body in spins:
+        picking.register(spin.index, lambda matrix, slices, body=body: draw_pick_sphere(matrix, body.size, slices),
+                         body)
+    for node, ring in ring_nodes.items():
+        picking.register(node.index, ring.draw_pick, ring)
+    picking.register(rocket_node.index, rocket_node.draw, player)
+
+# Função para as chamas em cone do foguete, usadas só quando as partículas estão desligadas
+def draw_player_flames(matrix, slices):
+    if not particles.active:
+        player.draw_flames(animate=False, matrix=matrix)
+
+# Função para avançar as partículas uma vez por quadro: explosões das visitas e escapamento do foguete
+def update_particles():
+    global particles_clock, particles_ms
+    started = time.perf_counter()
+    dt = 0.0 if particles_clock is None else min(started - particles_clock, 0.1)
+    particles_clock = started
+    while particle_events:
+        event = particle_events.popleft()
+        if event is None:
+            # Reinício do jogo: apagar o escapamento e as explosões da partida anterior
+            particles.clear()
+            exhaust.pending = 0.0
+            continue
+        contact, center, color = event
+        particles.emit(400, contact, (0.0, 0.0, 0.0), 6.0, 0.8, (1.0, 0.6, 0.2, 1.0), jitter=0.3)  # Impacto
+        particles.emit(1500, center, (0.0, 0.0, 0.0), 10.0, 1.5, (*color, 1.0), jitter=0.5)        # Coleta
+    if paused or not particles.active:
+        return
+    if render_state.moving:
+        # Bocal na base do foguete (z local = para trás), a partir da matriz de mundo em cache
+        rocket = scene_graph.worlds[rocket_node.index]
+        nozzle = (np.array([0.0, 0.0, 2.6, 1.0]) @ rocket)[:3]
+        exhaust.emit(dt, nozzle, rocket[2, :3])
+    particles.update(dt)
+    particles_ms = (time.perf_counter() - started) * 1000.0
+    metric_particles.set(particles.count)
+
+# Função para desenhar a cena 3D de uma vista
+def render_scene(camera, width, height, slices=50, animate=True, view="principal"):
+    """
+    :param camera: Câmera usada nesta vista
+    :param width: Largura da vista em pixels
+    :param height: Altura da vista em pixels
+    :param slices: Tesselação das esferas (menor no minimapa)
+    :param animate: Avançar animações (apenas uma vista por quadro)
+    :param view: Nome da vista (consultas de oclusão separadas por vista)
+    """
+    global frame_draw_calls
+    set_projection(width, height)
 
-        if not collision_detected:
-            # Definir a câmera
-            set_camera()
+    # Desenhar Background
+    draw_background()
 
-            # Configurar iluminação
-            if light_enabled:
-                glEnable(GL_LIGHT0)
-            else:
-                glDisable(GL_LIGHT0)
+    glLoadIdentity()
 
-            # Desenhar Player (Foguete)
-            if current_camera != CAMERA_FIRST_PERSON:
-                player.draw_rocket()
+    # Definir a câmera (na origem: a cena é desenhada relativa a ela)
+    eye = set_camera(camera)
+    occlusion.begin_view(view)
 
-            # Desenhar o Sol com textura e emissão
-            draw_sun()
+    # Configurar iluminação
+    if light_enabled:
+        glEnable(GL_LIGHT0)
+    else:
+        glDisable(GL_LIGHT0)
+
+    # Chamas avançam antes de atualizar o grafo; só os nós que mudaram são recalculados
+    if animate and camera != CAMERA_FIRST_PERSON and render_state.moving:
+        player.flame_animation_time += 0.05
+    scene_graph.update()
+    scene_graph.rebase(eye)  # Uma passada: posições em float64 menos a câmera, em float32
+    impostors.begin_view(view, height, -eye)
+    # Com um clique pendente, guardar os nós que passarem pelo corte para o passe de seleção
+    drawn = [] if view == "principal" and picking.requested else None
+
+    # Desenhar Player (Foguete)
+    if camera != CAMERA_FIRST_PERSON:
+        draw_nodes(rocket_node, slices, drawn)
+
+    # Desenhar foguetes dos outros jogadores conectados
+    if network_client is not None:
+        for remote in network_client.remote_players():
+            remote.draw_rocket(animate, origin=eye)
+
+    # Sol e planetas grandes (oclusores), corpos menores testados por oclusão e, por último, os anéis
+    for body, _ in orbit_nodes:
+        body.visible = False  # Corpos escondidos não chegam a desenhar
+    draw_nodes(solar_system_node, slices, drawn)
+
+    # Partículas por último: aditivas e sem gravar profundidade, todas em uma chamada
+    if particles.draw(eye, 0.5 * height / math.tan(math.radians(depth.fovy) / 2.0)):
+        frame_draw_calls += 1
+
+    if view == "principal":
+        mark_waypoint(eye, height)
+    if drawn is not None:
+        # Corpos fora do volume de visão (visible falso) também ficam fora do passe
+        if picking.render(width, height, [(key, matrix) for key, matrix in drawn
+                                          if key not in impostor_bodies or impostor_bodies[key].visible], slices):
+            frame_draw_calls += 1
+
+# Função para marcar no HUD o ponto de interceptação do piloto automático
+def mark_waypoint(eye, height):
+    guidance = render_state.guidance
+    if guidance is None or network_client is not None or render_state.game_over:
+        return
+    relative = guidance[1] - eye
+    view_matrix = np.array(glGetDoublev(GL_MODELVIEW_MATRIX)).reshape(4, 4)
+    if (np.append(relative, 1.0) @ view_matrix)[2] >= 0:
+        return  # Atrás da câmera
+    x, y, _ = gluProject(*relative)
+    scale = window_height / height  # A cena pode ter sido desenhada em um FBO menor
+    label = f"[ {guidance[0]} ]"
+    labels.text(x * scale - 4 * len(label), y * scale, label, [1.0, 1.0, 0.6])
+
+# Função para desenhar uma subárvore do grafo a partir das matrizes de mundo em cache
+def draw_nodes(subtree, slices, drawn=None):
+    """
+    :param drawn: Lista que recebe (índice, matriz) dos nós que passaram pela oclusão (passe de seleção)
+    """
+    global frame_draw_calls
+    matrices = scene_graph.relative
+    for node in scene_graph.draw_list(subtree):
+        # Resultado da consulta anterior; a deste quadro é lida em um quadro seguinte
+        matrix = matrices[node.index]
+        if not occlusion.visible(node.index, matrix, node.bounds, node.occluder):
+            continue
+        if drawn is not None:
+            drawn.append((node.index, matrix))
+        if node.transparent and impostors.flush():
+            frame_draw_calls += 1  # Impostores (opacos) antes dos anéis
+        body = impostor_bodies.get(node.index)
+        if body is not None and impostors.draw(node.index, matrix, node.bounds, node.draw):
+            body.visible = True
+            continue
+        node.draw(matrix, slices)
+        frame_draw_calls += 1
+    if impostors.flush():
+        frame_draw_calls += 1  # Todos os impostores da vista em uma chamada
 
-            # Desenhar planetas
-            for planet in planets:
-                planet.draw()
+# Função de desenho da cena
+def display():
+    global start_time, frame_draw_calls
+    frame_started = time.perf_counter()
+    gpu_timer.begin()
+    if offscreen_target is not None:
+        offscreen_target.ensure(window_width, window_height)
+        offscreen_target.bind()
+    frame_draw_calls = 0
+    acquire_render_state()  # Último tick publicado; a simulação não escreve neste bloco
+    registry.begin_frame()  # Texturas recarregadas e orçamento de VRAM
+    virtual_textures.update()  # Blocos lidos em segundo plano entram no atlas
+    procedural_textures.update()  # Mapas procedurais prontos vão para a GPU
+    picking.poll()  # Pixel do clique lido no quadro anterior
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    state = render_state  # Estado de jogo do mesmo tick que as posições
 
-            # Desenhar luas
-            for moon in moons:
-                moon.draw()
+    if state.game_over:
+        draw_end_game_screen()
 
-            # Desenhar anéis (especificamente para Saturno)
-            for ring in rings:
-                ring.draw()
+    else:
+        hud.begin(window_width, window_height)
+        labels.begin(window_width, window_height)
+        if not state.collision_detected:
+            frame = build_frame()
+            update_particles()
+            render_views()
 
             # Verificar proximidade e exibir nomes
-            for body in planets + moons:
-                pos = body.get_position()
-                distance = np.linalg.norm(player.position - np.array(pos))
-                if distance < body.size + 5:  # Ajustar limiar de proximidade
-                    draw_text(10, window_height - 30, f"Você está próximo de {body.name}", [1.0, 1.0, 1.0])
+            for body in nearby_bodies(frame, render_state.position):
+                hud.text(10, window_height - 30, f"Você está próximo de {body.name}")
+            if selected_name is not None:
+                hud.text(10, window_height - 150, f"Selecionado: {selected_name}", [0.6, 0.9, 1.0])
         else:
+            # Desenhar Background
+            draw_background()
+            glLoadIdentity()
+
             # Exibir tela de informações do planeta
-            draw_info_screen(collided_planet)
+            draw_info_screen(state.collided_planet)
 
         # Tempo passado e planetas coletados
-        if game_over:
-            timer_text = f"Final Time: {int(final_time)}s"
+        if state.game_over:
+            timer_text = f"Final Time: {int(state.final_time)}s"
         elif paused:
             timer_text = f"Time: {int(tempo_antes_pausa)}s"
         else:
@@ -850,107 +1220,468 @@ def display():
             elapsed_time = time.time() - start_time
             timer_text = f"Time: {int(elapsed_time)}s"
 
-        draw_text(10, window_height - 50, timer_text, [1.0, 1.0, 1.0])
-
-        collected_text = f"Planetas Visitados: {len(player.planetas_coletados)} / {len(planets)}"
-        draw_text(10, window_height - 80, collected_text, [1.0, 1.0, 1.0])
-
+        hud.text(10, window_height - 50, timer_text)
+
+        collected_text = f"Planetas Visitados: {len(state.visited)} / {len(planets)}"
+        hud.text(10, window_height - 80, collected_text)
+
+        # Próximo alvo do piloto automático e a ordem planejada
+        guidance = state.guidance
+        if network_client is None and guidance is not None and not state.game_over:
+            engaged = "ligado" if state.autopilot_engaged else "N para ligar"
+            labels.text(10, window_height - 110, f"Piloto automático ({engaged}): {guidance[0]} em {guidance[2]:.1f} s",
+                        [1.0, 1.0, 0.6])
+            if len(state.route) > 1:
+                hud.text(10, window_height - 130, "Rota: " + " > ".join(state.route), [1.0, 1.0, 0.6])
+
+        # Placar compartilhado entre os quiosques
+        if network_client is not None:
+            y = window_height - 30
+            for line in network_client.leaderboard_lines():
+                hud.text(window_width - 260, y, line, [1.0, 1.0, 0.6])
+                y -= 20
+
+        if show_perf_overlay:
+            draw_perf_overlay()
+
+        # HUD em um painel retido, redesenhado só quando algum texto muda; rótulos rápidos por cima
+        hud.draw(0, 0, window_width, window_height)
+        labels.draw(0, 0, window_width, window_height)
+
+    # Leitura assíncrona do quadro pronto (antes da troca de buffers)
+    capture_frame()
+    if offscreen_target is not None:
+        offscreen_target.unbind()
+
+    gpu_timer.end()
+    cpu_ms = (time.perf_counter() - frame_started) * 1000.0
     glutSwapBuffers()
+    controls.frame_presented()
+    redraw.frame_drawn()
+    metric_frames.inc()
+    metric_frame_ms.observe(cpu_ms)
+    metric_draw_calls.set(frame_draw_calls)
+    # Dicionários e filas só são percorridos aqui; a thread da telemetria lê números prontos
+    metric_texture_bytes.set(registry.used_bytes())
+    metric_input_latency.set(controls.mean_ms)
+    if gpu_timer.last_ms is not None:
+        metric_gpu_ms.set(gpu_timer.last_ms)
+
+    # Ajustar a qualidade para o próximo quadro
+    if governor.record(cpu_ms, gpu_timer.last_ms):
+        apply_mip_bias(governor.mip_bias)
+
+# Função para desenhar as vistas 3D na resolução escolhida pelo governador
+def render_views():
+    width, height = window_width, window_height
+    scale = governor.render_scale
+    # Com profundidade invertida, a cena sempre passa pelo FBO (profundidade em float)
+    scaled = (scale < 1.0 or depth.enabled) and scene_target.ensure(max(1, int(width * scale)),
+                                                                     max(1, int(height * scale)))
+    if scaled:
+        scene_target.bind()
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        width, height = scene_target.width, scene_target.height
+    slices = governor.sphere_slices
+
+    if view_mode == VIEW_SPLIT:
+        # Tela dividida: câmera atual à esquerda, vista de cima à direita
+        half = width // 2
+        glViewport(0, 0, half, height)
+        render_scene(current_camera, half, height, slices, animate=not paused)
+        glViewport(half, 0, width - half, height)
+        render_scene(CAMERA_FIXED_2, width - half, height, min(slices, 24), animate=False, view="dividida")
+    else:
+        render_scene(current_camera, width, height, slices, animate=not paused)  # Pausa congela as chamas
+    metric_visible.set(sum(1 for body, _ in orbit_nodes if body.visible))
+    metric_occluded.set(occlusion.stats["principal"][0])
+    metric_impostors.set(impostors.stats["principal"][0])
+
+    if scaled:
+        # Ampliar para a janela; HUD e minimapa continuam na resolução nativa
+        scene_target.unbind()
+        glViewport(0, 0, window_width, window_height)
+        draw_textured_quad(scene_target.texture_id, 0, 0, window_width, window_height,
+                           window_width, window_height)
+    glViewport(0, 0, window_width, window_height)
+    set_projection(window_width, window_height)
+
+    if view_mode == VIEW_MINIMAP:
+        draw_minimap()
+
+# Função para enviar o quadro atual às capturas ativas
+def capture_frame():
+    global screenshot_session
+    if capture_session is not None:
+        capture_session.capture(window_width, window_height)
+    if screenshot_session is not None:
+        screenshot_session.capture(window_width, window_height)
+        if screenshot_session.finished:
+            screenshot_session = None
+
+# Função para iniciar ou parar uma captura de vídeo/sequência de quadros
+def toggle_capture(output=None, video=False):
+    global capture_session
+    import capture
+    if capture_session is not None:
+        capture_session.stop()
+        capture_session = None
+        return
+    if output is None:
+        output = os.path.join("capturas", time.strftime("clipe_%Y%m%d_%H%M%S"))
+    try:
+        capture_session = capture.CaptureSession(output, video=video)
+    except OSError as e:
+        print(f"Captura indisponível: {e}")
+
+# Função para capturar a tela atual em PNG sem travar o quadro
+def take_screenshot():
+    global screenshot_session
+    import capture
+    if screenshot_session is None:
+        screenshot_session = capture.CaptureSession("capturas", single_frame=True,
+                                                    prefix=time.strftime("tela_%Y%m%d_%H%M%S"))
+
+# Função para aplicar o bias de mipmap escolhido pelo governador
+def apply_mip_bias(bias):
+    glTexEnvf(GL_TEXTURE_FILTER_CONTROL, GL_TEXTURE_LOD_BIAS, bias)
+
+# Função para desenhar o minimapa (vista de cima) no canto da tela
+def draw_minimap():
+    minimap_camera = CAMERA_FIXED_2
+    if minimap.available:
+        # O FBO de baixa resolução só é redesenhado na taxa do minimapa
+        if minimap.needs_refresh():
+            minimap.render(lambda w, h: render_scene(minimap_camera, w, h, slices=16, animate=False,
+                                                      view="minimapa"))
+            glViewport(0, 0, window_width, window_height)
+            set_projection(window_width, window_height)
+        minimap.composite(window_width, window_height)
+    else:
+        # Sem FBO: desenhar diretamente em uma vista no canto
+        size = minimap.display_size
+        x = window_width - size - minimap.margin
+        glViewport(x, minimap.margin, size, size)
+        glEnable(GL_SCISSOR_TEST)
+        glScissor(x, minimap.margin, size, size)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        render_scene(minimap_camera, size, size, slices=16, animate=False, view="minimapa")
+        glDisable(GL_SCISSOR_TEST)
+        glViewport(0, 0, window_width, window_height)
+        set_projection(window_width, window_height)
+
+# Função para desenhar as métricas de desempenho (tecla F)
+def draw_perf_overlay():
+    stats = controls.latency_stats()
+    if stats is None:
+        latency_text = "Latência entrada->tela: sem medições"
+    else:
+        latency_text = f"Latência entrada->tela: média {stats[0]:.1f} ms, p95 {stats[1]:.1f} ms"
+    hud.text(10, 40, latency_text, [0.6, 1.0, 0.6])
+
+    governor_text = (f"Escala {governor.render_scale * 100:.0f}%, esferas {governor.sphere_slices}, "
+                     f"bias {governor.mip_bias:.1f}, quadro {governor.recent_ms():.1f} ms "
+                     f"(alvo {governor.target_ms:.1f} ms{'' if governor.enabled else ', governador desligado'})")
+    hud.text(10, 20, governor_text, [0.6, 1.0, 0.6])
+
+    usage = registry.report()
+    budget = "sem limite" if usage['orcamento_mb'] is None else f"{usage['orcamento_mb']:.0f} MB"
+    hud.text(10, 100, f"VRAM: {usage['usado_mb']:.1f} MB de {budget}, {usage['descartes']} descartes, "
+                       f"{len(usage['vazamentos'])} vazamentos", [0.6, 1.0, 0.6])
+
+    hud.text(10, 120, redraw.report_lines()[0], [0.6, 1.0, 0.6])
+    if sim_worker is not None:
+        hud.text(10, 140, f"Simulação em thread: tick {sim_worker.tick_ms():.2f} ms", [0.6, 1.0, 0.6])
+
+    hidden, issued = occlusion.stats.get("principal", (0, 0))
+    occlusion_text = (f"Oclusão: {hidden} corpos escondidos, {issued} consultas" if occlusion.enabled and
+                      occlusion.available else "Oclusão: desligada")
+    hud.text(10, 160, occlusion_text, [0.6, 1.0, 0.6])
+
+    drawn, rendered = impostors.stats.get("principal", (0, 0))
+    hud.text(10, 180, f"Impostores: {drawn} corpos em uma chamada, {rendered} refeitos", [0.6, 1.0, 0.6])
+    particles_text = (f"Partículas: {particles.count} vivas, {particles_ms:.2f} ms" if particles.active else
+                      "Partículas: desligadas")
+    hud.text(10, 200, particles_text, [0.6, 1.0, 0.6])
+
+    tiles = virtual_textures.stats()
+    if tiles is not None:
+        hud.text(10, 80, f"Textura virtual: {tiles[0]}/{tiles[1]} blocos no atlas, {tiles[2]} pendentes",
+                  [0.6, 1.0, 0.6])
+
+    if capture_session is not None:
+        captured, written, dropped = capture_session.status()
+        hud.text(10, 60, f"Captura: {captured} lidos, {written} gravados, {dropped} descartados", [1.0, 0.5, 0.5])
 
 # Função para definir a câmera atual
-def set_camera():
-    global player
-    rad = math.radians(player.yaw)
+def set_camera(camera=None):
+    if camera is None:
+        camera = current_camera
+    position = render_state.position  # Último tick publicado pela simulação
+    rad = math.radians(render_state.yaw)
 
-    if current_camera == CAMERA_FIRST_PERSON:
+    if camera == CAMERA_FIRST_PERSON:
         # Câmera em primeira pessoa
         offset_distance = 0.8
-        eye = player.position + np.array([offset_distance * math.sin(rad),
+        eye = position + np.array([offset_distance * math.sin(rad),
                                          0.5,
                                          -offset_distance * math.cos(rad)])
-        center = player.position + np.array([math.sin(rad), 0.5, -math.cos(rad)])
+        center = position + np.array([math.sin(rad), 0.5, -math.cos(rad)]) - eye
         up = [0, 1, 0]
-        gluLookAt(eye[0], eye[1], eye[2],
-                  center[0], center[1], center[2],
-                  up[0], up[1], up[0])
 
-    elif current_camera == CAMERA_FIXED_1:
+    elif camera == CAMERA_FIXED_1:
         # Câmera fixa 1: posição fixa atrás e acima da nave, seguindo o yaw
         offset_distance_back = 20.0
         offset_height = 10.0
 
-        eye_x = player.position[0] - offset_distance_back * math.sin(rad)
-        eye_z = player.position[2] + offset_distance_back * math.cos(rad)
-        eye_y = player.position[1] + offset_height
+        eye_x = position[0] - offset_distance_back * math.sin(rad)
+        eye_z = position[2] + offset_distance_back * math.cos(rad)
+        eye_y = position[1] + offset_height
 
         eye = np.array([eye_x, eye_y, eye_z])
-        center = player.position
+        center = position - eye
         up = [0, 1, 0]
-        gluLookAt(eye[0], eye[1], eye[2],
-                  center[0], center[1], center[2],
-                  up[0], up[1], up[2])
 
-    elif current_camera == CAMERA_FIXED_2:
+    elif camera == CAMERA_FIXED_2:
         # Câmera fixa 2: posição fixa de cima, seguindo o yaw
         offset_height = 50.0
-        eye = player.position + np.array([0, offset_height, 0])
-        center = player.position
+        eye = position + np.array([0, offset_height, 0])
+        center = position - eye
         up = [0, 0, -1]  # Fixed up vector to avoid flipping
-        gluLookAt(eye[0], eye[1], eye[2], center[0], center[1], center[2], up[0], up[1], up[2])
 
-    # Atualizar posição da luz do foguete
-    glLightfv(GL_LIGHT1, GL_POSITION, [player.position[0], player.position[1], player.position[2], 1])
+    # Câmera na origem: a direção de visão é relativa ao olho e a cena é deslocada por -eye
+    gluLookAt(0, 0, 0, center[0], center[1], center[2], up[0], up[1], up[2])
 
-# Função para atualizar a cena (rotação, órbita, detecção de proximidade)
-def update(value):
-    global collision_detected
-    if not collision_detected and not paused:  # Verificar se não está pausado
-        # Atualizar planetas
-        for planet in planets:
-            planet.update()
-
-        # Atualizar luas
-        for moon in moons:
-            moon.update()
-
-        # Atualizar anéis
-        for ring in rings:
-            ring.update()
+    # Atualizar posição da luz do foguete
+    light = position - eye
+    glLightfv(GL_LIGHT1, GL_POSITION, [light[0], light[1], light[2], 1])
+    return eye
 
-        # Verificar colisões
-        player.check_collision(planets + moons)
+# Função para avançar órbitas e rotações de todos os corpos em um tick
+def update_celestial_bodies():
+    # Atualizar planetas
+    for planet in planets:
+        planet.update()
+
+    # Atualizar luas
+    for moon in moons:
+        moon.update()
+
+    # Atualizar anéis
+    for ring in rings:
+        ring.update()
+
+# Função para executar um tick da simulação local
+def simulation_step():
+    global simulation_tick
+    tick_started = time.perf_counter()
+    bodies = planets + moons
+    previous_positions = collision.body_positions(bodies)
+    autopilot.update(player, planets)
+    apply_controls(player, autopilot if autopilot.engaged else controls)
+    update_celestial_bodies()
+
+    # Verificar colisões ao longo do movimento de todo o tick
+    player.check_collision(bodies, previous_positions)
+    player.previous_position = player.position.copy()
+
+    simulation_tick += 1
+    if recorder is not None:
+        recorder.maybe_keyframe(simulation_tick, capture_state)
+    metric_tick_ms.observe((time.perf_counter() - tick_started) * 1000.0)
+
+# Função para aplicar o estado das teclas a um jogador em um tick
+def apply_controls(target, input_state, dt=TICK_DT):
+    forward, right, turn = input_state.axes()
+    target.apply_controls(forward, right, turn, dt)
+
+# Função para aplicar (e gravar) uma entrada que altera a simulação
+# Minúscula = tecla pressionada, maiúscula = tecla solta, ENTER = reiniciar
+def apply_input(key, timestamp=None):
+    if recorder is not None:
+        recorder.record_input(simulation_tick, key)
+    if key == '\r':
+        restart_game()
+    elif key == AUTOPILOT_KEY:
+        autopilot.toggle()
+    elif key.islower():
+        controls.key_down(key, timestamp)
+    else:
+        controls.key_up(key.lower(), timestamp)
 
-        # Resetar movimento
-        player.is_moving = False  # Reseta o estado de movimento após a atualização
+# Função para enviar uma entrada à simulação (pela fila da thread da simulação, se houver)
+def submit_input(key):
+    if sim_worker is not None:
+        sim_worker.post(key)
+    else:
+        apply_input(key)
+
+# Função para escrever o estado visível da simulação em um bloco do buffer triplo
+def write_render_state(state):
+    for i, body in enumerate(planets + moons):
+        state.angles[i] = (body.orbit_angle, body.rotation_angle)
+    for j, ring in enumerate(rings):
+        state.ring_angles[j] = ring.rotation_angle
+    state.position[:] = player.position
+    state.yaw = player.yaw
+    state.moving = player.is_moving
+    state.tick = simulation_tick
+    state.visited = tuple(player.planetas_coletados)
+    state.game_over = game_over
+    state.final_time = final_time
+    state.collision_detected = collision_detected
+    state.collided_planet = collided_planet
+    state.guidance = autopilot.guidance
+    state.route = tuple(autopilot.route_names(player.planetas_coletados))
+    state.autopilot_engaged = autopilot.engaged
+
+# Função para fixar o estado lido neste quadro
+def acquire_render_state():
+    global render_state
+    if sim_worker is None:
+        # Simulação na thread do GLUT (ou rede/replay): publicar o estado atual antes de desenhar
+        index = state_buffers.begin_write()
+        write_render_state(state_buffers.slots[index])
+        state_buffers.publish(index)
+    render_state = state_buffers.acquire()
+
+# Função que diz se a simulação local deve avançar neste tick
+def simulation_running():
+    return not collision_detected and not paused
+
+# Função para capturar o estado determinístico da simulação (keyframes de replay)
+def capture_state():
+    import replay
+    angles = [a for body in planets + moons for a in (body.orbit_angle, body.rotation_angle)]
+    angles += [ring.rotation_angle for ring in rings]
+    names = [body.name for body in planets + moons]
+    visited = [names.index(name) for name in player.planetas_coletados]
+    # O piloto automático ligado é gravado como uma tecla segurada a mais
+    held = sorted(controls.held) + ([AUTOPILOT_KEY] if autopilot.engaged else [])
+    elapsed = final_time if game_over else tempo_antes_pausa if paused else time.time() - start_time
+    return replay.SimulationState(angles, player.position, player.yaw, visited, player.velocity, held,
+                                  game_over, elapsed)
+
+# Função para restaurar um estado capturado por capture_state
+def restore_state(state):
+    global game_over, final_time, collision_detected, collided_planet, start_time, tempo_antes_pausa
+    bodies = planets + moons
+    for i, body in enumerate(bodies):
+        body.orbit_angle = float(state.angles[2 * i])
+        body.rotation_angle = float(state.angles[2 * i + 1])
+    for i, ring in enumerate(rings):
+        ring.rotation_angle = float(state.angles[2 * len(bodies) + i])
+    player.position = np.array(state.position, dtype='float64')
+    player.previous_position = player.position.copy()
+    player.yaw = state.yaw
+    player.planetas_coletados = [bodies[i].name for i in state.visited]
+    player.velocity = np.array(state.velocity, dtype='float64')
+    player.is_moving = False
+    controls.held = set(state.held) - {AUTOPILOT_KEY}
+    autopilot.engaged = AUTOPILOT_KEY in state.held
+    autopilot.reset()
+    # Fim de jogo e relógio do tick restaurado (voltar de uma colisão com o Sol reabre a partida)
+    game_over = state.game_over
+    final_time = state.elapsed if state.game_over else 0
+    if state.elapsed is not None:
+        start_time = time.time() - state.elapsed
+        tempo_antes_pausa = state.elapsed
+    collision_detected = False
+    collided_planet = None
 
-    glutPostRedisplay()
-    glutTimerFunc(16, update, 0)  # Aproximadamente 60 FPS
+# Função para atualizar a cena (rotação, órbita, detecção de proximidade)
+def update(value):
+    global collision_detected, collided_planet
+    active = False
+    if network_client is not None:
+        # Estado autoritativo vem do servidor, apenas interpolamos
+        network_client.apply_state(planets + moons, rings, player)
+        apply_network_events()
+        active = True
+    elif replay_player is not None:
+        # Replay: as telas de informação não interrompem a reprodução
+        if not paused:
+            if replay_player.step():
+                collision_detected = False
+                collided_planet = None
+            elif hidden_window:
+                # Vídeo de demonstração sem janela: encerrar no fim do replay
+                finish_hidden_run()
+                return
+            active = True
+    elif sim_worker is not None:
+        active = simulation_running()  # Os ticks rodam na thread da simulação
+    elif not collision_detected and not paused:  # Verificar se não está pausado
+        simulation_step()
+        active = True
+
+    # Gravações querem todos os quadros; blocos e texturas chegando mudam a imagem
+    if (active or capture_session is not None or virtual_textures.loader.pending() or registry.reloading
+            or procedural_textures.pending() or picking.pending()):
+        redraw.invalidate()
+    # Relógio do HUD (e métricas, com a tecla F) mudam a cada segundo
+    clock = None if game_over or paused else int(time.time() - start_time)
+    redraw.watch('relogio', (clock, int(time.time()) if show_perf_overlay else None))
+
+    if hidden_window:
+        display()  # Janelas ocultas não recebem eventos de redesenho
+    elif redraw.dirty:
+        glutPostRedisplay()
+    else:
+        redraw.frame_skipped()
+    glutTimerFunc(redraw.next_interval(active), update, 0)  # ~60 FPS ativo, poucas vezes por segundo parado
+
+# Função para encerrar uma execução com janela oculta, esperando a codificação
+def finish_hidden_run():
+    if capture_session is not None:
+        session = capture_session
+        toggle_capture()
+        session.join()
+    glutLeaveMainLoop()
+
+# Função para aplicar eventos do servidor (visitas e fim de jogo) ao estado local
+def apply_network_events():
+    global collision_detected, collided_planet
+    visited, finished, total_time = network_client.own_progress()
+    for name in visited:
+        if name not in player.planetas_coletados:
+            player.planetas_coletados.append(name)
+            for body in planets + moons:
+                if body.name == name:
+                    collision_detected = True
+                    collided_planet = body
+                    particle_events.append((player.position.copy(), np.array(body.get_position()), body.color))
+    if finished and not game_over:
+        end_game(total_time)
+
+# Função para buscar no replay com ',' e '.'
+def seek_replay(key):
+    if key == '.':
+        replay_player.seek(replay_player.tick + 600)  # Avançar 10 s
+    elif key == ',':
+        replay_player.seek(replay_player.tick - 600)  # Voltar 10 s
 
 # Função para gerenciar entrada do teclado
 def keyboard(key, x, y):
-    global current_camera, light_enabled, collision_detected, collided_planet, game_over, paused, tempo_antes_pausa, start_time
+    global view_mode, show_perf_overlay, current_camera, light_enabled, collision_detected, collided_planet, game_over, paused, tempo_antes_pausa, start_time
     key = key.decode('utf-8').lower()
 
     if game_over:
         if key == '\x1b':  # ESC para fechar o jogo
             glutLeaveMainLoop()
+        elif replay_player is not None:
+            seek_replay(key)  # Replay que terminou em fim de jogo: a busca continua valendo, ENTER não reinicia
         elif key == '\r':  # ENTER para reiniciar o jogo
-            restart_game()
+            submit_input(key)
     else:
         if not collision_detected:
-            if not paused:
-                if key == 'w':
-                    player.move_player(1, 0) # frente
-                elif key == 's':
-                    player.move_player(-1, 0) # trás
-                elif key == 'a':
-                    player.move_player(0, -1) # esquerda
-                elif key == 'd':
-                    player.move_player(0, 1) # direita
-                elif key == 'q':
-                    player.rotate_right(5)    # Rotacionar para a direita
-                elif key == 'e':
-                    player.rotate_left(5)     # Rotacionar para a esquerda
+            if key and key in MOVEMENT_KEYS:
+                if network_client is not None:
+                    network_client.send_input(key)
+                elif replay_player is None:
+                    submit_input(key)  # Apenas marca a tecla; o tick aplica o movimento
+            elif replay_player is not None:
+                seek_replay(key)
             # Outros botões
             if key == '1':
                 current_camera = CAMERA_FIRST_PERSON
@@ -960,6 +1691,26 @@ def keyboard(key, x, y):
                 current_camera = CAMERA_FIXED_2
             elif key == 'l':
                 light_enabled = not light_enabled
+            elif key == 'f':
+                show_perf_overlay = not show_perf_overlay
+            elif key == 'm':
+                view_mode = VIEW_SINGLE if view_mode == VIEW_MINIMAP else VIEW_MINIMAP
+                minimap.invalidate()
+            elif key == 'v':
+                view_mode = VIEW_SINGLE if view_mode == VIEW_SPLIT else VIEW_SPLIT
+            elif key == AUTOPILOT_KEY:
+                if network_client is None and replay_player is None:
+                    submit_input(key)  # Altera a simulação: passa pela fila e pela gravação
+            elif key == 'c':
+                take_screenshot()
+            elif key == 'k':
+                toggle_capture()
+            elif key == 'g':
+                # Ligar/desligar o governador (desligado = qualidade máxima)
+                governor.enabled = not governor.enabled
+                if not governor.enabled:
+                    governor.level = 0
+                    apply_mip_bias(governor.mip_bias)
             elif key == 'p':
                 paused = not paused  # Alternar estado de pausa
                 if paused:
@@ -968,11 +1719,59 @@ def keyboard(key, x, y):
                     start_time = time.time() - tempo_antes_pausa
         else:
             if key == '\x1b':  # ESC para fechar a tela de informações
-                collision_detected = False
-                collided_planet = None
+                with game_lock:  # Não sobrescrever uma colisão do tick em andamento pela metade
+                    collision_detected = False
+                    collided_planet = None
 
     glutPostRedisplay()
 
+# Função para rolar o texto da tela de informações (setas e Page Up/Down)
+def special_keys(key, x, y):
+    if not collision_detected:
+        return
+    steps = {GLUT_KEY_UP: -2 * LINE_HEIGHT, GLUT_KEY_DOWN: 2 * LINE_HEIGHT,
+             GLUT_KEY_PAGE_UP: -info_screen.body.view_height, GLUT_KEY_PAGE_DOWN: info_screen.body.view_height}
+    if key in steps:
+        info_screen.scroll(steps[key])  # Só muda o trecho mostrado; o texto não é remontado
+        glutPostRedisplay()
+
+# Função para rolar a tela de informações com a roda do mouse (botões 3 e 4 no GLUT)
+def mouse(button, state, x, y):
+    if collision_detected and state == GLUT_DOWN and button in (3, 4):
+        info_screen.scroll(-3 * LINE_HEIGHT if button == 3 else 3 * LINE_HEIGHT)
+        glutPostRedisplay()
+    elif button == GLUT_LEFT_BUTTON and state == GLUT_DOWN and not collision_detected and not game_over:
+        # Na tela dividida, só a vista da esquerda (câmera atual) é selecionável
+        width = window_width // 2 if view_mode == VIEW_SPLIT else window_width
+        if x < width:
+            picking.request(x / width, 1.0 - y / window_height, select_picked)
+            redraw.invalidate()
+            glutPostRedisplay()
+
+# Função chamada com o objeto clicado (None = clique no vazio)
+def select_picked(target):
+    global collision_detected, collided_planet, selected_name
+    if isinstance(target, Ring):
+        target = target.planet  # Anéis abrem as informações do planeta
+    if isinstance(target, Planet):
+        # Mesmo efeito do menu de planetas: tela de informações
+        with game_lock:
+            collided_planet = target
+            collision_detected = True
+    selected_name = None if target is None else "foguete" if target is player else target.name
+    redraw.invalidate()
+    glutPostRedisplay()
+
+# Função para gerenciar teclas soltas (movimento contínuo enquanto seguradas)
+def keyboard_up(key, x, y):
+    key = key.decode('utf-8').lower()
+    if not key or key not in MOVEMENT_KEYS:
+        return
+    if network_client is not None:
+        network_client.send_input(key.upper())
+    elif replay_player is None:
+        submit_input(key.upper())
+
 # Função para criar menus aprimorados
 def create_menus():
     # Menu de Câmeras
@@ -1046,8 +1845,9 @@ def menu_lighting_func(option):
 def menu_planets_func(option):
     global collision_detected, collided_planet
     if 0 <= option < len(planets + moons):
-        collided_planet = (planets + moons)[option]
-        collision_detected = True
+        with game_lock:
+            collided_planet = (planets + moons)[option]
+            collision_detected = True
         glutPostRedisplay()
 
 def menu_curiosities_func(option):
@@ -1070,8 +1870,9 @@ def menu_curiosities_func(option):
         "Netuno possui os ventos mais rápidos do sistema solar."
     ]
     if 0 <= option < len(curiosities):
-        collided_planet = CuriosityPlanet(curiosities[option])
-        collision_detected = True
+        with game_lock:
+            collided_planet = CuriosityPlanet(curiosities[option])
+            collision_detected = True
         glutPostRedisplay()
 
 def menu_controls_func(option):
@@ -1092,19 +1893,24 @@ def menu_controls_func(option):
         "Direito do Mouse: Abrir menu"
     ]
     controls_info = "\n".join(controls)
-    collided_planet = ControlsInfo(controls_info)
-    collision_detected = True
+    with game_lock:
+        collided_planet = ControlsInfo(controls_info)
+        collision_detected = True
     glutPostRedisplay()
 
 # Função de redimensionamento da janela
 def reshape(width, height):
     global window_width, window_height
     window_width = width
-    window_height = height
-    glViewport(0, 0, width, height)
+    window_height = max(height, 1)
+    glViewport(0, 0, width, window_height)
+    set_projection(width, window_height)
+    redraw.invalidate()
+
+# Função para definir a projeção perspectiva de uma vista
+def set_projection(width, height):
     glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    gluPerspective(60, float(width)/float(height), 1.0, 200.0)  # Ajustar a perspectiva para maior distância
+    depth.projection(width, height)  # Infinita com profundidade invertida; senão plano distante fixo
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
 
@@ -1126,39 +1932,28 @@ def init():
     glutTimerFunc(16, update, 0)  # Iniciar loop de atualização
 
 # Função de fim de jogo
-def end_game():
+def end_game(total_time=None):
     global game_over, final_time
     game_over = True
     if final_time == 0:
-        final_time = time.time() - start_time  # Definição do tempo final
+        if total_time is not None:
+            final_time = total_time  # Tempo informado pelo servidor
+        else:
+            final_time = time.time() - start_time  # Definição do tempo final
 
 def draw_end_game_screen():
-    global final_time
-    glDisable(GL_LIGHTING)
-    glDisable(GL_DEPTH_TEST)
-    
-    # Fundo semi-transparente
-    glColor4f(0, 0, 0, 0.8)
-    glBegin(GL_QUADS)
-    glVertex2f(0, 0)
-    glVertex2f(window_width, 0)
-    glVertex2f(window_width, window_height)
-    glVertex2f(0, window_height)
-    glEnd()
+    end_screen.begin(window_width, window_height)
 
     # Tempo total e planetas coletados
-    glColor3f(1.0, 1.0, 1.0)
-    draw_text(window_width // 2 - 150, window_height // 2 + 100, "Game Over!", [1.0, 1.0, 1.0])
-    draw_text(window_width // 2 - 180, window_height // 2 + 60, f"Final Time: {int(final_time)}s", [1.0, 1.0, 1.0])
-    collected_text = "Planetas Coletados: " + ", ".join(player.planetas_coletados)
-    draw_text(window_width // 2 - 200, window_height // 2 + 30, collected_text, [1.0, 1.0, 1.0])
+    end_screen.text(window_width // 2 - 150, window_height // 2 + 100, "Game Over!")
+    end_screen.text(window_width // 2 - 180, window_height // 2 + 60, f"Final Time: {int(render_state.final_time)}s")
+    collected_text = "Planetas Coletados: " + ", ".join(render_state.visited)
+    end_screen.text(window_width // 2 - 200, window_height // 2 + 30, collected_text)
 
     # Começar denovo ou sair
-    draw_text(window_width // 2 - 200, window_height // 2 - 30, "'ENTER' para Recomeçar", [1.0, 1.0, 1.0])
-    draw_text(window_width // 2 - 200, window_height // 2 - 60, "'ESC' para Sair", [1.0, 1.0, 1.0])
-
-    glEnable(GL_DEPTH_TEST)
-    glEnable(GL_LIGHTING)
+    end_screen.text(window_width // 2 - 200, window_height // 2 - 30, "'ENTER' para Recomeçar")
+    end_screen.text(window_width // 2 - 200, window_height // 2 - 60, "'ESC' para Sair")
+    end_screen.draw(0, 0, window_width, window_height)
 
 def restart_game():
     global start_time, game_over, final_time, collision_detected, collided_planet
@@ -1168,21 +1963,140 @@ def restart_game():
     collision_detected = False
     collided_planet = None
     player.position = np.array([0, 2, 50], dtype='float64')  # Reseta a posição do player
+    player.previous_position = player.position.copy()
+    player.velocity = np.zeros(3)
     player.planetas_coletados.clear()       # Limpa a lista dos planetas coletados
     player.yaw = 0                          # Reseta a orientação do player
+    autopilot.engaged = False
+    particle_events.append(None)            # O desenho limpa as partículas (pode estar em outra thread)
+    if network_client is not None:
+        network_client.send_restart()       # O servidor também reinicia este jogador
+
+# Função auxiliar para ler o valor de uma opção da linha de comando
+def option_value(name, default=None):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
 
 # Função principal
 def main():
+    global network_client, simulation_seed, recorder, replay_player, hidden_window, offscreen_target
+    global distance_scale
     glutInit(sys.argv)
+    hidden_window = "--hidden" in sys.argv
+    # Modo multijogador: python main.py --connect host:porta
+    if "--connect" in sys.argv:
+        import network
+        address = option_value("--connect")
+        host, port = address.rsplit(":", 1)
+        network_client = network.NetworkClient(host, int(port), Player)
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(window_width, window_height)
     glutInitWindowPosition(100, 100)
     glutCreateWindow(b"Sistema Solar Interativo 3D")
+
+    # Replay (--replay arquivo) usa a semente gravada; senão --seed ou aleatória
+    replay_file = None
+    if "--replay" in sys.argv:
+        import replay
+        replay_file = replay.Replay(option_value("--replay"))
+        simulation_seed = replay_file.seed
+        distance_scale = replay_file.distance_scale  # Órbitas da gravação, não as da linha de comando
+    else:
+        simulation_seed = int(option_value("--seed", random.randrange(2 ** 31)))
+    random.seed(simulation_seed)
+    governor.target_ms = 1000.0 / float(option_value("--target-fps", 60))
+    use_sim_thread = "--sim-thread" in sys.argv
+    if network_client is None and replay_file is None:
+        distance_scale = float(option_value("--distance-scale", 1.0))  # Servidor usa a escala original
+    occlusion.enabled = "--no-occlusion" not in sys.argv
+    impostors.enabled = "--no-impostors" not in sys.argv
+    particles.enabled = "--no-particles" not in sys.argv
+    picking.enabled = "--no-picking" not in sys.argv
+    if "--metrics-port" in sys.argv:
+        start_metrics_server(int(option_value("--metrics-port")))
+    if "--vram-budget" in sys.argv:
+        budget = float(option_value("--vram-budget"))
+        registry.budget_bytes = int(budget * 1024 * 1024) if budget > 0 else None
     init()
+    if "--no-reversed-z" not in sys.argv:
+        depth.enable()
+
+    if replay_file is not None:
+        replay_player = replay.ReplayPlayer(replay_file, sys.modules[__name__])
+    elif "--record" in sys.argv:
+        import atexit
+        import replay
+        state = capture_state()
+        recorder = replay.Recorder(option_value("--record"), simulation_seed, len(state.angles),
+                                   distance_scale=distance_scale)
+        recorder.record_keyframe(simulation_tick, state)
+        atexit.register(lambda: recorder.close(simulation_tick, capture_state()))
+    # Gravando ou reproduzindo, a rota do piloto automático é planejada no próprio tick (determinística)
+    autopilot.synchronous = recorder is not None or replay_player is not None
     glutDisplayFunc(display)
     glutReshapeFunc(reshape)
     glutKeyboardFunc(keyboard)
+    glutKeyboardUpFunc(keyboard_up)
+    glutSpecialFunc(special_keys)
+    glutMouseFunc(mouse)
+    glutIgnoreKeyRepeat(1)  # Movimento vem do estado das teclas, não das repetições
+
+    # Captura desde o início: --capture diretório (PNGs) ou --capture-video arquivo (ffmpeg)
+    if "--capture" in sys.argv:
+        toggle_capture(option_value("--capture"))
+    elif "--capture-video" in sys.argv:
+        toggle_capture(option_value("--capture-video"), video=True)
+        if capture_session is None:
+            sys.exit(1)  # Vídeo pedido na linha de comando sem codificador: não rodar à toa
+    if hidden_window:
+        glutHideWindow()
+        offscreen_target = RenderTarget("janela oculta")
+    import atexit
+    atexit.register(stop_captures)
+    atexit.register(report_resources)
+    atexit.register(procedural_textures.shutdown)
+
+    # Simulação local em thread própria (rede e replay continuam na thread do GLUT)
+    if use_sim_thread and network_client is None and replay_player is None:
+        start_simulation_worker()
     glutMainLoop()
 
+# Função para expor a telemetria em http://127.0.0.1:porta/metrics (e /metrics.json)
+def start_metrics_server(port):
+    from telemetry import MetricsServer
+    # Valores simples lidos só quando alguém consulta: sem custo no quadro
+    metrics.gauge("render_scale", "Escala de renderização escolhida pelo governador",
+                  lambda: governor.render_scale)
+    metrics.gauge("planets_visited", "Planetas visitados pelo jogador", lambda: len(player.planetas_coletados))
+    metrics.gauge("elapsed_seconds", "Tempo de jogo (s)", lambda: final_time if game_over else
+                  tempo_antes_pausa if paused else time.time() - start_time)
+    MetricsServer(metrics, port=port).start()
+
+# Função para iniciar a thread da simulação
+def start_simulation_worker():
+    global sim_worker
+    import atexit
+    sim_worker = SimulationWorker(simulation_step, apply_input, write_render_state, state_buffers,
+                                  TICK_DT, simulation_running, game_lock)
+    sim_worker.start()
+    atexit.register(sim_worker.stop)  # Antes de fechar a gravação (atexit roda em ordem inversa)
+
+# Função para finalizar capturas pendentes ao sair (o contexto GL pode já não existir)
+def stop_captures():
+    if capture_session is not None:
+        capture_session.stop(flush=False)
+        capture_session.join()
+
+# Função para mostrar o uso de recursos de GPU, vazamentos e o custo do redesenho ao sair
+def report_resources():
+    usage = registry.report()
+    for kind, (count, nbytes) in usage['por_tipo'].items():
+        print(f"Recursos de GPU vivos: {count} {kind}(s), {nbytes / (1024 * 1024):.1f} MB")
+    for label in usage['vazamentos']:
+        print(f"Vazamento: {label} não foi liberado antes do dono ser descartado")
+    for line in redraw.report_lines():
+        print(line)
+
 if __name__ == "__main__":
     main()
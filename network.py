@@ -0,0 +1,360 @@
+import json
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Tipos de mensagem do protocolo (1 byte após o tamanho do quadro)
+MSG_WELCOME = 1      # servidor -> cliente: JSON com id, taxas de tick/snapshot e corpos
+MSG_KEYFRAME = 2     # servidor -> cliente: estado completo quantizado
+MSG_DELTA = 3        # servidor -> cliente: diferença em relação ao snapshot anterior
+MSG_LEADERBOARD = 4  # servidor -> cliente: JSON com as linhas do placar que mudaram (ou o placar completo)
+MSG_INPUT = 5        # cliente -> servidor: tecla pressionada ou solta
+MSG_RESTART = 6      # cliente -> servidor: reiniciar o jogo deste jogador
+MSG_RESYNC = 7       # cliente -> servidor: base do delta perdida, enviar um keyframe
+
+# Cabeçalho de quadro: tamanho do corpo (uint32) + tipo (uint8)
+FRAME_HEADER = struct.Struct('<IB')
+KEYFRAME_HEADER = struct.Struct('<IHH')   # tick, n_ângulos, n_jogadores
+DELTA_HEADER = struct.Struct('<IIHH')     # tick, tick_base, n_ângulos, n_jogadores
+
+# Quantização: ângulos em uint16 (360° / 65536) e posições em passos de 1/64 unidade
+ANGLE_SCALE = 65536 / 360.0
+POSITION_SCALE = 64.0
+
+# Comandos de entrada aceitos pelo servidor: minúscula = pressionada, maiúscula = solta
+INPUT_KEYS = 'wsadqeWSADQE'
+
+
+def encode_frame(msg_type, payload):
+    return FRAME_HEADER.pack(len(payload), msg_type) + payload
+
+
+def encode_json(msg_type, data):
+    return encode_frame(msg_type, json.dumps(data).encode('utf-8'))
+
+
+# Classe para representar um snapshot quantizado do estado da simulação
+class Snapshot:
+    def __init__(self, tick, angles, player_ids, player_values):
+        """
+        :param tick: Número do tick da simulação
+        :param angles: Ângulos de órbita/rotação quantizados (uint16)
+        :param player_ids: Identificadores dos jogadores (int32)
+        :param player_values: Por jogador [x, y, z, yaw] quantizados (int32, shape (n, 4))
+        """
+        self.tick = tick
+        self.angles = angles
+        self.player_ids = player_ids
+        self.player_values = player_values
+
+    @classmethod
+    def capture(cls, tick, bodies, rings, players):
+        """
+        Quantiza o estado atual.
+        :param bodies: Planetas e luas, na ordem do catálogo
+        :param rings: Anéis, na ordem do catálogo
+        :param players: Dicionário id -> Player
+        """
+        raw = [a for body in bodies for a in (body.orbit_angle, body.rotation_angle)]
+        raw += [ring.rotation_angle for ring in rings]
+        angles = quantize_angles(np.array(raw, dtype=np.float64))
+        ids = np.array(sorted(players), dtype=np.int32)
+        values = np.zeros((len(ids), 4), dtype=np.int32)
+        for row, player_id in enumerate(ids):
+            p = players[int(player_id)]
+            values[row, :3] = np.round(p.position * POSITION_SCALE)
+            values[row, 3] = quantize_angles(np.array([p.yaw]))[0]
+        return cls(tick, angles, ids, values)
+
+    def encode_keyframe(self):
+        payload = KEYFRAME_HEADER.pack(self.tick, len(self.angles), len(self.player_ids))
+        payload += self.angles.astype('<u2').tobytes()
+        table = np.column_stack([self.player_ids, self.player_values]).astype('<i4')
+        payload += table.tobytes()
+        return encode_frame(MSG_KEYFRAME, payload)
+
+    def encode_delta(self, base):
+        """
+        Codifica a diferença para `base`: máscara de bits dos valores alterados
+        seguida das diferenças em int16. Retorna None quando um keyframe é
+        necessário (jogadores mudaram ou diferença fora do intervalo).
+        """
+        if len(base.angles) != len(self.angles) or not np.array_equal(base.player_ids, self.player_ids):
+            return None
+        diff = self._flat(self) - self._flat(base)
+        # Ângulos (incluindo o yaw) dão a volta em 65536
+        wrap = self._wrap_mask(len(self.angles), len(self.player_ids))
+        diff[wrap] = (diff[wrap] + 32768) % 65536 - 32768
+        if np.any(np.abs(diff) > 32767):
+            return None
+        changed = diff != 0
+        payload = DELTA_HEADER.pack(self.tick, base.tick, len(self.angles), len(self.player_ids))
+        payload += np.packbits(changed).tobytes()
+        payload += diff[changed].astype('<i2').tobytes()
+        return encode_frame(MSG_DELTA, payload)
+
+    @staticmethod
+    def _flat(snapshot):
+        return np.concatenate([snapshot.angles.astype(np.int64),
+                               snapshot.player_values.astype(np.int64).ravel()])
+
+    @staticmethod
+    def _wrap_mask(n_angles, n_players):
+        mask = np.zeros(n_angles + 4 * n_players, dtype=bool)
+        mask[:n_angles] = True
+        mask[n_angles + 3::4] = True
+        return mask
+
+    @classmethod
+    def decode_keyframe(cls, payload):
+        tick, n_angles, n_players = KEYFRAME_HEADER.unpack_from(payload)
+        offset = KEYFRAME_HEADER.size
+        angles = np.frombuffer(payload, dtype='<u2', count=n_angles, offset=offset).astype(np.uint16)
+        offset += 2 * n_angles
+        table = np.frombuffer(payload, dtype='<i4', count=5 * n_players, offset=offset).reshape(n_players, 5)
+        return cls(tick, angles, table[:, 0].astype(np.int32), table[:, 1:].astype(np.int32))
+
+    @classmethod
+    def decode_delta(cls, payload, base):
+        tick, base_tick, n_angles, n_players = DELTA_HEADER.unpack_from(payload)
+        if base is None or base.tick != base_tick:
+            raise ValueError(f"Delta do tick {tick} exige base {base_tick}")
+        total = n_angles + 4 * n_players
+        offset = DELTA_HEADER.size
+        mask_bytes = (total + 7) // 8
+        changed = np.unpackbits(np.frombuffer(payload, dtype=np.uint8, count=mask_bytes, offset=offset),
+                                count=total).astype(bool)
+        offset += mask_bytes
+        diff = np.zeros(total, dtype=np.int64)
+        diff[changed] = np.frombuffer(payload, dtype='<i2', count=int(changed.sum()), offset=offset)
+        flat = cls._flat(base) + diff
+        wrap = cls._wrap_mask(n_angles, n_players)
+        flat[wrap] %= 65536
+        angles = flat[:n_angles].astype(np.uint16)
+        values = flat[n_angles:].reshape(n_players, 4).astype(np.int32)
+        return cls(tick, angles, base.player_ids.copy(), values)
+
+
+def quantize_angles(degrees):
+    return (np.round(np.mod(degrees, 360.0) * ANGLE_SCALE).astype(np.int64) % 65536).astype(np.uint16)
+
+
+def dequantize_angles(values):
+    return values.astype(np.float64) / ANGLE_SCALE
+
+
+# Classe para guardar snapshots recebidos e interpolar entre eles
+class SnapshotBuffer:
+    def __init__(self, tick_rate, delay_ticks=2, capacity=32):
+        """
+        :param tick_rate: Ticks por segundo do servidor
+        :param delay_ticks: Atraso de renderização (em ticks) usado para interpolar
+        :param capacity: Quantidade máxima de snapshots guardados
+        """
+        self.tick_interval = 1.0 / tick_rate
+        self.delay = delay_ticks * self.tick_interval
+        self.snapshots = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.clock_offset = None  # tempo local - tempo do servidor (tick * intervalo)
+
+    def push(self, snapshot):
+        server_time = snapshot.tick * self.tick_interval
+        offset = time.perf_counter() - server_time
+        with self.lock:
+            # O menor atraso observado aproxima o relógio do servidor
+            if self.clock_offset is None or offset < self.clock_offset:
+                self.clock_offset = offset
+            self.snapshots.append(snapshot)
+
+    def sample(self, now=None):
+        """
+        Interpola entre os dois snapshots que cercam o tempo de renderização.
+        :return: (ângulos em graus, ids dos jogadores, posições float, yaws) ou None
+        """
+        if now is None:
+            now = time.perf_counter()
+        with self.lock:
+            if not self.snapshots:
+                return None
+            render_tick = (now - self.clock_offset - self.delay) / self.tick_interval
+            older = newer = self.snapshots[-1]
+            for snap in reversed(self.snapshots):
+                if snap.tick <= render_tick:
+                    older = snap
+                    break
+                newer = snap
+                older = snap
+
+        if newer.tick == older.tick:
+            t = 0.0
+        else:
+            t = min(max((render_tick - older.tick) / (newer.tick - older.tick), 0.0), 1.0)
+
+        a0 = dequantize_angles(older.angles)
+        a1 = dequantize_angles(newer.angles)
+        angles = np.mod(a0 + shortest_arc(a0, a1) * t, 360.0)
+
+        # Jogadores só interpolam se o conjunto for o mesmo nos dois snapshots
+        if not np.array_equal(older.player_ids, newer.player_ids):
+            older = newer
+            t = 0.0
+        p0 = older.player_values[:, :3] / POSITION_SCALE
+        p1 = newer.player_values[:, :3] / POSITION_SCALE
+        y0 = dequantize_angles(older.player_values[:, 3])
+        y1 = dequantize_angles(newer.player_values[:, 3])
+        positions = p0 + (p1 - p0) * t
+        yaws = np.mod(y0 + shortest_arc(y0, y1) * t, 360.0)
+        return angles, newer.player_ids, positions, yaws
+
+
+def shortest_arc(a0, a1):
+    return (a1 - a0 + 180.0) % 360.0 - 180.0
+
+
+# Classe do cliente de rede usado pelo renderizador (thread de recepção bloqueante)
+class NetworkClient:
+    def __init__(self, host, port, player_class):
+        """
+        :param host: Endereço do servidor de simulação
+        :param port: Porta TCP do servidor
+        :param player_class: Classe usada para desenhar os foguetes remotos
+        """
+        self.player_class = player_class
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.send_lock = threading.Lock()
+        self.player_id = None
+        self.buffer = None
+        self.last_snapshot = None
+        self.leaderboard = {}
+        self.remote = {}  # id -> Player usado apenas para desenhar
+        self.resyncing = False  # Keyframe pedido depois de um quadro inválido; deltas descartados até lá
+        self.connected = True
+        self.welcome = threading.Event()
+        self.thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self.thread.start()
+        self.welcome.wait(5.0)
+
+    def _read_exact(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Conexão com o servidor encerrada")
+            data += chunk
+        return bytes(data)
+
+    def _receive_loop(self):
+        try:
+            while True:
+                length, msg_type = FRAME_HEADER.unpack(self._read_exact(FRAME_HEADER.size))
+                payload = self._read_exact(length)
+                try:
+                    self._handle(msg_type, payload)
+                except (ValueError, KeyError, struct.error) as e:
+                    self._resync(e)
+        except (ConnectionError, OSError) as e:
+            print(f"Cliente de rede desconectado: {e}")
+        self.connected = False
+
+    def _resync(self, error):
+        """
+        Quadro que não pôde ser decodificado (ex.: delta sobre outra base): descartado,
+        e o servidor é avisado uma vez para mandar um keyframe.
+        """
+        if self.resyncing:
+            return
+        print(f"Quadro de rede descartado, pedindo keyframe: {error}")
+        self.resyncing = True
+        self.last_snapshot = None
+        self._send(encode_frame(MSG_RESYNC, b''))
+
+    def _handle(self, msg_type, payload):
+        if msg_type == MSG_WELCOME:
+            info = json.loads(payload)
+            self.player_id = info['id']
+            # Interpolar com dois intervalos de snapshot de atraso
+            delay_ticks = 2 * info['tick_rate'] / info['snapshot_rate']
+            self.buffer = SnapshotBuffer(info['tick_rate'], delay_ticks)
+            self.welcome.set()
+        elif msg_type == MSG_KEYFRAME:
+            self.last_snapshot = Snapshot.decode_keyframe(payload)
+            self.resyncing = False
+            self.buffer.push(self.last_snapshot)
+        elif msg_type == MSG_DELTA:
+            self.last_snapshot = Snapshot.decode_delta(payload, self.last_snapshot)
+            self.buffer.push(self.last_snapshot)
+        elif msg_type == MSG_LEADERBOARD:
+            update = json.loads(payload)
+            board = {} if update['completo'] else dict(self.leaderboard)
+            board.update({int(k): v for k, v in update['linhas'].items()})
+            for player_id in update['removidos']:
+                board.pop(player_id, None)
+            self.leaderboard = board  # Uma única atribuição: o renderizador lê de outra thread
+
+    def _send(self, frame):
+        with self.send_lock:
+            self.sock.sendall(frame)
+
+    def send_input(self, key):
+        self._send(encode_frame(MSG_INPUT, key.encode('ascii')))
+
+    def send_restart(self):
+        self._send(encode_frame(MSG_RESTART, b''))
+
+    def apply_state(self, bodies, rings, player):
+        """
+        Copia o estado interpolado para os objetos locais do renderizador.
+        """
+        if self.buffer is None:
+            return
+        sample = self.buffer.sample()
+        if sample is None:
+            return
+        angles, ids, positions, yaws = sample
+        for i, body in enumerate(bodies):
+            body.orbit_angle = angles[2 * i]
+            body.rotation_angle = angles[2 * i + 1]
+        for i, ring in enumerate(rings):
+            ring.rotation_angle = angles[2 * len(bodies) + i]
+
+        seen = set()
+        for player_id, position, yaw in zip(ids.tolist(), positions, yaws):
+            if player_id == self.player_id:
+                moved = not np.allclose(player.position, position)
+                player.position = np.array(position, dtype='float64')
+                player.yaw = float(yaw)
+                player.is_moving = moved
+                continue
+            remote = self.remote.get(player_id)
+            if remote is None:
+                remote = self.remote[player_id] = self.player_class(position)
+            remote.is_moving = not np.allclose(remote.position, position)
+            remote.position = np.array(position, dtype='float64')
+            remote.yaw = float(yaw)
+            seen.add(player_id)
+        for player_id in list(self.remote):
+            if player_id not in seen:
+                del self.remote[player_id]
+
+    def remote_players(self):
+        return list(self.remote.values())
+
+    def own_progress(self):
+        entry = self.leaderboard.get(self.player_id)
+        if entry is None:
+            return [], False, 0
+        return entry['visitados'], entry['finalizado'], entry['tempo']
+
+    def leaderboard_lines(self):
+        ranking = sorted(self.leaderboard.items(),
+                         key=lambda item: (-len(item[1]['visitados']), item[1]['tempo']))
+        lines = ["Placar:"]
+        for player_id, entry in ranking[:5]:
+            marker = "*" if player_id == self.player_id else " "
+            lines.append(f"{marker}{entry['nome']}: {len(entry['visitados'])}")
+        return lines
@@ -0,0 +1,111 @@
+"""
+Oclusão por consultas de hardware: o Sol e os planetas grandes (oclusores)
+são desenhados primeiro; para os demais corpos, uma caixa envolvente é
+desenhada sem cor nem profundidade dentro de uma consulta GL_SAMPLES_PASSED.
+O resultado só é lido quando já está disponível (em geral no quadro
+seguinte), então a CPU nunca espera pela GPU: um corpo que a última consulta
+viu escondido não é desenhado, e um corpo que reaparece volta um quadro
+depois. Cada vista (principal, tela dividida, minimapa) tem suas consultas.
+As matrizes recebidas são relativas à câmera (a câmera fica na origem).
+"""
+import numpy as np
+from OpenGL.GL import *
+
+# Cubo unitário (-1..1) desenhado como caixa envolvente
+CUBE_FACES = (
+    ((-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)),
+    ((1, -1, -1), (-1, -1, -1), (-1, 1, -1), (1, 1, -1)),
+    ((-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1)),
+    ((1, -1, 1), (1, -1, -1), (1, 1, -1), (1, 1, 1)),
+    ((-1, 1, 1), (1, 1, 1), (1, 1, -1), (-1, 1, -1)),
+    ((-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1)),
+)
+
+
+# Classe para o estado de oclusão de um corpo em uma vista
+class OcclusionQuery:
+    def __init__(self, query):
+        self.query = query
+        self.pending = False
+        self.hidden = False
+
+
+# Classe para a oclusão com resultados do quadro anterior
+class OcclusionCuller:
+    def __init__(self, occluder_radius=2.5):
+        """
+        :param occluder_radius: Raio a partir do qual um corpo opaco é oclusor (sempre desenhado, sem consulta)
+        """
+        self.occluder_radius = occluder_radius
+        self.enabled = True
+        self.available = True
+        self.views = {}
+        self.current = None
+        self.counts = None
+        self.stats = {}  # Por vista: [corpos não desenhados, consultas emitidas] no último desenho
+
+    def begin_view(self, view):
+        """
+        :param view: Nome da vista (cada uma guarda as próprias consultas)
+        """
+        self.current = self.views.setdefault(view, {})
+        self.counts = self.stats[view] = [0, 0]
+
+    def is_occluder(self, radius):
+        """
+        Se um corpo opaco deste raio deve ser marcado como oclusor no grafo de cena.
+        """
+        return radius >= self.occluder_radius
+
+    def visible(self, key, matrix, radius, occluder=False):
+        """
+        Decide se um corpo deve ser desenhado e, se a consulta anterior já terminou, emite outra.
+        :param key: Identificador do corpo (índice do nó no grafo de cena)
+        :param matrix: Matriz do corpo relativa à câmera
+        :param radius: Raio da esfera envolvente em coordenadas do corpo (None = sem caixa, sempre desenhado)
+        :param occluder: Oclusores são sempre desenhados, sem consulta
+        """
+        if not self.enabled or not self.available or occluder or radius is None:
+            return True
+        # Câmera dentro (ou quase) da caixa: a caixa seria cortada pelo plano próximo
+        if np.linalg.norm(matrix[3, :3]) < radius * 1.75 + 1.0:
+            return True
+        try:
+            state = self.current.get(key)
+            if state is None:
+                state = self.current[key] = OcclusionQuery(int(glGenQueries(1)[0]))
+            if state.pending and glGetQueryObjectiv(state.query, GL_QUERY_RESULT_AVAILABLE):
+                state.hidden = glGetQueryObjectiv(state.query, GL_QUERY_RESULT) == 0
+                state.pending = False
+            # Com o resultado anterior ainda em trânsito, manter a decisão sem emitir outra consulta
+            if not state.pending:
+                self._issue(state, matrix, radius)
+        except Exception as e:
+            print(f"Consultas de oclusão indisponíveis: {e}")
+            self.available = False
+            return True
+        if state.hidden:
+            self.counts[0] += 1
+        return not state.hidden
+
+    def _issue(self, state, matrix, radius):
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_TEXTURE_2D)
+        glDisable(GL_CULL_FACE)
+        glColorMask(GL_FALSE, GL_FALSE, GL_FALSE, GL_FALSE)
+        glDepthMask(GL_FALSE)
+        glPushMatrix()
+        glMultMatrixf(matrix)
+        glScalef(radius, radius, radius)
+        glBeginQuery(GL_SAMPLES_PASSED, state.query)
+        glBegin(GL_QUADS)
+        for face in CUBE_FACES:
+            for vertex in face:
+                glVertex3f(*vertex)
+        glEnd()
+        glEndQuery(GL_SAMPLES_PASSED)
+        glPopMatrix()
+        glPopAttrib()
+        state.pending = True
+        self.counts[1] += 1
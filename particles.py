@@ -0,0 +1,268 @@
+"""
+Sistema de partículas vetorizado para o escapamento do foguete e efeitos de
+visita. Posições, velocidades, tempos de vida e cores ficam em arrays do
+NumPy pré-alocados com a capacidade máxima; uma pilha de índices livres
+(também um array) entrega e recebe de volta as vagas, então emitir e
+descartar partículas não cria objetos. A pilha fica ordenada e entrega
+sempre as menores vagas, então as vivas ficam concentradas no começo dos
+arrays: a
+atualização e o envio percorrem [0, maior vaga em uso) com operações sobre
+os arrays inteiros, sem compactar, e as vagas mortas nesse trecho saem com
+alfa zero (invisíveis na mistura aditiva). Tudo vai para a GPU em um único
+buffer, desenhado como point sprites aditivos em uma chamada. As posições
+ficam em float64 no mundo e são enviadas relativas à câmera, em float32.
+"""
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+from PIL import Image
+
+
+# Função para montar o sprite das partículas a partir de uma textura (fogo contínuo -> bola de fogo)
+def load_sprite(texture_file, size=64):
+    """
+    A textura é reduzida e multiplicada por uma queda radial; com mistura
+    aditiva, as bordas pretas não aparecem.
+    :return: (largura, altura, formato GL, bytes) no formato de decode_texture
+    """
+    image = Image.open(texture_file).convert("RGB").resize((size, size), Image.BILINEAR)
+    rgb = np.asarray(image, dtype=np.float32) / 255.0
+    coords = (np.arange(size, dtype=np.float32) + 0.5) / size * 2.0 - 1.0
+    radius = np.sqrt(coords[None, :] ** 2 + coords[:, None] ** 2)
+    falloff = np.clip(1.0 - radius, 0.0, 1.0) ** 1.5
+    rgba = np.concatenate([rgb * falloff[..., None], falloff[..., None]], axis=-1)
+    return size, size, GL_RGBA, (rgba * 255.0).astype(np.uint8).tobytes()
+
+
+# Classe para as partículas de todos os efeitos, em arrays de capacidade fixa
+class ParticleSystem:
+    def __init__(self, capacity=50000, drag=1.5, radius=0.35, seed=None):
+        """
+        :param capacity: Máximo de partículas vivas (emissões além disso são ignoradas)
+        :param drag: Fração da velocidade perdida por segundo
+        :param radius: Raio de cada partícula em unidades do mundo
+        :param seed: Semente do gerador (efeitos são só visuais: fora do replay)
+        """
+        self.capacity = capacity
+        self.drag = drag
+        self.radius = radius
+        self.rng = np.random.default_rng(seed)
+        # Um array por componente (x, y, z): as operações percorrem linhas contíguas
+        self.position = np.zeros((3, capacity))
+        self.velocity = np.zeros((3, capacity), dtype=np.float32)
+        self.alpha = np.zeros(capacity, dtype=np.float32)     # Opacidade ao nascer
+        self.life = np.zeros(capacity, dtype=np.float32)      # Segundos restantes
+        self.lifetime = np.ones(capacity, dtype=np.float32)   # Duração total
+        self.alive = np.zeros(capacity, dtype=bool)
+        # Pilha de vagas: o topo tem os menores índices, mantendo as vivas no começo dos arrays
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int64)
+        self.free_count = capacity
+        self.count = 0
+        self.high = 0  # Uma além da maior vaga em uso: só [0, high) é atualizado e desenhado
+        # Áreas de trabalho reaproveitadas a cada quadro
+        self.step = np.zeros((3, capacity))
+        self.dead = np.zeros(capacity, dtype=bool)
+        self.fade = np.zeros(capacity, dtype=np.float32)
+        # Arrays de envio, um vértice por linha (layout de glVertexPointer/glColorPointer); o RGB
+        # é gravado na emissão e só o alfa muda por quadro (na mistura aditiva ele apaga a cor toda)
+        self.upload_positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.upload_colors = np.zeros((capacity, 4), dtype=np.float32)
+        self.buffer = None
+        self.texture_id = None
+        self.enabled = True
+        self.available = True
+
+    @property
+    def active(self):
+        """
+        Se as partículas estão sendo desenhadas (senão o foguete usa as chamas em cone).
+        """
+        return self.enabled and self.available and self.texture_id is not None
+
+    def emit(self, count, origin, velocity, spread, lifetime, color, jitter=0.0):
+        """
+        :param count: Quantidade de partículas
+        :param origin: Posição de origem no mundo
+        :param velocity: Velocidade média (unidades por segundo)
+        :param spread: Desvio padrão da velocidade em cada eixo
+        :param lifetime: Duração máxima em segundos (cada partícula vive entre 60% e 100% dela)
+        :param color: Cor RGBA ao nascer (apaga até o preto transparente ao longo da vida)
+        :param jitter: Desvio padrão da posição inicial
+        :return: Quantidade emitida (limitada às vagas livres)
+        """
+        count = min(int(count), self.free_count)
+        if count <= 0:
+            return 0
+        index = self.free[self.free_count - count:self.free_count].copy()
+        self.free_count -= count
+        origin = np.asarray(origin, dtype=np.float64).reshape(3, 1)
+        velocity = np.asarray(velocity, dtype=np.float64).reshape(3, 1)
+        if jitter:
+            self.position[:, index] = origin + self.rng.normal(scale=jitter, size=(3, count))
+        else:
+            self.position[:, index] = origin
+        self.velocity[:, index] = velocity + self.rng.normal(scale=spread, size=(3, count))
+        life = lifetime * self.rng.uniform(0.6, 1.0, count)
+        self.life[index] = life
+        self.lifetime[index] = life
+        self.upload_colors[index, :3] = color[:3]
+        self.alpha[index] = color[3]
+        self.alive[index] = True
+        self.count += count
+        self.high = max(self.high, int(index.max()) + 1)
+        return count
+
+    def update(self, dt):
+        """
+        Avança todas as partículas de uma vez e devolve as que morreram à pilha de vagas.
+        """
+        high = self.high
+        if high == 0:
+            return
+        alive, life = self.alive[:high], self.life[:high]
+        life -= dt
+        dead = self.dead[:high]
+        np.less_equal(life, 0.0, out=dead)
+        dead &= alive
+        if dead.any():
+            index = np.flatnonzero(dead)
+            alive[index] = False
+            self.count -= len(index)
+            # Pilha ordenada: no fundo, as vagas >= high (todas livres, em ordem decrescente); o topo
+            # (vagas livres abaixo de high) é intercalado com as que morreram, as menores por cima
+            base = self.capacity - high
+            below = np.concatenate((self.free[base:self.free_count], index))
+            below.sort(kind='stable')  # Duas sequências já ordenadas: intercalação linear
+            self.free_count = base + len(below)
+            self.free[base:self.free_count] = below[::-1]
+        if self.count == 0:
+            self.high = 0
+            return
+        if not alive[high - 1]:
+            # O topo do trecho morreu: encolher até a maior vaga viva
+            self.high = high = int(np.flatnonzero(alive)[-1]) + 1
+
+        # Vagas mortas abaixo de high também se movem: mais barato que separá-las
+        velocity = self.velocity[:, :high]
+        velocity *= max(0.0, 1.0 - self.drag * dt)
+        step = self.step[:, :high]
+        np.multiply(velocity, dt, out=step)
+        self.position[:, :high] += step
+
+    def stage(self, eye):
+        """
+        Preenche os arrays de envio com [0, high): posição relativa à câmera e alfa
+        apagado pela vida restante. Vagas mortas têm vida <= 0 e ficam com alfa zero,
+        que não soma nada na mistura aditiva.
+        :return: Quantidade de vértices a desenhar
+        """
+        high = self.high
+        if high == 0:
+            return 0
+        fade = self.fade[:high]
+        np.divide(self.life[:high], self.lifetime[:high], out=fade)
+        np.clip(fade, 0.0, 1.0, out=fade)
+        np.multiply(self.alpha[:high], fade, out=self.upload_colors[:high, 3])
+        # Diferença em float64 (escala real), gravada em float32
+        np.subtract(self.position[:, :high], np.asarray(eye, dtype=np.float64)[:, None],
+                    out=self.upload_positions[:high].T)
+        return high
+
+    def draw(self, eye, focal_px):
+        """
+        Envia as partículas em um buffer e desenha todas em uma chamada.
+        :param eye: Posição da câmera no mundo (a cena é desenhada relativa a ela)
+        :param focal_px: Distância focal da vista em pixels (tamanho do sprite na tela)
+        :return: Quantidade de partículas vivas desenhadas
+        """
+        if not self.active:
+            return 0
+        count = self.stage(eye)
+        if count == 0:
+            return 0
+        try:
+            if self.buffer is None:
+                self.buffer = int(glGenBuffers(1))
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffer)
+            # Um buffer novo por quadro (a GPU pode ainda estar lendo o anterior): posições, depois cores
+            position_bytes = count * 3 * 4
+            glBufferData(GL_ARRAY_BUFFER, count * 7 * 4, None, GL_STREAM_DRAW)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, position_bytes, self.upload_positions[:count])
+            glBufferSubData(GL_ARRAY_BUFFER, position_bytes, count * 4 * 4, self.upload_colors[:count])
+
+            glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT | GL_POINT_BIT | GL_TEXTURE_BIT)
+            glDisable(GL_LIGHTING)
+            glEnable(GL_BLEND)
+            glBlendFunc(GL_SRC_ALPHA, GL_ONE)  # Aditiva: a ordem de desenho não importa
+            glDepthMask(GL_FALSE)              # Testa contra os corpos, mas não esconde outras partículas
+            glEnable(GL_TEXTURE_2D)
+            glBindTexture(GL_TEXTURE_2D, self.texture_id)
+            glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+            glEnable(GL_POINT_SPRITE)
+            glTexEnvi(GL_POINT_SPRITE, GL_COORD_REPLACE, GL_TRUE)
+            # Tamanho na tela = diâmetro * foco / distância (a câmera fica na origem)
+            glPointSize(2.0 * self.radius * focal_px)
+            glPointParameterfv(GL_POINT_DISTANCE_ATTENUATION, [0.0, 0.0, 1.0])
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glVertexPointer(3, GL_FLOAT, 0, ctypes.c_void_p(0))
+            glColorPointer(4, GL_FLOAT, 0, ctypes.c_void_p(position_bytes))
+            glDrawArrays(GL_POINTS, 0, count)
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+            glTexEnvi(GL_POINT_SPRITE, GL_COORD_REPLACE, GL_FALSE)
+            glPopAttrib()
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+        except Exception as e:
+            print(f"Partículas indisponíveis, voltando às chamas em cone: {e}")
+            self.available = False
+            return 0
+        return self.count
+
+    def clear(self):
+        """
+        Descarta todas as partículas (reinício do jogo).
+        """
+        self.alive[:] = False
+        self.life[:] = 0.0
+        self.free[:] = np.arange(self.capacity - 1, -1, -1)
+        self.free_count = self.capacity
+        self.count = 0
+        self.high = 0
+
+
+# Classe para um emissor contínuo ligado a um ponto que se move (o escapamento do foguete)
+class ParticleEmitter:
+    def __init__(self, system, rate, speed, spread, lifetime, color, jitter=0.0):
+        """
+        :param system: ParticleSystem que recebe as partículas
+        :param rate: Partículas por segundo
+        :param speed: Velocidade de saída ao longo da direção do emissor
+        :param spread: Desvio padrão da velocidade em cada eixo
+        :param lifetime: Duração máxima de cada partícula em segundos
+        :param color: Cor RGBA ao nascer
+        :param jitter: Desvio padrão da posição inicial
+        """
+        self.system = system
+        self.rate = rate
+        self.speed = speed
+        self.spread = spread
+        self.lifetime = lifetime
+        self.color = color
+        self.jitter = jitter
+        self.pending = 0.0  # Fração de partícula acumulada entre quadros
+
+    def emit(self, dt, origin, direction, carrier_velocity=0.0):
+        """
+        :param dt: Tempo desde a última emissão em segundos
+        :param origin: Posição do emissor no mundo
+        :param direction: Direção de saída (unitária)
+        :param carrier_velocity: Velocidade de quem carrega o emissor (somada às partículas)
+        """
+        self.pending += self.rate * dt
+        count = int(self.pending)
+        self.pending -= count
+        if count:
+            self.system.emit(count, origin, np.asarray(direction) * self.speed + carrier_velocity, self.spread,
+                             self.lifetime, self.color, self.jitter)
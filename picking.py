@@ -0,0 +1,191 @@
+"""
+Seleção com o mouse por um buffer de identificadores na GPU: ao clicar, a
+vista principal é redesenhada uma vez em um FBO de baixa resolução, com os
+mesmos nós que passaram pelo corte do quadro (frustum e oclusão), cada um
+com a cor do seu índice no grafo de cena (24 bits). O recorte (scissor)
+limita a rasterização ao pixel clicado, que é lido para um pixel buffer
+object e só mapeado no quadro seguinte, sem esperar a GPU. O objeto
+selecionado sai de um dicionário índice -> objeto: o custo não depende de
+quantos corpos estão na tela, sem testes de raio na CPU.
+"""
+import ctypes
+
+from OpenGL.GL import *
+
+from resources import BUFFER, registry
+from views import RenderTarget
+
+BLACK = [0.0, 0.0, 0.0, 1.0]
+
+
+# Função para a cor que identifica um nó (0 = fundo, nada selecionado)
+def encode(key):
+    """
+    :param key: Identificador do nó (índice no grafo de cena, a partir de 0)
+    :return: Cor RGBA em [0, 1] com key + 1 em 24 bits
+    """
+    value = key + 1
+    return [(value & 0xFF) / 255.0, ((value >> 8) & 0xFF) / 255.0, ((value >> 16) & 0xFF) / 255.0, 1.0]
+
+
+# Função inversa de encode a partir dos bytes lidos
+def decode(pixel):
+    """
+    :return: Identificador do nó ou None (fundo)
+    """
+    value = pixel[0] | (pixel[1] << 8) | (pixel[2] << 16)
+    return value - 1 if value else None
+
+
+# Classe para o passe de seleção: desenho sob demanda e leitura assíncrona de um pixel
+class PickingPass:
+    def __init__(self, depth, scale=0.5):
+        """
+        :param depth: Configuração de profundidade da cena (limpeza e teste iguais aos da vista)
+        :param scale: Resolução do FBO em relação à vista (o clique só precisa de um pixel)
+        """
+        self.depth = depth
+        self.scale = scale
+        self.target = RenderTarget("seleção", float_depth=True)
+        self.proxies = {}      # Índice do nó -> desenho sem textura (matriz, fatias)
+        self.targets = {}      # Índice do nó -> objeto selecionável
+        self.click = None      # (x, y, função que recebe o objeto), aguardando o passe
+        self.ready = None
+        self.pbo = None
+        self.reading = False   # Pixel copiado para o PBO, a mapear no próximo quadro
+        self.enabled = True
+        self.available = True
+        self.passes = 0
+
+    def register(self, key, draw, target=None):
+        """
+        :param key: Índice do nó no grafo de cena
+        :param draw: Função (matriz, fatias) que desenha a forma do nó, sem textura nem mistura
+        :param target: Objeto devolvido quando o nó for clicado (None = só esconde o que está atrás)
+        """
+        self.proxies[key] = draw
+        if target is not None:
+            self.targets[key] = target
+
+    def clear(self):
+        """
+        Esquece as formas registradas (grafo de cena reconstruído).
+        """
+        self.proxies.clear()
+        self.targets.clear()
+
+    def request(self, x, y, ready):
+        """
+        Pede uma seleção no próximo quadro; ready(objeto ou None) é chamada em poll().
+        :param x: Posição horizontal do clique em frações da vista (0 = esquerda)
+        :param y: Posição vertical em frações da vista (0 = embaixo, como no OpenGL)
+        """
+        if self.enabled and self.available:
+            self.click = (min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0), ready)
+
+    @property
+    def requested(self):
+        return self.click is not None
+
+    def pending(self):
+        return self.click is not None or self.reading
+
+    def render(self, width, height, items, slices):
+        """
+        Desenha os identificadores com a projeção e a câmera atuais da vista.
+        :param width: Largura da vista em pixels
+        :param height: Altura da vista em pixels
+        :param items: Lista de (índice do nó, matriz relativa à câmera) dos nós desenhados nesta vista
+        :param slices: Tesselação das esferas usada na vista
+        :return: Se o passe foi desenhado
+        """
+        click, self.click = self.click, None
+        if click is None or not self.target.ensure(max(1, int(width * self.scale)),
+                                                   max(1, int(height * self.scale))):
+            return False
+        self.ready = click[2]
+        x = min(int(click[0] * self.target.width), self.target.width - 1)
+        y = min(int(click[1] * self.target.height), self.target.height - 1)
+        bound = False
+        try:
+            if self.pbo is None:
+                self.pbo = int(glGenBuffers(1))
+                glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbo)
+                glBufferData(GL_PIXEL_PACK_BUFFER, 4, None, GL_STREAM_READ)
+                glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+                registry.register(BUFFER, self.pbo, 4, "PBO de seleção", owner=self)
+
+            glPushAttrib(GL_ALL_ATTRIB_BITS)
+            self.target.bind()
+            bound = True
+            # Só o pixel clicado é rasterizado; o resto do FBO nem é limpo
+            glEnable(GL_SCISSOR_TEST)
+            glScissor(x, y, 1, 1)
+            glClearColor(0.0, 0.0, 0.0, 0.0)
+            glClearDepth(0.0 if self.depth.enabled else 1.0)
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            glDisable(GL_TEXTURE_2D)
+            glDisable(GL_BLEND)
+            glDisable(GL_DITHER)
+            glDisable(GL_FOG)
+            glShadeModel(GL_FLAT)
+            # Iluminação ligada sem luzes e sem cor de material: o pixel sai igual à emissão,
+            # então os glColor das funções de desenho não alteram os identificadores
+            glEnable(GL_LIGHTING)
+            for light in range(8):
+                glDisable(GL_LIGHT0 + light)
+            glDisable(GL_COLOR_MATERIAL)
+            glLightModelfv(GL_LIGHT_MODEL_AMBIENT, BLACK)
+            glMaterialfv(GL_FRONT_AND_BACK, GL_AMBIENT, BLACK)
+            glMaterialfv(GL_FRONT_AND_BACK, GL_DIFFUSE, BLACK)
+            glMaterialfv(GL_FRONT_AND_BACK, GL_SPECULAR, BLACK)
+            for key, matrix in items:
+                draw = self.proxies.get(key)
+                if draw is None:
+                    continue  # Sem forma registrada (chamas)
+                # Nós sem objeto selecionável (o Sol) saem pretos, mas ainda escondem o que está atrás
+                glMaterialfv(GL_FRONT_AND_BACK, GL_EMISSION, encode(key) if key in self.targets else BLACK)
+                draw(matrix, slices)
+            glMaterialfv(GL_FRONT_AND_BACK, GL_EMISSION, BLACK)
+
+            glPixelStorei(GL_PACK_ALIGNMENT, 1)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbo)
+            glReadPixels(x, y, 1, 1, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+            self.reading = True
+            self.passes += 1
+            return True
+        except Exception as e:
+            print(f"Seleção pelo mouse indisponível: {e}")
+            self.available = False
+            return False
+        finally:
+            if bound:
+                self.target.unbind()
+                glPopAttrib()
+
+    def poll(self):
+        """
+        Chamado uma vez por quadro, antes de desenhar: mapeia o pixel lido no quadro anterior
+        e entrega o objeto selecionado (None = clique no vazio) à função do pedido.
+        """
+        if not self.reading:
+            return
+        self.reading = False
+        try:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbo)
+            pointer = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+            pixel = ctypes.string_at(pointer, 4) if pointer else None
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        except Exception as e:
+            print(f"Seleção pelo mouse indisponível: {e}")
+            self.available = False
+            return
+        if pixel is not None:
+            self.ready(self.targets.get(decode(pixel)))
+
+    def release(self):
+        if self.pbo is not None:
+            registry.release(BUFFER, self.pbo)
+            self.pbo = None
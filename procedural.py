@@ -0,0 +1,254 @@
+"""
+Texturas procedurais para corpos sem arquivo em textures/: mapas
+equirretangulares (2:1) gerados com ruído fBm vetorizado no NumPy, com faixas
+para gigantes gasosos e crateras para corpos rochosos. O ruído é amostrado
+na esfera unitária (não no plano da imagem), então o mapa não tem costura na
+longitude 180° nem distorção nos polos. Tudo depende só da semente e dos
+parâmetros: os mapas são gerados em um pool de processos (sem disputar o GIL
+com o desenho) e guardados em disco em textures/procedural/, com o nome
+derivado de (semente, parâmetros, resolução); da segunda vez, o processo
+apenas lê o PNG.
+
+Pré-gerar ou visualizar: python procedural.py [--count 100] [--width 512] [--kind rochoso]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+CACHE_DIR = os.path.join("textures", "procedural")
+GENERATOR_VERSION = 1  # Mudar invalida o cache (o nome dos arquivos inclui a versão)
+ROCKY = "rochoso"
+GASEOUS = "gasoso"
+
+
+# Classe para os parâmetros de uma superfície (tudo que muda a imagem entra na chave do cache)
+class SurfaceSpec:
+    def __init__(self, seed, kind=ROCKY, color=(0.6, 0.6, 0.6), width=512, octaves=6, craters=60, bands=14,
+                 turbulence=0.35):
+        """
+        :param seed: Semente do ruído e das crateras
+        :param kind: ROCKY (relevo e crateras) ou GASEOUS (faixas com turbulência)
+        :param color: Cor base [r, g, b] em [0, 1]
+        :param width: Largura do mapa em texels (altura = largura / 2)
+        :param octaves: Oitavas do fBm
+        :param craters: Quantidade de crateras (corpos rochosos)
+        :param bands: Quantidade de faixas entre os polos (gigantes gasosos)
+        :param turbulence: Quanto o ruído desloca as faixas
+        """
+        self.seed = int(seed) & 0xFFFFFFFF
+        self.kind = kind
+        self.color = tuple(round(float(c), 4) for c in color)
+        self.width = int(width)
+        self.octaves = int(octaves)
+        self.craters = int(craters)
+        self.bands = int(bands)
+        self.turbulence = float(turbulence)
+
+    def params(self):
+        return {"versao": GENERATOR_VERSION, "semente": self.seed, "tipo": self.kind, "cor": self.color,
+                "largura": self.width, "oitavas": self.octaves, "crateras": self.craters, "faixas": self.bands,
+                "turbulencia": self.turbulence}
+
+    def key(self):
+        digest = hashlib.sha1(json.dumps(self.params(), sort_keys=True).encode()).hexdigest()[:16]
+        return f"{self.kind}_{self.seed:08x}_{self.width}_{digest}"
+
+
+# Função para os pontos da esfera unitária no centro de cada texel do mapa equirretangular
+def sphere_grid(width):
+    """
+    :return: (pontos (altura, largura, 3), latitudes (altura, 1)); a linha 0 é o polo norte
+    """
+    height = width // 2
+    lon = (np.arange(width) + 0.5) / width * 2.0 * np.pi - np.pi
+    lat = np.pi / 2.0 - (np.arange(height) + 0.5) / height * np.pi
+    cos_lat = np.cos(lat)[:, None]
+    points = np.empty((height, width, 3))
+    points[..., 0] = cos_lat * np.cos(lon)[None, :]
+    points[..., 1] = np.sin(lat)[:, None]
+    points[..., 2] = cos_lat * np.sin(lon)[None, :]
+    return points, lat[:, None]
+
+
+# Função para o ruído de valor 3D (interpolação suave entre valores aleatórios nos vértices da grade)
+def value_noise(points, perm, values):
+    """
+    :param points: Pontos (..., 3)
+    :param perm: Permutação de 0..255 repetida duas vezes (hash da grade)
+    :param values: Valor aleatório em [-1, 1] por hash
+    :return: Ruído em [-1, 1], shape (...)
+    """
+    cell = np.floor(points)
+    frac = points - cell
+    fade = frac * frac * (3.0 - 2.0 * frac)
+    index = cell.astype(np.int64) & 255
+    ix, iy, iz = index[..., 0], index[..., 1], index[..., 2]
+    fx, fy, fz = fade[..., 0], fade[..., 1], fade[..., 2]
+    result = np.zeros(points.shape[:-1])
+    for dx, wx in ((0, 1.0 - fx), (1, fx)):
+        hx = perm[(ix + dx) & 255]
+        for dy, wy in ((0, 1.0 - fy), (1, fy)):
+            hxy = perm[hx + ((iy + dy) & 255)]
+            wxy = wx * wy
+            for dz, wz in ((0, 1.0 - fz), (1, fz)):
+                result += wxy * wz * values[perm[hxy + ((iz + dz) & 255)]]
+    return result
+
+
+# Função para o fBm: soma de oitavas de ruído com frequência dobrando e amplitude caindo pela metade
+def fbm(points, seed, octaves, frequency=2.0, lacunarity=2.0, gain=0.5):
+    rng = np.random.default_rng(seed)
+    perm = rng.permutation(256)
+    perm = np.concatenate([perm, perm])
+    values = rng.uniform(-1.0, 1.0, 256)
+    offsets = rng.uniform(0.0, 256.0, (octaves, 3))  # Oitavas descorrelacionadas
+    total = np.zeros(points.shape[:-1])
+    amplitude, norm = 1.0, 0.0
+    for octave in range(octaves):
+        total += amplitude * value_noise(points * frequency + offsets[octave], perm, values)
+        norm += amplitude
+        amplitude *= gain
+        frequency *= lacunarity
+    return total / norm
+
+
+# Função para o relevo das crateras: bacia escura e borda clara ao redor de centros aleatórios
+def crater_relief(points, rng, count):
+    relief = np.zeros(points.shape[:-1])
+    centers = rng.normal(size=(count, 3))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    radii = np.exp(rng.uniform(np.log(0.03), np.log(0.35), count))  # Raio angular: muitas pequenas, poucas grandes
+    for center, radius in zip(centers, radii):
+        distance = np.arccos(np.clip(points @ center, -1.0, 1.0)) / radius
+        near = distance < 1.6
+        d = distance[near]
+        # Fundo côncavo que sobe suavemente até uma borda larga
+        relief[near] += -0.3 * np.clip(1.0 - d * d, 0.0, None) + 0.15 * np.exp(-((d - 1.0) / 0.25) ** 2)
+    return relief
+
+
+# Função que gera o mapa de uma superfície
+def generate(spec):
+    """
+    :return: Imagem RGB uint8 (altura, largura, 3) com o polo norte na primeira linha
+    """
+    points, lat = sphere_grid(spec.width)
+    rng = np.random.default_rng(spec.seed)
+    base = np.array(spec.color)
+
+    if spec.kind == GASEOUS:
+        swirl = fbm(points * [1.0, 3.0, 1.0], spec.seed + 1, spec.octaves, frequency=1.5)
+        phase = lat * spec.bands + spec.turbulence * 6.0 * swirl
+        band = 0.5 + 0.5 * np.sin(phase + rng.uniform(0.0, 2.0 * np.pi))
+        dark, light = base * 0.55, base + (1.0 - base) * 0.45
+        rgb = dark + (light - dark) * band[..., None]
+        rgb *= (1.0 + 0.08 * fbm(points, spec.seed + 2, 4, frequency=8.0))[..., None]
+    else:
+        height = fbm(points, spec.seed + 1, spec.octaves, frequency=2.5)
+        height += crater_relief(points, rng, spec.craters)
+        tint = fbm(points, spec.seed + 2, 3, frequency=1.2)  # Manchas grandes (mares, planícies)
+        rgb = base * (0.8 + 0.45 * height)[..., None] * (1.0 + 0.15 * tint)[..., None]
+    return (np.clip(rgb, 0.0, 1.0) * 255.0).astype(np.uint8)
+
+
+# Função executada nos processos do pool: lê o mapa do cache ou gera e grava
+def load_or_generate(spec, directory):
+    """
+    :return: (largura, altura, bytes RGB invertidos para o OpenGL, caminho no cache)
+    """
+    path = os.path.join(directory, spec.key() + ".png")
+    try:
+        image = np.asarray(Image.open(path).convert("RGB"))
+    except OSError:
+        image = generate(spec)
+        os.makedirs(directory, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.tmp"
+        Image.fromarray(image).save(partial, format="PNG")
+        os.replace(partial, path)  # Outro processo lendo nunca vê um PNG pela metade
+    return image.shape[1], image.shape[0], np.ascontiguousarray(image[::-1]).tobytes(), path
+
+
+# Classe que distribui a geração em um pool de processos e entrega os mapas prontos a cada quadro
+class ProceduralTextureCache:
+    def __init__(self, directory=CACHE_DIR, workers=None, uploads_per_frame=2):
+        """
+        :param directory: Diretório do cache em disco
+        :param workers: Processos do pool (None = um por núcleo)
+        :param uploads_per_frame: Mapas entregues por quadro, no máximo (envio à GPU)
+        """
+        self.directory = directory
+        self.workers = workers
+        self.uploads_per_frame = uploads_per_frame
+        self.pool = None
+        self.requests = []  # (futuro, função que recebe (decodificado, caminho))
+        self.generated = 0
+
+    def request(self, spec, ready):
+        """
+        Pede o mapa de uma superfície; ready((largura, altura, bytes), caminho) é chamada em update().
+        """
+        if self.pool is None:
+            # spawn: os processos não herdam o contexto OpenGL nem as threads do jogo
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.requests.append((self.pool.submit(load_or_generate, spec, self.directory), ready))
+
+    def update(self):
+        """
+        Chamado uma vez por quadro na thread do OpenGL.
+        """
+        delivered = 0
+        for item in list(self.requests):
+            if delivered >= self.uploads_per_frame:
+                break
+            future, ready = item
+            if not future.done():
+                continue
+            self.requests.remove(item)
+            try:
+                width, height, data, path = future.result()
+            except Exception as e:
+                print(f"Erro ao gerar textura procedural: {e}")
+                continue
+            ready((width, height, data), path)
+            self.generated += 1
+            delivered += 1
+
+    def pending(self):
+        return len(self.requests)
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera texturas procedurais no cache (ou uma prévia)")
+    parser.add_argument("--count", type=int, default=1, help="Superfícies distintas a gerar (sementes 0..n-1)")
+    parser.add_argument("--kind", choices=[ROCKY, GASEOUS], default=ROCKY)
+    parser.add_argument("--color", type=float, nargs=3, default=[0.6, 0.55, 0.5])
+    parser.add_argument("--width", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=CACHE_DIR, help="Diretório do cache")
+    args = parser.parse_args()
+
+    specs = [SurfaceSpec(seed, args.kind, args.color, args.width) for seed in range(args.count)]
+    for label in ("geração", "cache"):
+        started = time.perf_counter()
+        with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            paths = [result[3] for result in pool.map(load_or_generate, specs, [args.output] * len(specs))]
+        elapsed = time.perf_counter() - started
+        print(f"{label}: {len(specs)} mapas {args.width}x{args.width // 2} em {elapsed:.2f} s "
+              f"({elapsed / len(specs) * 1000.0:.0f} ms por mapa)")
+    print(f"Primeiro mapa: {paths[0]}")
+
+
+if __name__ == "__main__":
+    main()
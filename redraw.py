@@ -0,0 +1,104 @@
+"""
+Redesenho por eventos: um quadro só é desenhado quando algo visível mudou
+(simulação, entrada, tamanho da janela ou um elemento animado, como o
+relógio do HUD). Sem mudanças, o laço passa a acordar poucas vezes por
+segundo. O relatório compara o custo de CPU (e de energia, quando o RAPL
+do processador está acessível) dos períodos ativos e ociosos.
+"""
+import glob
+import time
+
+RAPL_FILES = "/sys/class/powercap/intel-rapl:*/energy_uj"
+
+
+# Função para ler a energia acumulada dos pacotes do processador (RAPL), se disponível
+def read_energy_uj():
+    total = 0
+    found = False
+    for path in glob.glob(RAPL_FILES):
+        try:
+            with open(path) as f:
+                total += int(f.read())
+            found = True
+        except (OSError, ValueError):
+            pass  # Sem permissão de leitura em muitos sistemas
+    return total if found else None
+
+
+# Classe para decidir quando redesenhar e medir o custo ativo x ocioso
+class RedrawScheduler:
+    def __init__(self, active_interval_ms=16, idle_interval_ms=100):
+        """
+        :param active_interval_ms: Intervalo do laço com a simulação rodando
+        :param idle_interval_ms: Intervalo do laço parado (pausa, telas de informação)
+        """
+        self.active_interval_ms = active_interval_ms
+        self.idle_interval_ms = idle_interval_ms
+        self.dirty = True
+        self.watched = {}
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+        # Tempo de parede, de CPU e energia acumulados por modo
+        self.totals = {True: [0.0, 0.0, 0], False: [0.0, 0.0, 0]}
+        self.mode = True
+        self.last_wall = time.perf_counter()
+        self.last_cpu = time.process_time()
+        self.last_energy = read_energy_uj()
+
+    def invalidate(self):
+        self.dirty = True
+
+    def watch(self, name, value):
+        """
+        Marca o quadro como sujo quando um valor exibido (ex.: segundos do relógio) muda.
+        """
+        if self.watched.get(name) != value:
+            self.watched[name] = value
+            self.dirty = True
+
+    def frame_drawn(self):
+        self.dirty = False
+        self.frames_drawn += 1
+
+    def frame_skipped(self):
+        self.frames_skipped += 1
+
+    def next_interval(self, active):
+        """
+        Contabiliza o período que termina e devolve o intervalo até o próximo tick.
+        :param active: Se a simulação ou a animação estão rodando
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        energy = read_energy_uj()
+        totals = self.totals[self.mode]
+        totals[0] += wall - self.last_wall
+        totals[1] += cpu - self.last_cpu
+        if energy is not None and self.last_energy is not None and energy >= self.last_energy:
+            totals[2] += energy - self.last_energy
+        self.last_wall, self.last_cpu, self.last_energy = wall, cpu, energy
+        self.mode = active
+        return self.active_interval_ms if active else self.idle_interval_ms
+
+    def report(self):
+        """
+        :return: Dicionário por modo ('ativo'/'ocioso') com segundos, CPU % e watts (None sem RAPL)
+        """
+        result = {'quadros': self.frames_drawn, 'evitados': self.frames_skipped}
+        for active, name in ((True, 'ativo'), (False, 'ocioso')):
+            wall, cpu, energy = self.totals[active]
+            result[name] = {
+                'segundos': wall,
+                'cpu_pct': 100.0 * cpu / wall if wall > 0 else 0.0,
+                'watts': energy / 1e6 / wall if wall > 0 and self.last_energy is not None else None,
+            }
+        return result
+
+    def report_lines(self):
+        report = self.report()
+        lines = [f"Redesenho: {report['quadros']} quadros desenhados, {report['evitados']} evitados"]
+        for name in ('ativo', 'ocioso'):
+            mode = report[name]
+            power = "" if mode['watts'] is None else f", {mode['watts']:.1f} W"
+            lines.append(f"  {name}: {mode['segundos']:.0f} s, CPU {mode['cpu_pct']:.1f}%{power}")
+        return lines
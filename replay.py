@@ -0,0 +1,340 @@
+"""
+Gravação compacta de partidas e replay determinístico com busca por tick.
+
+Formato do arquivo (little-endian):
+    cabeçalho   '<4sBIHHd' magia, versão, semente, intervalo de keyframes, n_ângulos,
+                           escala das distâncias ao Sol (--distance-scale; a versão 2 não
+                           tem este campo e usa 1.0)
+    registros   tag (uint8) seguida do conteúdo:
+        INPUT     varint(tick - tick_anterior) + tecla (1 byte; minúscula = pressionada,
+                  maiúscula = solta, ENTER = reiniciar)
+        KEYFRAME  tick uint32 + ângulos float64 + posição/yaw/velocidade do jogador
+                  float64 + n_visitados uint16 + índices uint16 + teclas seguradas +
+                  fim de jogo uint8 + tempo de jogo float64 (a versão 3 não tem os dois
+                  últimos campos)
+        INDEX     n uint32 + n x (tick uint32, offset uint64)
+    rodapé      '<Q4s'     offset do índice, magia do índice
+
+A semente e a escala das distâncias recriam as mesmas órbitas antes do
+primeiro keyframe. O estado do tick T é o estado após T passos de simulação e antes das teclas
+registradas no tick T. Para buscar T basta restaurar o último keyframe <= T e
+reaplicar no máximo um intervalo de keyframes de passos.
+
+Uso sem janela: python replay.py partida.rec [--seek T] [--ticks N]
+"""
+import argparse
+import bisect
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'EGR1'
+INDEX_MAGIC = b'EIDX'
+VERSION = 4
+
+HEADER = struct.Struct('<4sBIHHd')
+HEADER_V2 = struct.Struct('<4sBIHH')
+FOOTER = struct.Struct('<Q4s')
+KEYFRAME_TICK = struct.Struct('<I')
+GAME_FLAGS = struct.Struct('<Bd')  # fim de jogo, tempo de jogo (s)
+INDEX_ENTRY = struct.Struct('<IQ')
+
+TAG_INPUT = 1
+TAG_KEYFRAME = 2
+TAG_INDEX = 3
+
+
+def write_varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+# Classe para representar o estado completo da simulação em um tick
+class SimulationState:
+    def __init__(self, angles, position, yaw, visited, velocity=(0, 0, 0), held=(), game_over=False,
+                 elapsed=None):
+        """
+        :param angles: Ângulos de órbita/rotação de todos os corpos e anéis (float64)
+        :param position: Posição do jogador [x, y, z]
+        :param yaw: Orientação do jogador (graus)
+        :param visited: Índices (em planets + moons) dos corpos visitados, em ordem
+        :param velocity: Velocidade do jogador [x, y, z]
+        :param held: Teclas de movimento seguradas
+        :param game_over: Partida encerrada (colisão com o Sol ou todos os planetas visitados)
+        :param elapsed: Tempo de jogo em segundos (o tempo final, se encerrada); None = desconhecido
+        """
+        self.angles = np.array(angles, dtype='<f8')
+        self.position = np.array(position, dtype='<f8')
+        self.yaw = float(yaw)
+        self.visited = list(visited)
+        self.velocity = np.array(velocity, dtype='<f8')
+        self.held = ''.join(held)
+        self.game_over = bool(game_over)
+        self.elapsed = elapsed
+
+    def encode(self):
+        data = self.angles.tobytes() + self.position.tobytes() + struct.pack('<d', self.yaw)
+        data += self.velocity.tobytes()
+        data += struct.pack('<H', len(self.visited))
+        data += np.asarray(self.visited, dtype='<u2').tobytes()
+        data += struct.pack('<B', len(self.held)) + self.held.encode('ascii')
+        data += GAME_FLAGS.pack(self.game_over, 0.0 if self.elapsed is None else self.elapsed)
+        return data
+
+    @classmethod
+    def decode(cls, data, offset, n_angles, game_flags=True):
+        """
+        :param game_flags: O keyframe traz fim de jogo e tempo (versão 4 em diante)
+        """
+        angles = np.frombuffer(data, dtype='<f8', count=n_angles, offset=offset)
+        offset += 8 * n_angles
+        position = np.frombuffer(data, dtype='<f8', count=3, offset=offset)
+        offset += 24
+        yaw = struct.unpack_from('<d', data, offset)[0]
+        offset += 8
+        velocity = np.frombuffer(data, dtype='<f8', count=3, offset=offset)
+        offset += 24
+        n_visited = struct.unpack_from('<H', data, offset)[0]
+        offset += 2
+        visited = np.frombuffer(data, dtype='<u2', count=n_visited, offset=offset).tolist()
+        offset += 2 * n_visited
+        n_held = data[offset]
+        held = data[offset + 1:offset + 1 + n_held].decode('ascii')
+        offset += 1 + n_held
+        game_over, elapsed = False, None
+        if game_flags:
+            game_over, elapsed = GAME_FLAGS.unpack_from(data, offset)
+            offset += GAME_FLAGS.size
+        return cls(angles.copy(), position.copy(), yaw, visited, velocity.copy(), held, game_over,
+                   elapsed), offset
+
+
+# Classe para gravar sementes, teclas e keyframes em um arquivo binário
+class Recorder:
+    def __init__(self, path, seed, n_angles, keyframe_interval=300, distance_scale=1.0):
+        """
+        :param path: Caminho do arquivo de gravação
+        :param seed: Semente usada para gerar os ângulos iniciais
+        :param n_angles: Quantidade de ângulos no estado (validação no replay)
+        :param keyframe_interval: Ticks entre keyframes completos
+        :param distance_scale: Escala das distâncias ao Sol usada na partida
+        """
+        self.file = open(path, 'wb')
+        self.keyframe_interval = keyframe_interval
+        self.last_tick = 0
+        self.index = []
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, keyframe_interval, n_angles, distance_scale))
+
+    def record_input(self, tick, key):
+        self.file.write(bytes([TAG_INPUT]) + write_varint(tick - self.last_tick) + key.encode('latin-1'))
+        self.last_tick = tick
+
+    def record_keyframe(self, tick, state):
+        self.index.append((tick, self.file.tell()))
+        self.file.write(bytes([TAG_KEYFRAME]) + KEYFRAME_TICK.pack(tick) + state.encode())
+        self.last_tick = tick
+
+    def maybe_keyframe(self, tick, capture):
+        """
+        Grava um keyframe quando o tick é múltiplo do intervalo.
+        :param capture: Função que devolve o SimulationState atual
+        """
+        if tick % self.keyframe_interval == 0:
+            self.record_keyframe(tick, capture())
+
+    def close(self, tick=None, state=None):
+        """
+        Grava o keyframe final (opcional), o índice e o rodapé.
+        """
+        if self.file.closed:
+            return
+        if state is not None and (not self.index or self.index[-1][0] != tick):
+            self.record_keyframe(tick, state)
+        index_offset = self.file.tell()
+        self.file.write(bytes([TAG_INDEX]) + struct.pack('<I', len(self.index)))
+        for tick, offset in self.index:
+            self.file.write(INDEX_ENTRY.pack(tick, offset))
+        self.file.write(FOOTER.pack(index_offset, INDEX_MAGIC))
+        self.file.close()
+
+
+# Classe para ler uma gravação e buscar qualquer tick
+class Replay:
+    def __init__(self, path):
+        """
+        :param path: Caminho do arquivo gravado por Recorder
+        """
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        magic, version = self.data[:4], self.data[4] if len(self.data) > 4 else None
+        if magic != MAGIC or version not in (2, 3, VERSION):
+            raise ValueError(f"Arquivo de replay inválido: {path}")
+        if version == 2:
+            # Gravações anteriores à escala das distâncias: sempre na escala original
+            _, _, self.seed, self.keyframe_interval, self.n_angles = HEADER_V2.unpack_from(self.data)
+            self.distance_scale = 1.0
+            self.header_size = HEADER_V2.size
+        else:
+            (_, _, self.seed, self.keyframe_interval, self.n_angles,
+             self.distance_scale) = HEADER.unpack_from(self.data)
+            self.header_size = HEADER.size
+        self.version = version
+        self.end = len(self.data)
+        self.index = self._read_index()
+        self.keyframe_ticks = [tick for tick, _ in self.index]
+
+    def _read_index(self):
+        if self.end >= self.header_size + FOOTER.size:
+            index_offset, magic = FOOTER.unpack_from(self.data, self.end - FOOTER.size)
+            if magic == INDEX_MAGIC:
+                self.end = index_offset
+                count = struct.unpack_from('<I', self.data, index_offset + 1)[0]
+                start = index_offset + 5
+                return [INDEX_ENTRY.unpack_from(self.data, start + i * INDEX_ENTRY.size) for i in range(count)]
+        # Gravação interrompida (sem rodapé): reconstruir o índice lendo os registros
+        index = []
+        for tag, tick, offset, _ in self._records(self.header_size):
+            if tag == TAG_KEYFRAME:
+                index.append((tick, offset))
+        return index
+
+    def _records(self, offset, last_tick=0):
+        """
+        Percorre os registros a partir de `offset`: (tag, tick, offset, conteúdo).
+        """
+        while offset < self.end:
+            start = offset
+            tag = self.data[offset]
+            offset += 1
+            try:
+                record = self._decode_record(tag, offset, last_tick)
+            except (IndexError, struct.error, ValueError):
+                return  # registro truncado no fim de uma gravação interrompida
+            if record is None:
+                return
+            last_tick, content, offset = record
+            yield tag, last_tick, start, content
+
+    def _decode_record(self, tag, offset, last_tick):
+        if tag == TAG_INPUT:
+            delta, offset = read_varint(self.data, offset)
+            key = chr(self.data[offset])
+            return last_tick + delta, key, offset + 1
+        if tag == TAG_KEYFRAME:
+            tick = KEYFRAME_TICK.unpack_from(self.data, offset)[0]
+            state, offset = SimulationState.decode(self.data, offset + KEYFRAME_TICK.size, self.n_angles,
+                                                   self.version >= 4)
+            return tick, state, offset
+        return None
+
+    @property
+    def last_tick(self):
+        return self.keyframe_ticks[-1] if self.keyframe_ticks else 0
+
+    def cursor(self, tick):
+        """
+        Posiciona a leitura no último keyframe <= tick.
+        :return: (tick do keyframe, estado, iterador dos registros seguintes)
+        """
+        i = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        if i < 0:
+            raise ValueError("Gravação sem keyframe inicial")
+        records = self._records(self.index[i][1])
+        _, kf_tick, _, state = next(records)
+        return kf_tick, state, records
+
+
+# Classe para reproduzir uma gravação sobre o estado do jogo
+class ReplayPlayer:
+    def __init__(self, replay, game):
+        """
+        :param replay: Instância de Replay
+        :param game: Módulo do jogo com capture_state, restore_state,
+                     apply_input e simulation_step
+        """
+        self.replay = replay
+        self.game = game
+        self.tick = 0
+        self.records = None
+        self.pending = None
+        self.seek(0)
+
+    def seek(self, tick):
+        tick = max(0, tick)
+        kf_tick, state, self.records = self.replay.cursor(tick)
+        self.game.restore_state(state)
+        self.tick = kf_tick
+        self.pending = next(self.records, None)
+        while self.tick < tick and self.step():
+            pass
+
+    def step(self):
+        """
+        Aplica as teclas do tick atual e avança um passo. Retorna False no fim.
+        """
+        while self.pending is not None and self.pending[1] <= self.tick:
+            tag, _, _, content = self.pending
+            if tag == TAG_INPUT:
+                self.game.apply_input(content)
+            self.pending = next(self.records, None)
+        if self.pending is None and self.tick >= self.replay.last_tick:
+            return False
+        self.game.simulation_step()
+        self.tick += 1
+        return True
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay sem janela de uma partida gravada")
+    parser.add_argument('path')
+    parser.add_argument('--seek', type=int, default=0, help="Tick inicial")
+    parser.add_argument('--ticks', type=int, default=None, help="Quantidade de ticks a reproduzir")
+    args = parser.parse_args()
+
+    import random
+    import main as game
+
+    replay = Replay(args.path)
+    game.headless = True
+    game.autopilot.synchronous = True  # Rota planejada no próprio tick, como na gravação
+    random.seed(replay.seed)
+    game.create_celestial_bodies()
+    game.scale_distances(replay.distance_scale)  # Mesmas órbitas da gravação
+
+    started = time.perf_counter()
+    runner = ReplayPlayer(replay, game)
+    runner.seek(args.seek)
+    seek_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    played = 0
+    while (args.ticks is None or played < args.ticks) and runner.step():
+        played += 1
+    elapsed = time.perf_counter() - started
+
+    rate = played / elapsed if elapsed > 0 else float('inf')
+    print(f"Semente {replay.seed}, escala {replay.distance_scale:g}, {len(replay.index)} keyframes, último keyframe no tick {replay.last_tick}")
+    print(f"Busca até o tick {args.seek}: {seek_time * 1000:.2f} ms")
+    print(f"{played} ticks em {elapsed:.3f} s ({rate:.0f} ticks/s, {rate / 60:.1f}x tempo real)")
+    print(f"Posição final do jogador: {game.player.position}, visitados: {game.player.planetas_coletados}")
+
+
+if __name__ == "__main__":
+    main_cli()
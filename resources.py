@@ -0,0 +1,175 @@
+"""
+Registro central dos recursos de GPU: toda textura e buffer criados pelo
+jogo é registrado com o tamanho em bytes e o último quadro em que foi
+usado. Com um orçamento de VRAM, as texturas de corpos que não aparecem há
+algum tempo são liberadas (o corpo volta a usar a própria cor) e
+recarregadas em segundo plano quando voltam à vista. Recursos cujo dono já
+foi coletado sem liberá-los são contados como vazamentos.
+"""
+import queue
+import threading
+import weakref
+
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+TEXTURE = "textura"
+BUFFER = "buffer"
+RENDERBUFFER = "renderbuffer"
+
+
+# Função para estimar o tamanho de uma textura em bytes
+def texture_bytes(width, height, channels=3, mipmaps=False):
+    size = width * height * channels
+    return size * 4 // 3 if mipmaps else size  # A cadeia de mipmaps soma um terço
+
+
+# Classe com os dados de um recurso registrado
+class GpuResource:
+    def __init__(self, kind, gl_id, nbytes, label, frame, on_evict=None):
+        self.kind = kind
+        self.gl_id = gl_id
+        self.nbytes = nbytes
+        self.label = label
+        self.last_used = frame
+        self.on_evict = on_evict  # None = não pode ser descartado
+        self.owner = None
+
+
+# Classe para registrar recursos, aplicar o orçamento de VRAM e detectar vazamentos
+class ResourceRegistry:
+    def __init__(self, budget_mb=512, idle_frames=600):
+        """
+        :param budget_mb: Orçamento de VRAM em MB (None = sem limite)
+        :param idle_frames: Quadros sem uso antes de uma textura poder ser descartada
+        """
+        self.budget_bytes = None if budget_mb is None else int(budget_mb * 1024 * 1024)
+        self.idle_frames = idle_frames
+        self.frame = 0
+        self.resources = {}  # (tipo, id) -> GpuResource
+        self.leaked = []
+        self.evictions = 0
+        self.reloading = set()
+        self.reloaded = queue.Queue()
+        self.quadrics = {}
+
+    def register(self, kind, gl_id, nbytes, label, owner=None, on_evict=None):
+        """
+        Registra (ou atualiza, ao redimensionar) um recurso.
+        :param owner: Objeto dono; se for coletado sem liberar o recurso, conta como vazamento
+        :param on_evict: Função chamada depois de descartar o recurso pelo orçamento
+        """
+        resource = GpuResource(kind, int(gl_id), nbytes, label, self.frame, on_evict)
+        key = (kind, resource.gl_id)
+        if owner is not None:
+            resource.owner = weakref.ref(owner, lambda ref, key=key: self._owner_collected(key, ref))
+        self.resources[key] = resource
+        return gl_id
+
+    def _owner_collected(self, key, ref):
+        resource = self.resources.get(key)
+        # O id pode ter sido liberado e reaproveitado por outro recurso, de outro dono
+        if resource is not None and resource.owner is ref:
+            self.leaked.append(f"{resource.label} ({resource.kind} {resource.gl_id})")
+
+    def touch(self, kind, gl_id):
+        resource = self.resources.get((kind, int(gl_id)))
+        if resource is not None:
+            resource.last_used = self.frame
+
+    def release(self, kind, gl_id):
+        resource = self.resources.pop((kind, int(gl_id)), None)
+        if resource is None:
+            return
+        if kind == TEXTURE:
+            glDeleteTextures([resource.gl_id])
+        elif kind == BUFFER:
+            glDeleteBuffers(1, [resource.gl_id])
+        elif kind == RENDERBUFFER:
+            glDeleteRenderbuffers(1, [resource.gl_id])
+
+    def used_bytes(self):
+        return sum(resource.nbytes for resource in self.resources.values())
+
+    def begin_frame(self):
+        """
+        Chamado uma vez por quadro: envia texturas recarregadas e aplica o orçamento.
+        """
+        self.frame += 1
+        while True:
+            try:
+                label, decoded, upload = self.reloaded.get_nowait()
+            except queue.Empty:
+                break
+            self.reloading.discard(label)
+            if decoded is not None:
+                upload(decoded)
+        if self.budget_bytes is not None:
+            self.enforce_budget()
+
+    def enforce_budget(self):
+        used = self.used_bytes()
+        if used <= self.budget_bytes:
+            return
+        # Menos usados primeiro, só entre os que aceitam descarte e estão ociosos
+        candidates = sorted((r for r in self.resources.values()
+                             if r.on_evict is not None and self.frame - r.last_used >= self.idle_frames),
+                            key=lambda r: r.last_used)
+        for resource in candidates:
+            if used <= self.budget_bytes:
+                break
+            used -= resource.nbytes
+            self.release(resource.kind, resource.gl_id)
+            self.evictions += 1
+            resource.on_evict()
+
+    def request_reload(self, label, decode, upload):
+        """
+        Decodifica em uma thread de fundo e chama upload(decodificado) no próximo quadro.
+        """
+        if label in self.reloading:
+            return
+        self.reloading.add(label)
+
+        def work():
+            try:
+                decoded = decode()
+            except Exception as e:
+                print(f"Erro ao recarregar {label}: {e}")
+                decoded = None
+            self.reloaded.put((label, decoded, upload))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def quadric(self, textured=True):
+        """
+        Quádricas compartilhadas, em vez de criar e apagar uma a cada desenho.
+        """
+        quad = self.quadrics.get(textured)
+        if quad is None:
+            quad = gluNewQuadric()
+            gluQuadricNormals(quad, GLU_SMOOTH)
+            gluQuadricTexture(quad, GL_TRUE if textured else GL_FALSE)
+            self.quadrics[textured] = quad
+        return quad
+
+    def report(self):
+        """
+        :return: Dicionário com uso atual, orçamento, descartes e vazamentos
+        """
+        by_kind = {}
+        for resource in self.resources.values():
+            count, nbytes = by_kind.get(resource.kind, (0, 0))
+            by_kind[resource.kind] = (count + 1, nbytes + resource.nbytes)
+        return {
+            'usado_mb': self.used_bytes() / (1024 * 1024),
+            'orcamento_mb': None if self.budget_bytes is None else self.budget_bytes / (1024 * 1024),
+            'por_tipo': by_kind,
+            'descartes': self.evictions,
+            'recarregando': len(self.reloading),
+            'vazamentos': list(self.leaked),
+        }
+
+
+# Registro único compartilhado pelos módulos de renderização
+registry = ResourceRegistry()
@@ -0,0 +1,159 @@
+"""
+Grafo de cena com matrizes de mundo em cache (Sol -> planetas -> luas e
+anéis, foguete -> chamas). Cada nó guarda a matriz local e a de mundo; a
+local só é refeita quando as entradas do nó mudam (ângulos, posição) e a de
+mundo só é recalculada na subárvore afetada, com uma multiplicação por nó.
+
+As matrizes seguem a convenção de vetor-linha do OpenGL (v' = v @ M), então
+cada matriz de mundo já está no layout de coluna esperado por
+glMultMatrixf. Todas ficam em um único array (N, 4, 4) em float64; antes de
+desenhar, uma única passada vetorizada subtrai a posição da câmera das
+translações e converte para float32, então a GPU só vê coordenadas pequenas
+perto da câmera, mesmo com distâncias em escala real.
+"""
+import math
+
+import numpy as np
+
+
+# Função para uma matriz de translação
+def translation(x, y, z):
+    matrix = np.eye(4)
+    matrix[3, :3] = (x, y, z)
+    return matrix
+
+
+# Função para uma matriz de rotação em graus em torno de um eixo (x, y ou z)
+def rotation(degrees, axis):
+    c = math.cos(math.radians(degrees))
+    s = math.sin(math.radians(degrees))
+    matrix = np.eye(4)
+    i, j = {'x': (1, 2), 'y': (2, 0), 'z': (0, 1)}[axis]
+    matrix[i, i] = c
+    matrix[j, j] = c
+    matrix[i, j] = s
+    matrix[j, i] = -s
+    return matrix
+
+
+# Classe para um nó do grafo
+class SceneNode:
+    def __init__(self, name, inputs=None, build=None, draw=None, transparent=False, bounds=None, occluder=False):
+        """
+        :param name: Nome do nó
+        :param inputs: Função que devolve as entradas da matriz local (ex.: ângulos)
+        :param build: Função que monta a matriz local a partir das entradas
+        :param draw: Função (matriz de mundo, fatias) que desenha o nó (None = só transformação)
+        :param transparent: Desenhar depois dos nós opacos
+        :param bounds: Raio da esfera envolvente em coordenadas do nó (None = desconhecido)
+        :param occluder: Sempre desenhado, sem consulta de oclusão (nós transparentes nunca são oclusores)
+        """
+        self.name = name
+        self.inputs = inputs
+        self.build = build
+        self.draw = draw
+        self.transparent = transparent
+        self.bounds = bounds
+        self.occluder = occluder and not transparent
+        self.children = []
+        self.parent = None
+        self.last_inputs = object()  # Força o primeiro cálculo
+        self.local = np.eye(4)
+        self.world = np.eye(4)
+
+    def add(self, child):
+        child.parent = self
+        self.children.append(child)
+        return child
+
+    @property
+    def position(self):
+        return self.world[3, :3]
+
+
+# Classe para o grafo, com as matrizes de mundo em um array contínuo
+class SceneGraph:
+    def __init__(self):
+        self.root = SceneNode("Sol")
+        self.nodes = []
+        self.worlds = np.zeros((0, 4, 4))
+        self.relative = np.zeros((0, 4, 4), dtype=np.float32)  # Relativas à câmera, para a GPU
+        self.multiplies = 0  # Multiplicações na última atualização
+        self.draw_lists = {}
+
+    def finalize(self):
+        """
+        Numera os nós em profundidade e faz cada matriz de mundo apontar para o array único.
+        Chamado depois de montar (ou mudar) a estrutura.
+        """
+        self.nodes = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            self.nodes.append(node)
+            stack.extend(reversed(node.children))
+        self.worlds = np.tile(np.eye(4), (len(self.nodes), 1, 1))
+        self.relative = self.worlds.astype(np.float32)
+        for index, node in enumerate(self.nodes):
+            node.index = index
+            node.world = self.worlds[index]
+            node.last_inputs = object()
+        self.draw_lists.clear()
+        self.update(full=True)
+
+    def update(self, full=False):
+        """
+        Refaz as matrizes locais cujas entradas mudaram e as de mundo das subárvores afetadas.
+        :param full: Recalcular todos os nós (depois de mudar a estrutura)
+        """
+        self.multiplies = 0
+        changed = set()
+        # A ordem em profundidade garante que o pai é atualizado antes dos filhos
+        for node in self.nodes:
+            dirty = full or (node.parent is not None and id(node.parent) in changed)
+            if node.inputs is not None:
+                inputs = node.inputs()
+                if inputs != node.last_inputs:
+                    node.last_inputs = inputs
+                    node.local = node.build(*inputs)
+                    dirty = True
+            if dirty:
+                parent_world = node.parent.world if node.parent is not None else np.eye(4)
+                np.matmul(node.local, parent_world, out=node.world)
+                self.multiplies += 1
+                changed.add(id(node))
+
+    def rebase(self, origin):
+        """
+        Matrizes de mundo relativas a uma origem (a câmera), em float32, para todos os nós.
+        A subtração é feita em float64, antes da conversão.
+        """
+        self.relative[:] = self.worlds
+        self.relative[:, 3, :3] = self.worlds[:, 3, :3] - origin
+        return self.relative
+
+    def draw_list(self, subtree):
+        """
+        Nós desenháveis de uma subárvore: opacos primeiro, dos maiores (oclusores) para os
+        menores, e transparentes depois.
+        """
+        cached = self.draw_lists.get(subtree.index)
+        if cached is not None:
+            return cached
+        first = subtree.index
+        last = first + 1
+        while last < len(self.nodes) and self._inside(self.nodes[last], subtree):
+            last += 1
+        nodes = [node for node in self.nodes[first:last] if node.draw is not None]
+        opaque = sorted((n for n in nodes if not n.transparent), key=lambda n: -(n.bounds or 0.0))
+        cached = opaque + [n for n in nodes if n.transparent]
+        self.draw_lists[subtree.index] = cached
+        return cached
+
+    @staticmethod
+    def _inside(node, subtree):
+        while node is not None:
+            if node is subtree:
+                return True
+            node = node.parent
+        return False
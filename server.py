@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+import collision
+import main
+import network
+from input_system import InputSystem
+
+# Taxa fixa da simulação: as velocidades dos corpos são em graus por tick de ~16 ms
+SIMULATION_RATE = 60
+
+# Limite do buffer de escrita por cliente antes de descartar snapshots
+MAX_PENDING_BYTES = 256 * 1024
+
+
+# Classe para representar um cliente conectado ao servidor
+class ClientSession:
+    def __init__(self, client_id, writer):
+        """
+        :param client_id: Identificador do jogador
+        :param writer: StreamWriter da conexão
+        """
+        self.id = client_id
+        self.writer = writer
+        self.player = main.Player([0, 2, 50])
+        self.inputs = deque()
+        self.controls = InputSystem(track_latency=False)
+        self.needs_keyframe = True
+        self.needs_leaderboard = True  # Placar completo na primeira atualização; depois só as linhas alteradas
+        self.finished = False
+        self.start_tick = 0
+        self.final_time = 0
+        self.bytes_sent = 0
+        self.dropped_snapshots = 0
+
+    def send(self, frame):
+        self.writer.write(frame)
+        self.bytes_sent += len(frame)
+
+    def congested(self):
+        return self.writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES
+
+
+# Servidor autoritativo: uma única simulação compartilhada por todos os quiosques
+class SimulationServer:
+    def __init__(self, snapshot_rate=20, seed=None, keyframe_interval=60):
+        """
+        :param snapshot_rate: Snapshots enviados por segundo
+        :param seed: Semente dos ângulos iniciais (aleatória se None)
+        :param keyframe_interval: Ticks entre keyframes completos forçados
+        """
+        self.snapshot_rate = snapshot_rate
+        self.snapshot_every = max(1, round(SIMULATION_RATE / snapshot_rate))
+        self.keyframe_interval = keyframe_interval
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.tick = 0
+        self.clients = {}
+        self.next_id = 1
+        self.last_snapshot = None
+        self.leaderboard_dirty = False
+        self.leaderboard_sent = {}  # id -> assinatura da linha no último placar enviado
+        self.tick_costs = deque(maxlen=10000)
+        self.bytes_sent = 0
+
+        # Catálogo sem OpenGL, com ângulos iniciais reprodutíveis
+        main.headless = True
+        random.seed(self.seed)
+        main.create_celestial_bodies()
+        self.bodies = main.planets + main.moons
+
+    async def handle_client(self, reader, writer):
+        session = ClientSession(self.next_id, writer)
+        self.next_id += 1
+        session.start_tick = self.tick
+        self.clients[session.id] = session
+        session.send(network.encode_json(network.MSG_WELCOME, {
+            'id': session.id,
+            'tick_rate': SIMULATION_RATE,
+            'snapshot_rate': self.snapshot_rate,
+            'seed': self.seed,
+            'corpos': [body.name for body in self.bodies],
+        }))
+        self.leaderboard_dirty = True
+        try:
+            while True:
+                header = await reader.readexactly(network.FRAME_HEADER.size)
+                length, msg_type = network.FRAME_HEADER.unpack(header)
+                payload = await reader.readexactly(length)
+                if msg_type == network.MSG_INPUT:
+                    key = payload.decode('ascii', 'ignore')
+                    if len(key) == 1 and key in network.INPUT_KEYS:
+                        session.inputs.append(key)
+                elif msg_type == network.MSG_RESTART:
+                    self.restart_player(session)
+                elif msg_type == network.MSG_RESYNC:
+                    session.needs_keyframe = True
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.bytes_sent += session.bytes_sent
+            del self.clients[session.id]
+            self.leaderboard_dirty = True
+            writer.close()
+
+    def restart_player(self, session):
+        session.player = main.Player([0, 2, 50])
+        session.inputs.clear()
+        session.controls.release_all()
+        session.finished = False
+        session.final_time = 0
+        session.start_tick = self.tick
+        self.leaderboard_dirty = True
+
+    def apply_inputs(self, session):
+        # Minúscula = tecla pressionada, maiúscula = tecla solta
+        while session.inputs:
+            key = session.inputs.popleft()
+            if key.islower():
+                session.controls.key_down(key)
+            else:
+                session.controls.key_up(key.lower())
+        if not session.finished:
+            main.apply_controls(session.player, session.controls, 1.0 / SIMULATION_RATE)
+
+    def check_collisions(self, previous_positions):
+        """
+        Testa todos os jogadores contra todos os corpos de uma vez, com o mesmo
+        teste de esfera varrida de Player.find_collision.
+        :param previous_positions: Posições dos corpos no início do tick
+        """
+        active = [session for session in self.clients.values() if not session.finished]
+        if not active:
+            return
+        sun = np.zeros((1, 3))
+        centers0 = np.vstack([sun, previous_positions])
+        centers1 = np.vstack([sun, collision.body_positions(self.bodies)])
+        radii = np.concatenate([[5.0], collision.body_radii(self.bodies)])
+        p0 = np.array([session.player.previous_position for session in active])
+        p1 = np.array([session.player.position for session in active])
+        sizes = np.array([session.player.size for session in active])
+        toi = collision.swept_sphere_toi(p0, p1, sizes, centers0, centers1, radii)
+
+        for row, session in enumerate(active):
+            player = session.player
+            player.previous_position = player.position.copy()
+            for i, body in enumerate(self.bodies):
+                if body.name in player.planetas_coletados:
+                    toi[row, i + 1] = np.inf
+            first = int(np.argmin(toi[row]))
+            hit_sun = first == 0 and np.isfinite(toi[row, 0])
+            if not hit_sun and np.isfinite(toi[row, first]):
+                player.planetas_coletados.append(self.bodies[first - 1].name)
+                self.leaderboard_dirty = True
+            if hit_sun or len(player.planetas_coletados) == len(main.planets):
+                session.finished = True
+                session.final_time = (self.tick - session.start_tick) / SIMULATION_RATE
+                self.leaderboard_dirty = True
+
+    def step(self):
+        """
+        Executa um tick da simulação e, quando é hora, envia snapshots.
+        """
+        started = time.perf_counter()
+        self.tick += 1
+        previous_positions = collision.body_positions(self.bodies)
+        main.update_celestial_bodies()
+        for session in self.clients.values():
+            self.apply_inputs(session)
+        self.check_collisions(previous_positions)
+
+        # O placar segue o ritmo dos snapshots: várias mudanças no intervalo saem em uma mensagem
+        if self.tick % self.snapshot_every == 0:
+            self.broadcast_snapshot()
+            if self.leaderboard_dirty:
+                self.broadcast_leaderboard()
+        self.tick_costs.append(time.perf_counter() - started)
+
+    def broadcast_snapshot(self):
+        players = {session.id: session.player for session in self.clients.values()}
+        snapshot = network.Snapshot.capture(self.tick, self.bodies, main.rings, players)
+
+        # O delta é o mesmo para todos: codificado uma vez por tick
+        delta = None
+        if self.last_snapshot is not None and self.tick % self.keyframe_interval != 0:
+            delta = snapshot.encode_delta(self.last_snapshot)
+        keyframe = None
+
+        for session in self.clients.values():
+            if session.congested():
+                # Cliente lento: pula este snapshot e recomeça com um keyframe
+                session.dropped_snapshots += 1
+                session.needs_keyframe = True
+                continue
+            if session.needs_keyframe or delta is None:
+                if keyframe is None:
+                    keyframe = snapshot.encode_keyframe()
+                session.send(keyframe)
+                session.needs_keyframe = False
+            else:
+                session.send(delta)
+        self.last_snapshot = snapshot
+
+    def leaderboard_row(self, session):
+        elapsed = session.final_time if session.finished else (self.tick - session.start_tick) / SIMULATION_RATE
+        return {
+            'nome': f"Jogador {session.id}",
+            'visitados': list(session.player.planetas_coletados),
+            'finalizado': session.finished,
+            'tempo': elapsed,
+        }
+
+    def broadcast_leaderboard(self):
+        """
+        Envia só as linhas que mudaram desde o último placar (e os jogadores que saíram);
+        clientes recém-conectados recebem o placar completo.
+        """
+        # O tempo de quem ainda joga muda a cada tick e não conta como mudança
+        signatures = {session.id: (tuple(session.player.planetas_coletados), session.finished, session.final_time,
+                                   session.start_tick)
+                      for session in self.clients.values()}
+        changed = {session_id: self.leaderboard_row(self.clients[session_id])
+                   for session_id, signature in signatures.items()
+                   if self.leaderboard_sent.get(session_id) != signature}
+        removed = [session_id for session_id in self.leaderboard_sent if session_id not in signatures]
+        self.leaderboard_sent = signatures
+        self.leaderboard_dirty = False
+
+        delta = None
+        if changed or removed:
+            delta = network.encode_json(network.MSG_LEADERBOARD,
+                                        {'completo': False, 'linhas': changed, 'removidos': removed})
+        full = None
+        for session in self.clients.values():
+            if session.needs_leaderboard:
+                if full is None:
+                    full = network.encode_json(network.MSG_LEADERBOARD, {
+                        'completo': True,
+                        'linhas': {s.id: self.leaderboard_row(s) for s in self.clients.values()},
+                        'removidos': [],
+                    })
+                session.send(full)
+                session.needs_leaderboard = False
+            elif delta is not None:
+                session.send(delta)
+
+    async def run(self, stop_event=None):
+        interval = 1.0 / SIMULATION_RATE
+        next_tick = time.perf_counter()
+        while stop_event is None or not stop_event.is_set():
+            self.step()
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Atrasado: não acumular ticks perdidos
+                next_tick = time.perf_counter()
+                await asyncio.sleep(0)
+
+    def stats(self):
+        costs = np.array(self.tick_costs) * 1000.0
+        sent = self.bytes_sent + sum(session.bytes_sent for session in self.clients.values())
+        return {
+            'ticks': self.tick,
+            'clientes': len(self.clients),
+            'tick_medio_ms': float(costs.mean()) if len(costs) else 0.0,
+            'tick_p99_ms': float(np.percentile(costs, 99)) if len(costs) else 0.0,
+            'bytes_enviados': sent,
+            'snapshots_descartados': sum(s.dropped_snapshots for s in self.clients.values()),
+        }
+
+
+async def serve(host, port, snapshot_rate, seed):
+    server = SimulationServer(snapshot_rate=snapshot_rate, seed=seed)
+    tcp = await asyncio.start_server(server.handle_client, host, port)
+    print(f"Servidor de simulação em {host}:{port} (semente {server.seed}, {snapshot_rate} snapshots/s)")
+    async with tcp:
+        await server.run()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Servidor autoritativo do Sistema Solar")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--snapshot-rate', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.snapshot_rate, args.seed))
+
+
+if __name__ == "__main__":
+    main_cli()
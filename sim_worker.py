@@ -0,0 +1,140 @@
+"""
+Simulação em uma thread própria: os ticks de 60 Hz (controles, órbitas,
+colisão) rodam fora da thread do GLUT e cada tick concluído é publicado em
+um bloco de estado com buffer triplo. A renderização lê o último bloco
+publicado diretamente, sem travas nem cópias; o escritor nunca escreve no
+bloco publicado nem no que está sendo lido. As teclas chegam à simulação
+por uma fila sem trava (deque: append/popleft são atômicos no CPython).
+
+O estado de jogo que o HUD mostra (visitas, tela de informações, fim de
+jogo, piloto automático) também vai no bloco publicado; o que a thread do
+GLUT ainda escreve (fechar a tela de informações, menus, seleção) passa
+por uma trava que a simulação segura durante o tick inteiro.
+
+A colisão e as atualizações vetorizadas rodam em kernels do NumPy, que
+liberam o GIL; o restante do tick ainda disputa o GIL com o desenho, mas
+um tick pesado atrasa a simulação, não o quadro.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+# Classe para o estado que a renderização consome em um tick
+class RenderState:
+    def __init__(self, n_bodies, n_rings):
+        self.tick = 0
+        self.angles = np.zeros((n_bodies, 2))  # (órbita, rotação) de planetas e luas
+        self.ring_angles = np.zeros(n_rings)
+        self.position = np.zeros(3)
+        self.yaw = 0.0
+        self.moving = False
+        self.visited = ()               # Nomes dos planetas visitados
+        self.game_over = False
+        self.final_time = 0.0
+        self.collision_detected = False  # Tela de informações aberta
+        self.collided_planet = None
+        self.guidance = None            # (alvo, ponto de interceptação, segundos) do piloto automático
+        self.route = ()
+        self.autopilot_engaged = False
+
+
+# Classe para o buffer triplo sem travas entre a simulação e a renderização
+class StateBuffers:
+    def __init__(self, n_bodies, n_rings, count=3):
+        self.slots = [RenderState(n_bodies, n_rings) for _ in range(count)]
+        self.latest = 0    # Último bloco publicado
+        self.pinned = 0    # Bloco em uso pela renderização
+
+    def begin_write(self):
+        """
+        Escolhe um bloco livre: nem o publicado, nem o que a renderização está lendo.
+        """
+        while True:
+            index = next(i for i in range(len(self.slots)) if i != self.latest and i != self.pinned)
+            # O leitor pode ter fixado este bloco entre a escolha e agora
+            if index != self.pinned:
+                return index
+
+    def publish(self, index):
+        self.latest = index
+
+    def acquire(self):
+        """
+        Fixa o último bloco publicado para o quadro atual e o devolve.
+        """
+        while True:
+            index = self.latest
+            self.pinned = index
+            # Se a simulação publicou outro bloco entre as duas leituras, fixar o novo
+            if self.latest == index:
+                return self.slots[index]
+
+
+# Classe para a thread que executa os ticks da simulação em passo fixo
+class SimulationWorker:
+    def __init__(self, step, apply_input, publish, buffers, tick_dt, can_step, lock=None):
+        """
+        :param step: Função que executa um tick da simulação
+        :param apply_input: Função que aplica uma tecla (tecla, carimbo de tempo)
+        :param publish: Função que escreve o estado atual em um RenderState
+        :param buffers: StateBuffers compartilhado com a renderização
+        :param tick_dt: Duração de um tick em segundos
+        :param can_step: Função que diz se a simulação deve avançar (pausa, telas de informação)
+        :param lock: Trava do estado de jogo, segurada do primeiro input até a publicação do tick
+        """
+        self.step = step
+        self.apply_input = apply_input
+        self.publish = publish
+        self.buffers = buffers
+        self.tick_dt = tick_dt
+        self.can_step = can_step
+        self.lock = lock if lock is not None else threading.RLock()
+        self.inputs = deque()
+        self.running = False
+        self.thread = None
+        self.tick_costs = deque(maxlen=240)
+
+    def post(self, key):
+        """
+        Enfileira uma tecla vinda do GLUT (chamado na thread de renderização).
+        """
+        self.inputs.append((key, time.perf_counter()))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        while self.running:
+            started = time.perf_counter()
+            with self.lock:
+                while self.inputs:
+                    key, timestamp = self.inputs.popleft()
+                    self.apply_input(key, timestamp)
+                if self.can_step():
+                    self.step()
+                index = self.buffers.begin_write()
+                self.publish(self.buffers.slots[index])
+                self.buffers.publish(index)
+            self.tick_costs.append(time.perf_counter() - started)
+
+            # Passo fixo: se atrasar, recuperar sem acumular atraso infinito
+            next_tick += self.tick_dt
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -0.25:
+                next_tick = time.perf_counter()
+
+    def tick_ms(self):
+        return 1000.0 * float(np.mean(self.tick_costs)) if self.tick_costs else 0.0
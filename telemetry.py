@@ -0,0 +1,185 @@
+"""
+Telemetria local: contadores, medidores e histogramas atualizados pelo laço
+de desenho/simulação e expostos por um servidor HTTP mínimo em uma thread
+asyncio de fundo, em formato de texto do Prometheus (/metrics) e em JSON
+(/metrics.json). Cada métrica tem um único escritor (a thread que a
+atualiza) e não usa travas; quem lê apenas copia os valores. Métricas caras
+(memória de texturas, placar) são funções avaliadas só quando alguém lê.
+"""
+import asyncio
+import bisect
+import json
+import threading
+
+PREFIX = "explorador_"
+
+
+# Classe para um contador que só cresce
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        return [(self.name, {}, self.value)]
+
+    def snapshot(self):
+        return self.value
+
+
+# Classe para um valor instantâneo, definido diretamente ou por uma função lida na coleta
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help_text, function=None):
+        self.name = name
+        self.help = help_text
+        self.function = function
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.function() if self.function is not None else self.value
+
+    def samples(self):
+        return [(self.name, {}, self.snapshot())]
+
+
+# Classe para um histograma com limites fixos
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets):
+        """
+        :param buckets: Limites superiores, em ordem crescente (o +Inf é implícito)
+        """
+        self.name = name
+        self.help = help_text
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        counts = list(self.counts)  # Cópia: o escritor pode seguir observando
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + [float("inf")], counts):
+            cumulative += count
+            label = "+Inf" if bound == float("inf") else f"{bound:g}"
+            samples.append((self.name + "_bucket", {"le": label}, cumulative))
+        samples.append((self.name + "_sum", {}, self.sum))
+        samples.append((self.name + "_count", {}, cumulative))
+        return samples
+
+    def snapshot(self):
+        counts = list(self.counts)
+        return {
+            "limites": self.bounds,
+            "contagens": counts,
+            "soma": self.sum,
+            "total": sum(counts),
+            "media": self.sum / self.count if self.count else 0.0,
+        }
+
+
+# Classe que reúne as métricas e gera as duas representações
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text):
+        return self._add(Counter(PREFIX + name, help_text))
+
+    def gauge(self, name, help_text, function=None):
+        return self._add(Gauge(PREFIX + name, help_text, function))
+
+    def histogram(self, name, help_text, buckets):
+        return self._add(Histogram(PREFIX + name, help_text, buckets))
+
+    def prometheus_text(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {metric.name[len(PREFIX):]: metric.snapshot() for metric in self.metrics}
+
+
+# Classe para o servidor HTTP de métricas em uma thread asyncio de fundo
+class MetricsServer:
+    def __init__(self, registry, host="127.0.0.1", port=9100):
+        """
+        :param registry: MetricsRegistry exposto
+        :param host: Endereço de escuta (só local por padrão)
+        :param port: Porta HTTP (0 = escolher uma livre)
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.scrapes = 0
+        self.loop = None
+        self.ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.ready.wait(5)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        print(f"Métricas em http://{self.host}:{self.port}/metrics e /metrics.json")
+        self.ready.set()
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Cabeçalhos ignorados
+            parts = request.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+            self.scrapes += 1
+            if path == "/metrics":
+                body = self.registry.prometheus_text().encode()
+                status, content_type = "200 OK", "text/plain; version=0.0.4"
+            elif path == "/metrics.json":
+                body = json.dumps(self.registry.snapshot(), ensure_ascii=False).encode()
+                status, content_type = "200 OK", "application/json"
+            else:
+                body = b"use /metrics ou /metrics.json\n"
+                status, content_type = "404 Not Found", "text/plain"
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
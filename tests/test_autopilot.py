@@ -0,0 +1,43 @@
+import itertools
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autopilot import intercept_indices, plan_route, route_time
+
+TIMES = np.arange(0.0, 60.0, 0.1)
+
+
+def still(points):
+    # Alvos parados: a mesma posição em todos os instantes da grade
+    return np.repeat(np.array(points, dtype=np.float64)[None], len(TIMES), axis=0)
+
+
+def test_intercept_is_first_instant_in_reach():
+    positions = still([(10.0, 0.0, 0.0), (0.0, 0.0, -30.0)])
+    arrivals = intercept_indices(np.zeros(3), 0, positions, TIMES, speed=2.0, reach=np.array([1.0, 1.0]))
+    assert np.allclose(TIMES[arrivals], [4.5, 14.5])
+    # Fora do horizonte da grade
+    assert intercept_indices(np.zeros(3), 0, still([(500.0, 0.0, 0.0)]), TIMES, 2.0, np.ones(1))[0] == -1
+
+
+def test_route_visits_every_target_in_fastest_order():
+    points = [(30.0, 0.0, 0.0), (-10.0, 0.0, 0.0), (10.0, 0.0, 0.0), (20.0, 0.0, 5.0)]
+    positions = still(points)
+    reach = np.full(len(points), 0.5)
+    start = np.zeros(3)
+    order = plan_route(start, positions, TIMES, 5.0, reach)
+    assert sorted(order) == list(range(len(points)))
+    best = min(route_time(list(p), start, positions, TIMES, 5.0, reach)
+               for p in itertools.permutations(range(len(points))))
+    assert route_time(order, start, positions, TIMES, 5.0, reach) == best
+
+
+def test_unreachable_targets_stay_in_the_route():
+    positions = still([(10.0, 0.0, 0.0), (1000.0, 0.0, 0.0), (-10.0, 0.0, 0.0)])
+    order = plan_route(np.zeros(3), positions, TIMES, 5.0, np.full(3, 0.5))
+    assert sorted(order) == [0, 1, 2]
+    assert order[-1] == 1
@@ -0,0 +1,43 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capture
+from capture import CaptureSession, FrameEncoder
+
+
+def test_video_without_ffmpeg_fails_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(capture.shutil, "which", lambda name: None)
+    with pytest.raises(FileNotFoundError, match="ffmpeg"):
+        FrameEncoder(str(tmp_path / "demo.mp4"), video=True)
+
+
+def test_stop_flushes_pending_frames_without_dropping(monkeypatch, tmp_path):
+    release = threading.Event()
+    written = []
+
+    def slow_png(self, frame):
+        release.wait()  # Codificador parado: a fila enche
+        written.append(frame[3])
+
+    monkeypatch.setattr(FrameEncoder, "_write_png", slow_png)
+    session = CaptureSession(str(tmp_path))
+    session.encoder.queue.maxsize = 1
+    session.encoder.submit((1, 1, b"\0\0\0", 0))
+    session.encoder.submit((1, 1, b"\0\0\0", 1))
+    # Sem contexto GL: os PBOs pendentes viram três quadros prontos
+    monkeypatch.setattr(session.reader, "flush", lambda: [(1, 1, b"\0\0\0", n) for n in (2, 3, 4)])
+    monkeypatch.setattr(session.reader, "release", lambda: None)
+    dropped_before = session.encoder.dropped
+
+    stopper = threading.Thread(target=session.stop)
+    stopper.start()
+    release.set()
+    stopper.join()
+    session.join()
+    assert session.encoder.dropped == dropped_before
+    assert {2, 3, 4} <= set(written)
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import impostors
+from impostors import ImpostorAtlas
+
+
+class Depth:
+    fovy = 60.0
+
+
+def atlas_without_gl(monkeypatch, **options):
+    # Sem contexto OpenGL: câmera na origem olhando para -z e espaços "renderizados" sem desenhar
+    monkeypatch.setattr(impostors, "glGetFloatv", lambda name: np.identity(4, dtype=np.float32))
+    atlas = ImpostorAtlas(Depth(), **options)
+    monkeypatch.setattr(atlas, "_render", lambda *args: True)
+    return atlas
+
+
+def distant(x):
+    matrix = np.identity(4)
+    matrix[3, :3] = (x, 0.0, -1000.0)  # Raio 1 a 1000 unidades: bem abaixo do limiar em pixels
+    return matrix
+
+
+def test_catalogue_larger_than_atlas_still_batches(monkeypatch):
+    atlas = atlas_without_gl(monkeypatch, slots_per_side=4, renders_per_frame=8)  # 16 espaços
+    keys = range(100)
+    for frame in range(len(keys) // 8):
+        atlas.begin_view("principal", 600, (0.0, 0.0, 0.0))
+        for key in keys[frame * 8:(frame + 1) * 8]:
+            assert atlas.draw(key, distant(key), 1.0, None)
+        assert len(atlas.batch) == 8
+        assert len({index for _, _, index in atlas.batch}) == 8  # Nenhum espaço repetido no lote
+    assert atlas.reclaimed == 96 - 16
+    assert len(atlas.slots) == 16
+
+
+def test_slots_in_the_current_view_are_not_reclaimed(monkeypatch):
+    atlas = atlas_without_gl(monkeypatch, slots_per_side=2, renders_per_frame=8)  # 4 espaços
+    atlas.begin_view("principal", 600, (0.0, 0.0, 0.0))
+    assert all(atlas.draw(key, distant(key), 1.0, None) for key in range(4))
+    assert not atlas.draw(4, distant(4), 1.0, None)
+
+    # Próxima vista: o corpo 4 toma o espaço menos usado recentemente
+    atlas.begin_view("principal", 600, (0.0, 0.0, 0.0))
+    for key in (1, 2, 3):
+        assert atlas.draw(key, distant(key), 1.0, None)
+    assert atlas.draw(4, distant(4), 1.0, None)
+    assert ("principal", 0) not in atlas.slots
@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from input_system import InputSystem
+
+
+def test_latency_is_measured_once_per_key():
+    controls = InputSystem()
+    controls.key_down('w', timestamp=1.0)
+    controls.frame_presented(timestamp=1.5)  # Nenhum tick consumiu a tecla ainda
+    assert controls.latency_stats() is None
+
+    assert controls.axes() == (1, 0, 0)
+    controls.frame_presented(timestamp=1.25)
+    controls.frame_presented(timestamp=2.0)
+    assert len(controls.latencies) == 1
+    assert controls.latency_stats()[0] == 250.0
+    assert controls.mean_ms == 250.0
+
+
+def test_no_stamp_is_lost_between_threads():
+    controls = InputSystem(latency_samples=100000)
+    presses = 20000
+
+    def simulation():
+        for i in range(presses):
+            controls.key_down('w', timestamp=0.0)
+            controls.key_up('w', timestamp=0.0)
+            controls.axes()
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Trocar de thread o mais perto possível de cada bytecode
+    try:
+        worker = threading.Thread(target=simulation)
+        worker.start()
+        while worker.is_alive():
+            controls.frame_presented(timestamp=1.0)
+    finally:
+        sys.setswitchinterval(interval)
+    controls.frame_presented(timestamp=1.0)
+    assert len(controls.latencies) == 2 * presses
@@ -0,0 +1,132 @@
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import network
+from network import (FRAME_HEADER, MSG_DELTA, MSG_KEYFRAME, MSG_RESYNC, MSG_WELCOME, NetworkClient, Snapshot,
+                     encode_frame, encode_json)
+
+
+def snapshot(tick, angles, values):
+    return Snapshot(tick, np.array(angles, dtype=np.uint16), np.array([3, 8], dtype=np.int32),
+                    np.array(values, dtype=np.int32))
+
+
+def payload(frame):
+    length, msg_type = FRAME_HEADER.unpack_from(frame)
+    assert len(frame) == FRAME_HEADER.size + length
+    return msg_type, frame[FRAME_HEADER.size:]
+
+
+def assert_same(a, b):
+    assert a.tick == b.tick
+    assert np.array_equal(a.angles, b.angles)
+    assert np.array_equal(a.player_ids, b.player_ids)
+    assert np.array_equal(a.player_values, b.player_values)
+
+
+def test_keyframe_round_trip():
+    snap = snapshot(120, [0, 65535, 1234], [[64, -128, 6400, 0], [-1, 2, 3, 65535]])
+    msg_type, body = payload(snap.encode_keyframe())
+    assert msg_type == MSG_KEYFRAME
+    assert_same(Snapshot.decode_keyframe(body), snap)
+
+
+def test_delta_round_trip_with_wrapped_angles():
+    base = snapshot(10, [65530, 100, 7], [[0, 0, 0, 65535], [5, 5, 5, 10]])
+    # Ângulos e yaw que passam de 65535 para 0 viram diferenças pequenas, não -65530
+    current = snapshot(12, [4, 100, 7], [[64, 0, -32, 2], [5, 5, 5, 10]])
+    frame = current.encode_delta(base)
+    msg_type, body = payload(frame)
+    assert msg_type == MSG_DELTA
+    # Só os 4 valores alterados vão no quadro, em int16
+    assert len(body) == network.DELTA_HEADER.size + 2 + 4 * 2
+    assert_same(Snapshot.decode_delta(body, base), current)
+
+
+def test_delta_falls_back_to_keyframe():
+    base = snapshot(10, [0, 0, 0], [[0, 0, 0, 0], [0, 0, 0, 0]])
+    far = snapshot(11, [0, 0, 0], [[40000, 0, 0, 0], [0, 0, 0, 0]])  # Fora do int16
+    assert far.encode_delta(base) is None
+    other_players = Snapshot(11, base.angles, np.array([3], dtype=np.int32), np.zeros((1, 4), dtype=np.int32))
+    assert other_players.encode_delta(base) is None
+
+
+def test_delta_on_wrong_base_is_rejected():
+    base = snapshot(10, [0, 0, 0], [[0, 0, 0, 0], [0, 0, 0, 0]])
+    _, body = payload(snapshot(11, [1, 0, 0], [[0, 0, 0, 0], [0, 0, 0, 0]]).encode_delta(base))
+    try:
+        Snapshot.decode_delta(body, snapshot(9, [0, 0, 0], [[0, 0, 0, 0], [0, 0, 0, 0]]))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("delta aceito sobre outra base")
+
+
+def read_frame(conn):
+    header = b''
+    while len(header) < FRAME_HEADER.size:
+        header += conn.recv(FRAME_HEADER.size - len(header))
+    length, msg_type = FRAME_HEADER.unpack(header)
+    body = b''
+    while len(body) < length:
+        body += conn.recv(length - len(body))
+    return msg_type, body
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_corrupt_frame_triggers_resync_and_keyframe_recovers():
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    accepted = {}
+
+    def serve():
+        conn, _ = listener.accept()
+        accepted['conn'] = conn
+        conn.sendall(encode_json(MSG_WELCOME, {'id': 3, 'tick_rate': 60, 'snapshot_rate': 20}))
+
+    server = threading.Thread(target=serve)
+    server.start()
+    client = NetworkClient('127.0.0.1', listener.getsockname()[1], object)
+    server.join()
+    conn = accepted['conn']
+    try:
+        base = snapshot(10, [0, 0, 0], [[0, 0, 0, 0], [0, 0, 0, 0]])
+        conn.sendall(base.encode_keyframe())
+        wait_for(lambda: client.last_snapshot is not None)
+
+        # Delta sobre uma base que o cliente não tem, seguido de um delta truncado
+        other = snapshot(20, [0, 0, 0], [[0, 0, 0, 0], [0, 0, 0, 0]])
+        conn.sendall(snapshot(21, [1, 0, 0], [[0, 0, 0, 0], [0, 0, 0, 0]]).encode_delta(other))
+        conn.sendall(encode_frame(MSG_DELTA, b'\x01\x02'))
+        assert read_frame(conn) == (MSG_RESYNC, b'')  # Pedido uma única vez
+        wait_for(lambda: client.resyncing)
+        assert client.thread.is_alive() and client.connected
+
+        conn.sendall(snapshot(30, [5, 0, 0], [[0, 0, 0, 0], [0, 0, 0, 0]]).encode_keyframe())
+        wait_for(lambda: not client.resyncing)
+        assert client.last_snapshot.tick == 30
+        conn.settimeout(0.2)
+        try:
+            extra = conn.recv(1)
+        except socket.timeout:
+            extra = None
+        assert extra is None  # Nenhum outro pedido de keyframe
+    finally:
+        conn.close()
+        listener.close()
+        client.thread.join(2.0)
+    assert not client.connected
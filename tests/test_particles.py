@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from particles import ParticleEmitter, ParticleSystem
+
+
+def check_layout(system):
+    live = np.flatnonzero(system.alive)
+    assert system.count == len(live)
+    assert system.high == (int(live[-1]) + 1 if len(live) else 0)
+    free = system.free[:system.free_count]
+    assert np.array_equal(np.sort(free)[::-1], free)  # Menores vagas no topo
+    assert len(free) + len(live) == system.capacity
+
+
+def test_continuous_emitter_keeps_live_range_compact():
+    system = ParticleSystem(capacity=20000, seed=3)
+    exhaust = ParticleEmitter(system, rate=900.0, speed=6.0, spread=0.8, lifetime=0.5, color=(1, 1, 1, 1))
+    dt = 1.0 / 60.0
+    for _ in range(600):
+        exhaust.emit(dt, (0.0, 0.0, 0.0), (0.0, 0.0, 1.0))
+        system.update(dt)
+        check_layout(system)
+    # Vidas de 0.3 a 0.5 s a 900/s: cerca de 450 vivas, e o trecho percorrido não se espalha
+    assert system.count <= 460
+    assert system.high < 2 * system.count
+
+
+def test_high_shrinks_when_top_of_range_dies():
+    system = ParticleSystem(capacity=1000, seed=1)
+    system.emit(100, (0, 0, 0), (0, 0, 0), 0.0, 10.0, (1, 1, 1, 1))
+    system.emit(100, (0, 0, 0), (0, 0, 0), 0.0, 0.1, (1, 1, 1, 1))
+    assert system.high == 200
+    system.update(0.2)  # Só as da segunda emissão morrem
+    check_layout(system)
+    assert system.high == 100
+
+
+def test_clear_releases_everything():
+    system = ParticleSystem(capacity=100, seed=2)
+    system.emit(60, (0, 0, 0), (0, 0, 0), 1.0, 1.0, (1, 1, 1, 1))
+    system.clear()
+    check_layout(system)
+    assert system.emit(100, (0, 0, 0), (0, 0, 0), 1.0, 1.0, (1, 1, 1, 1)) == 100
@@ -0,0 +1,97 @@
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay
+from replay import GAME_FLAGS, Recorder, Replay, SimulationState
+
+
+def sample_state(tick, game_over=False):
+    return SimulationState(np.arange(6) + tick, (1.0, 2.0, tick), 90.0, [3, 1], (0.5, 0.0, -0.5), "wq",
+                           game_over, 12.5 + tick)
+
+
+def test_keyframe_round_trip():
+    state = sample_state(7, game_over=True)
+    decoded, offset = SimulationState.decode(state.encode(), 0, 6)
+    assert offset == len(state.encode())
+    assert np.array_equal(decoded.angles, state.angles)
+    assert np.array_equal(decoded.position, state.position)
+    assert (decoded.yaw, decoded.visited, decoded.held) == (90.0, [3, 1], "wq")
+    assert decoded.game_over and decoded.elapsed == 19.5
+
+
+def test_version_3_keyframes_have_no_game_flags():
+    data = sample_state(0).encode()[:-GAME_FLAGS.size]
+    decoded, offset = SimulationState.decode(data, 0, 6, game_flags=False)
+    assert offset == len(data)
+    assert not decoded.game_over and decoded.elapsed is None
+
+
+def test_seek_restores_last_keyframe_and_replays_inputs(tmp_path):
+    path = str(tmp_path / "partida.rec")
+    recorder = Recorder(path, seed=5, n_angles=6, keyframe_interval=10, distance_scale=2.0)
+    recorder.record_keyframe(0, sample_state(0))
+    recorder.record_input(3, 'w')
+    recorder.record_keyframe(10, sample_state(10))
+    recorder.record_input(12, 'W')
+    recorder.close(20, sample_state(20, game_over=True))
+
+    class Game:
+        def __init__(self):
+            self.restored = []
+            self.inputs = []
+            self.steps = 0
+
+        def restore_state(self, state):
+            self.restored.append(state)
+
+        def apply_input(self, key):
+            self.inputs.append((self.steps, key))
+
+        def simulation_step(self):
+            self.steps += 1
+
+    recording = Replay(path)
+    assert (recording.seed, recording.distance_scale, recording.keyframe_ticks) == (5, 2.0, [0, 10, 20])
+    game = Game()
+    player = replay.ReplayPlayer(recording, game)
+    player.seek(15)
+    assert game.restored[-1].position[2] == 10
+    assert player.tick == 15 and game.inputs == [(2, 'W')]
+
+    player.seek(25)
+    assert game.restored[-1].game_over
+    assert not player.step()  # Fim da gravação
+
+
+def test_restore_brings_game_over_back_and_forth(monkeypatch):
+    import main as game
+    for name in ("game_over", "final_time", "start_time", "tempo_antes_pausa"):
+        monkeypatch.setattr(game, name, getattr(game, name))  # Devolvidos ao fim do teste
+    game.headless = True
+    if not game.planets:
+        random.seed(1)
+        game.create_celestial_bodies()
+    before = game.capture_state()
+    game.game_over, game.final_time = True, 42.0
+    crashed = game.capture_state()
+    assert crashed.game_over and crashed.elapsed == 42.0
+
+    game.restore_state(before)  # Voltar para antes da colisão com o Sol
+    assert not game.game_over and game.final_time == 0
+    game.restore_state(crashed)
+    assert game.game_over and game.final_time == 42.0
+
+    # Com a tela de fim de jogo, ',' e '.' ainda buscam no replay e ENTER não reinicia
+    seeks = []
+    seeker = type("Seeker", (), {"tick": 600, "seek": lambda self, tick: seeks.append(tick)})()
+    monkeypatch.setattr(game, "replay_player", seeker)
+    monkeypatch.setattr(game, "glutPostRedisplay", lambda: None)
+    game.keyboard(b',', 0, 0)
+    game.keyboard(b'\r', 0, 0)
+    assert seeks == [0] and game.game_over
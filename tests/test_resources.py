@@ -0,0 +1,56 @@
+import gc
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resources
+from resources import BUFFER, TEXTURE, ResourceRegistry
+
+
+class Owner:
+    pass
+
+
+def no_gl(monkeypatch):
+    monkeypatch.setattr(resources, "glDeleteTextures", lambda ids: None)
+    monkeypatch.setattr(resources, "glDeleteBuffers", lambda count, ids: None)
+
+
+def test_collected_owner_without_release_is_reported(monkeypatch):
+    no_gl(monkeypatch)
+    registry = ResourceRegistry()
+    owner = Owner()
+    registry.register(BUFFER, 12, 1024, "PBO de captura", owner=owner)
+    del owner
+    gc.collect()
+    assert registry.report()['vazamentos'] == ["PBO de captura (buffer 12)"]
+
+
+def test_released_resource_is_not_a_leak(monkeypatch):
+    no_gl(monkeypatch)
+    registry = ResourceRegistry()
+    owner = Owner()
+    registry.register(TEXTURE, 7, 4096, "FBO painel", owner=owner)
+    registry.release(TEXTURE, 7)
+    # O mesmo id reaproveitado por outro dono, que continua vivo
+    other = Owner()
+    registry.register(TEXTURE, 7, 4096, "FBO minimapa", owner=other)
+    del owner
+    gc.collect()
+    assert registry.report()['vazamentos'] == []
+    assert other is not None
+
+
+def test_dropped_capture_reader_is_reported(monkeypatch):
+    import capture
+    registry = ResourceRegistry()
+    monkeypatch.setattr(capture, "registry", registry)
+    monkeypatch.setattr(capture, "glGenBuffers", lambda count: [21, 22])
+    for name in ("glBindBuffer", "glBufferData"):
+        monkeypatch.setattr(capture, name, lambda *args: None)
+    reader = capture.PboReader(count=2)
+    reader._allocate(4, 4)
+    del reader  # Sessão descartada sem release()
+    gc.collect()
+    assert sorted(registry.report()['vazamentos']) == ["PBO de captura (buffer 21)", "PBO de captura (buffer 22)"]
@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import virtual_texture
+from virtual_texture import PageAtlas
+
+
+def no_gl(monkeypatch):
+    # Sem contexto OpenGL: os envios ao atlas viram operações vazias
+    for name in ("glBindTexture", "glPixelStorei", "glTexSubImage2D"):
+        monkeypatch.setattr(virtual_texture, name, lambda *args: None)
+
+
+def test_full_atlas_keeps_tiles_visible_in_previous_frame(monkeypatch):
+    no_gl(monkeypatch)
+    atlas = PageAtlas(slot_size=4, slots_per_side=2)
+    frame = 1
+    for i in range(4):
+        assert atlas.insert(("bloco", i), b"", frame)
+    # Quadro 1 desenhado: todos os blocos registrados como visíveis
+    for i in range(4):
+        assert atlas.lookup(("bloco", i), frame) is not None
+
+    # Quadro 2: update() avança o quadro antes de enviar os blocos novos
+    frame = 2
+    assert not atlas.insert(("novo", 0), b"", frame)
+    assert set(atlas.resident) == {("bloco", i) for i in range(4)}
+
+
+def test_full_atlas_evicts_tiles_not_drawn_recently(monkeypatch):
+    no_gl(monkeypatch)
+    atlas = PageAtlas(slot_size=4, slots_per_side=2)
+    for i in range(4):
+        atlas.insert(("bloco", i), b"", 1)
+    for i in range(1, 4):
+        atlas.lookup(("bloco", i), 5)  # O bloco 0 saiu da vista
+
+    assert atlas.insert(("novo", 0), b"", 6)
+    assert ("bloco", 0) not in atlas.resident
+    assert ("novo", 0) in atlas.resident
+
+
+def test_pinned_tiles_are_never_evicted(monkeypatch):
+    no_gl(monkeypatch)
+    atlas = PageAtlas(slot_size=4, slots_per_side=1)
+    atlas.insert(("raiz", 0), b"", 0, pinned=True)
+    assert not atlas.insert(("novo", 0), b"", 10)
+    atlas.remove(("raiz", 0))
+    assert atlas.insert(("novo", 0), b"", 10)
@@ -0,0 +1,279 @@
+"""
+Interface em modo retido: cada painel é um nó com uma marca de sujo que é
+desenhado uma única vez em uma textura própria (FBO com alfa) e, a cada
+quadro, composto na tela com um só quad texturizado. Só quando o conteúdo
+muda o painel é redesenhado. Textos longos são montados uma vez em uma
+textura alta e a rolagem apenas muda o trecho mostrado. Rótulos que mudam
+a cada quadro (contagens regressivas, marcadores que seguem a câmera) ficam
+em uma camada à parte, desenhada direto na tela, para não sujar o painel.
+"""
+from OpenGL.GL import *
+from OpenGL.GLU import *
+from OpenGL.GLUT import *
+
+from views import RenderTarget, draw_textured_quad
+
+FONT = GLUT_BITMAP_HELVETICA_18
+LINE_HEIGHT = 15  # Espaçamento vertical entre linhas
+PARAGRAPH_GAP = 5  # Espaço extra entre parágrafos
+
+
+# Função para escrever texto em coordenadas de pixel da projeção atual
+def bitmap_text(x, y, text, color):
+    glColor3f(*color)
+    glRasterPos2f(x, y)
+    for char in text:
+        glutBitmapCharacter(FONT, ord(char))
+
+
+# Classe base de um painel com textura própria
+class UiNode:
+    def __init__(self, name, background=None, border=False):
+        """
+        :param name: Nome do painel (mensagens de erro e registro de recursos)
+        :param background: Cor RGBA do fundo (None = transparente)
+        :param border: Desenhar uma moldura branca
+        """
+        self.target = RenderTarget(f"painel {name}", alpha=True)
+        self.background = background
+        self.border = border
+        self.width = 0
+        self.height = 0
+        self.dirty = True
+        self.renders = 0
+
+    def invalidate(self):
+        self.dirty = True
+
+    def resize(self, width, height):
+        if (width, height) != (self.width, self.height):
+            self.width, self.height = width, height
+            self.dirty = True
+
+    def paint(self):
+        """
+        Desenha o conteúdo em coordenadas do painel (0..largura, 0..altura).
+        """
+
+    def _paint_all(self):
+        glDisable(GL_LIGHTING)
+        glDisable(GL_TEXTURE_2D)
+        glDisable(GL_DEPTH_TEST)
+        if self.background is not None:
+            glColor4f(*self.background)
+            glBegin(GL_QUADS)
+            glVertex2f(0, 0)
+            glVertex2f(self.width, 0)
+            glVertex2f(self.width, self.height)
+            glVertex2f(0, self.height)
+            glEnd()
+        if self.border:
+            glColor4f(1, 1, 1, 1)
+            glBegin(GL_LINE_LOOP)
+            glVertex2f(0.5, 0.5)
+            glVertex2f(self.width - 0.5, 0.5)
+            glVertex2f(self.width - 0.5, self.height - 0.5)
+            glVertex2f(0.5, self.height - 0.5)
+            glEnd()
+        self.paint()
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_LIGHTING)
+
+    def _push_ortho(self, width, height, x=0, y=0):
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, width, 0, height)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        glTranslatef(x, y, 0)
+
+    def _pop_ortho(self):
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+
+    def refresh(self):
+        """
+        Redesenha a textura se o painel estiver sujo. Retorna False sem suporte a FBO.
+        """
+        if self.width <= 0 or self.height <= 0:
+            return False
+        if not self.dirty:
+            return self.target.available
+        if not self.target.ensure(self.width, self.height):
+            return False
+        viewport = glGetIntegerv(GL_VIEWPORT)
+        clear_color = glGetFloatv(GL_COLOR_CLEAR_VALUE)
+        self.target.bind()
+        glClearColor(0.0, 0.0, 0.0, 0.0)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self._push_ortho(self.width, self.height)
+        self._paint_all()
+        self._pop_ortho()
+        self.target.unbind()
+        glClearColor(*clear_color)
+        glViewport(*viewport)
+        self.dirty = False
+        self.renders += 1
+        return True
+
+    def draw(self, x, y, window_width, window_height):
+        """
+        Compõe o painel na tela com a origem (canto inferior esquerdo) em (x, y).
+        """
+        if self.refresh():
+            draw_textured_quad(self.target.texture_id, x, y, x + self.width, y + self.height,
+                               window_width, window_height, blend=True)
+        else:
+            # Sem FBO: desenhar diretamente, como antes
+            self._draw_direct(x, y, window_width, window_height)
+
+    def _draw_direct(self, x, y, window_width, window_height):
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self._push_ortho(window_width, window_height, x, y)
+        self._paint_all()
+        self._pop_ortho()
+        glDisable(GL_BLEND)
+
+
+# Classe para um painel de textos posicionados, redesenhado só quando os textos mudam
+class TextPanel(UiNode):
+    def __init__(self, name, background=None, border=False):
+        super().__init__(name, background, border)
+        self.items = []
+        self.pending = []
+
+    def begin(self, width, height):
+        """
+        Começa a montar o conteúdo deste quadro.
+        """
+        self.resize(width, height)
+        self.pending = []
+
+    def text(self, x, y, text, color=(1.0, 1.0, 1.0)):
+        self.pending.append((x, y, text, tuple(color)))
+
+    def draw(self, x, y, window_width, window_height):
+        if self.pending != self.items:
+            self.items = self.pending
+            self.dirty = True
+        super().draw(x, y, window_width, window_height)
+
+    def paint(self):
+        for x, y, text, color in self.items:
+            bitmap_text(x, y, text, color)
+
+
+# Classe para rótulos que mudam a cada quadro: desenhados direto, sem textura própria
+class LabelLayer(TextPanel):
+    def draw(self, x, y, window_width, window_height):
+        """
+        Poucos caracteres por quadro custam menos que limpar e recompor uma textura do tamanho da janela.
+        """
+        self.items = self.pending
+        if self.items:
+            self._draw_direct(x, y, window_width, window_height)
+
+
+# Classe para um bloco de texto montado uma vez em uma textura alta, com rolagem
+class ScrollText(UiNode):
+    def __init__(self, name, view_width, view_height, max_height=4096):
+        """
+        :param view_width: Largura da área visível
+        :param view_height: Altura da área visível
+        :param max_height: Altura máxima da textura do conteúdo
+        """
+        super().__init__(name)
+        self.view_width = view_width
+        self.view_height = view_height
+        self.max_height = max_height
+        self.lines = []
+        self.key = None
+        self.offset = 0
+
+    def set_lines(self, key, lines):
+        """
+        :param key: Identifica o conteúdo exibido
+        :param lines: Linhas já quebradas ("" separa parágrafos)
+        """
+        self.key = key
+        self.lines = lines
+        self.offset = 0
+        self.dirty = True
+        height = 10
+        for line in lines:
+            height += LINE_HEIGHT + PARAGRAPH_GAP if line.strip() == "" else LINE_HEIGHT
+        self.resize(self.view_width, max(self.view_height, min(height, self.max_height)))
+
+    @property
+    def max_offset(self):
+        return max(0, self.height - self.view_height)
+
+    def scroll(self, pixels):
+        self.offset = min(max(self.offset + pixels, 0), self.max_offset)
+
+    def paint(self):
+        y = self.height - LINE_HEIGHT
+        for line in self.lines:
+            if line.strip() == "":
+                y -= LINE_HEIGHT + PARAGRAPH_GAP
+                continue
+            bitmap_text(0, y, line, (1.0, 1.0, 1.0))
+            y -= LINE_HEIGHT
+
+    def draw(self, x, y, window_width, window_height):
+        if self.refresh():
+            # Mostrar só a janela [topo - deslocamento - altura visível, topo - deslocamento]
+            top = self.height - self.offset
+            uv = (0.0, (top - self.view_height) / self.height, 1.0, top / self.height)
+            draw_textured_quad(self.target.texture_id, x, y, x + self.view_width, y + self.view_height,
+                               window_width, window_height, uv=uv, blend=True)
+        else:
+            glEnable(GL_SCISSOR_TEST)
+            glScissor(int(x), int(y), self.view_width, self.view_height)
+            glEnable(GL_BLEND)
+            glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+            self._push_ortho(window_width, window_height, x, y + self.view_height - self.height + self.offset)
+            self._paint_all()
+            self._pop_ortho()
+            glDisable(GL_BLEND)
+            glDisable(GL_SCISSOR_TEST)
+
+
+# Classe para a tela de informações: moldura fixa e texto com rolagem
+class InfoScreen:
+    def __init__(self, wrap, width=700, height=500):
+        """
+        :param wrap: Função que quebra o texto em linhas
+        """
+        self.wrap = wrap
+        self.frame = TextPanel("informações", background=(0.0, 0.0, 0.0, 0.8), border=True)
+        self.body = ScrollText("texto das informações", width - 20, height - 90)
+        self.width = width
+        self.height = height
+
+    def show(self, key, text):
+        """
+        :param key: Objeto exibido; o texto só é quebrado e montado quando ele muda
+        """
+        if key is not self.body.key:
+            self.body.set_lines(key, self.wrap(text))
+
+    def scroll(self, pixels):
+        self.body.scroll(pixels)
+
+    def draw(self, window_width, window_height):
+        x = (window_width - self.width) // 2
+        y = (window_height - self.height) // 2
+        self.frame.begin(self.width, self.height)
+        footer = "Pressione ESC para fechar."
+        if self.body.max_offset > 0:
+            footer += " Setas ou roda do mouse para rolar."
+        self.frame.text(10, 20, footer)
+        self.frame.draw(x, y, window_width, window_height)
+        self.body.draw(x + 10, y + 50, window_width, window_height)
@@ -0,0 +1,245 @@
+import time
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+from resources import RENDERBUFFER, TEXTURE, registry, texture_bytes
+
+
+# Classe para um alvo de renderização fora da tela (FBO com textura de cor e profundidade)
+class RenderTarget:
+    def __init__(self, name, alpha=False, float_depth=False):
+        """
+        :param name: Nome usado nas mensagens de erro
+        :param alpha: Textura de cor com canal alfa (painéis da interface)
+        :param float_depth: Profundidade em float de 32 bits (cena com profundidade invertida)
+        """
+        self.name = name
+        self.alpha = alpha
+        self.float_depth = float_depth
+        self.fbo = None
+        self.texture_id = None
+        self.depth_buffer = None
+        self.width = 0
+        self.height = 0
+        self.available = True
+        self.previous = 0
+
+    def ensure(self, width, height):
+        """
+        Cria ou redimensiona o FBO. Retorna False se FBOs não forem suportados.
+        """
+        if not self.available:
+            return False
+        if self.fbo is not None and (width, height) == (self.width, self.height):
+            return True
+        try:
+            if self.texture_id is None:
+                self.texture_id = glGenTextures(1)
+                self.depth_buffer = glGenRenderbuffers(1)
+                self.fbo = glGenFramebuffers(1)
+            glBindTexture(GL_TEXTURE_2D, self.texture_id)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            format = GL_RGBA if self.alpha else GL_RGB
+            glTexImage2D(GL_TEXTURE_2D, 0, format, width, height, 0, format, GL_UNSIGNED_BYTE, None)
+
+            glBindRenderbuffer(GL_RENDERBUFFER, self.depth_buffer)
+            depth_format = GL_DEPTH_COMPONENT32F if self.float_depth else GL_DEPTH_COMPONENT24
+            glRenderbufferStorage(GL_RENDERBUFFER, depth_format, width, height)
+
+            previous = glGetIntegerv(GL_FRAMEBUFFER_BINDING)
+            glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+            glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.texture_id, 0)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth_buffer)
+            status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+            glBindFramebuffer(GL_FRAMEBUFFER, previous)
+            if status != GL_FRAMEBUFFER_COMPLETE:
+                raise RuntimeError(f"FBO incompleto (status {status})")
+            registry.register(TEXTURE, self.texture_id, texture_bytes(width, height, 4 if self.alpha else 3),
+                              f"FBO {self.name} (cor)", owner=self)
+            registry.register(RENDERBUFFER, self.depth_buffer, width * height * (4 if self.float_depth else 3),
+                              f"FBO {self.name} (profundidade)", owner=self)
+            self.width = width
+            self.height = height
+            return True
+        except Exception as e:
+            print(f"Erro ao criar FBO ({self.name}): {e}")
+            self.available = False
+            return False
+
+    def bind(self):
+        # Guardar o FBO atual para permitir alvos aninhados (ex.: janela oculta)
+        self.previous = glGetIntegerv(GL_FRAMEBUFFER_BINDING)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.width, self.height)
+
+    def unbind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.previous)
+
+
+# Função para testar se uma esfera na origem do modelo atual está no volume de visão
+def sphere_in_view(radius):
+    modelview = np.array(glGetDoublev(GL_MODELVIEW_MATRIX)).reshape(4, 4)
+    projection = np.array(glGetDoublev(GL_PROJECTION_MATRIX)).reshape(4, 4)
+    mvp = (modelview @ projection).T  # Matrizes do OpenGL vêm em ordem de coluna
+    for axis in range(3):
+        for sign in (1.0, -1.0):
+            plane = mvp[3] + sign * mvp[axis]
+            if plane[3] / np.linalg.norm(plane[:3]) < -radius:
+                return False
+    return True
+
+
+# Função para desenhar uma textura como um quad em coordenadas de janela
+def draw_textured_quad(texture_id, x0, y0, x1, y1, window_width, window_height, border=False,
+                       uv=(0.0, 0.0, 1.0, 1.0), blend=False):
+    """
+    :param uv: Retângulo da textura a mostrar (u0, v0, u1, v1)
+    :param blend: Misturar pelo alfa da textura (painéis da interface)
+    """
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    gluOrtho2D(0, window_width, 0, window_height)
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+
+    glDisable(GL_DEPTH_TEST)
+    glDisable(GL_LIGHTING)
+    glEnable(GL_TEXTURE_2D)
+    glBindTexture(GL_TEXTURE_2D, texture_id)
+    glColor3f(1.0, 1.0, 1.0)
+    if blend:
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+    u0, v0, u1, v1 = uv
+    glBegin(GL_QUADS)
+    glTexCoord2f(u0, v0)
+    glVertex2f(x0, y0)
+    glTexCoord2f(u1, v0)
+    glVertex2f(x1, y0)
+    glTexCoord2f(u1, v1)
+    glVertex2f(x1, y1)
+    glTexCoord2f(u0, v1)
+    glVertex2f(x0, y1)
+    glEnd()
+
+    if blend:
+        glDisable(GL_BLEND)
+
+    if border:
+        # Moldura
+        glDisable(GL_TEXTURE_2D)
+        glBegin(GL_LINE_LOOP)
+        glVertex2f(x0, y0)
+        glVertex2f(x1, y0)
+        glVertex2f(x1, y1)
+        glVertex2f(x0, y1)
+        glEnd()
+
+    glEnable(GL_TEXTURE_2D)
+    glEnable(GL_DEPTH_TEST)
+    glEnable(GL_LIGHTING)
+
+    glPopMatrix()
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+
+
+# Classe para medir o tempo de GPU de um quadro sem bloquear (GL_TIME_ELAPSED)
+class GpuTimer:
+    def __init__(self, count=3):
+        """
+        :param count: Consultas em rodízio; o resultado lido é de quadros anteriores
+        """
+        self.count = count
+        self.queries = None
+        self.pending = []
+        self.index = 0
+        self.available = True
+        self.active = False
+        self.last_ms = None
+
+    def begin(self):
+        self.active = False
+        if not self.available:
+            return
+        try:
+            if self.queries is None:
+                self.queries = list(glGenQueries(self.count))
+            query = self.queries[self.index]
+            if query in self.pending:
+                if not glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE):
+                    return  # Resultado antigo ainda não chegou: não medir este quadro
+                self.last_ms = glGetQueryObjectui64v(query, GL_QUERY_RESULT) / 1e6
+                self.pending.remove(query)
+            glBeginQuery(GL_TIME_ELAPSED, query)
+            self.active = True
+        except Exception as e:
+            print(f"Consultas de tempo de GPU indisponíveis: {e}")
+            self.available = False
+
+    def end(self):
+        if not self.active:
+            return
+        glEndQuery(GL_TIME_ELAPSED)
+        self.pending.append(self.queries[self.index])
+        self.index = (self.index + 1) % self.count
+
+
+# Classe para o minimapa renderizado em um FBO de baixa resolução
+class Minimap:
+    def __init__(self, size=256, refresh_hz=10, display_size=200, margin=10):
+        """
+        :param size: Resolução (quadrada) do FBO do minimapa
+        :param refresh_hz: Quantas vezes por segundo o minimapa é redesenhado
+        :param display_size: Tamanho do minimapa na tela (pixels)
+        :param margin: Distância das bordas da janela (pixels)
+        """
+        self.size = size
+        self.refresh_interval = 1.0 / refresh_hz
+        self.display_size = display_size
+        self.margin = margin
+        self.target = RenderTarget("minimapa", float_depth=True)
+        self.last_refresh = None
+
+    @property
+    def available(self):
+        return self.target.available
+
+    def invalidate(self):
+        self.last_refresh = None
+
+    def needs_refresh(self):
+        return self.last_refresh is None or time.perf_counter() - self.last_refresh >= self.refresh_interval
+
+    def render(self, draw_scene):
+        """
+        Redesenha o minimapa no FBO.
+        :param draw_scene: Função (largura, altura) que desenha a cena da vista de cima
+        """
+        if not self.target.ensure(self.size, self.size):
+            return
+        self.target.bind()
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        draw_scene(self.size, self.size)
+        self.target.unbind()
+        self.last_refresh = time.perf_counter()
+
+    def composite(self, window_width, window_height):
+        """
+        Desenha a textura do minimapa no canto inferior direito com um único quad.
+        """
+        if self.target.texture_id is None or not self.available:
+            return
+        x0 = window_width - self.display_size - self.margin
+        y0 = self.margin
+        draw_textured_quad(self.target.texture_id, x0, y0, x0 + self.display_size, y0 + self.display_size,
+                           window_width, window_height, border=True)
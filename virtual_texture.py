@@ -0,0 +1,450 @@
+"""
+Textura virtual em blocos para mapas de planetas de altíssima resolução.
+
+O mapa (equirretangular, 2:1) é dividido previamente em uma pirâmide de
+mipmaps em blocos no disco. Ao desenhar, cada planeta percorre uma árvore
+de blocos, escolhe o nível de cada região pelo tamanho na tela, descarta o
+que está atrás do horizonte ou fora da vista e pede os blocos que faltam.
+Os blocos são lidos em threads de fundo e enviados a um atlas físico
+compartilhado (uma textura de tamanho fixo) com descarte LRU; enquanto um
+bloco não chega, a região usa o ancestral que já está no atlas. A memória
+fica limitada pelo atlas e pela fila de leitura, não pelo tamanho do mapa.
+
+Preparar os blocos: python virtual_texture.py textures/earth.jpg [--tile 256]
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+from OpenGL.GL import *
+
+from resources import TEXTURE, registry, texture_bytes
+
+TILE_BORDER = 1  # Texels copiados dos vizinhos em cada lado, para filtrar sem costuras
+TILE_DIR = os.path.join("textures", "vt")
+
+
+# Função para dividir um mapa em uma pirâmide de blocos no disco
+def build_pyramid(source, output_dir, tile_size=256, quality=90):
+    """
+    Nível 0 tem 2x1 blocos; cada nível seguinte dobra a resolução até a da imagem de origem.
+    :return: Número de níveis gerados
+    """
+    Image.MAX_IMAGE_PIXELS = None  # Mapas de 16K ou mais são esperados aqui
+    image = Image.open(source).convert("RGB")
+    levels = 1
+    while 2 * tile_size * 2 ** levels <= image.width:
+        levels += 1
+
+    # Do nível mais fino para o mais grosso, reduzindo pela metade a cada passo
+    width, height = 2 * tile_size * 2 ** (levels - 1), tile_size * 2 ** (levels - 1)
+    if image.size != (width, height):
+        image = image.resize((width, height), Image.LANCZOS)
+    for level in reversed(range(levels)):
+        level_dir = os.path.join(output_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        pixels = np.asarray(image)
+        # Borda: longitude dá a volta, latitude repete a última linha
+        padded = np.pad(pixels, ((TILE_BORDER, TILE_BORDER), (0, 0), (0, 0)), mode="edge")
+        padded = np.pad(padded, ((0, 0), (TILE_BORDER, TILE_BORDER), (0, 0)), mode="wrap")
+        step = tile_size
+        size = tile_size + 2 * TILE_BORDER
+        for ty in range(image.height // step):
+            for tx in range(image.width // step):
+                tile = padded[ty * step:ty * step + size, tx * step:tx * step + size]
+                Image.fromarray(tile).save(os.path.join(level_dir, f"{tx}_{ty}.jpg"), quality=quality)
+        if level > 0:
+            image = image.reduce(2)
+
+    with open(os.path.join(output_dir, "meta.json"), "w") as f:
+        json.dump({"tile_size": tile_size, "levels": levels, "border": TILE_BORDER}, f)
+    return levels
+
+
+# Classe para o atlas físico compartilhado, com descarte LRU
+class PageAtlas:
+    def __init__(self, slot_size, slots_per_side=8):
+        """
+        :param slot_size: Tamanho de um bloco com borda (texels)
+        :param slots_per_side: Atlas com slots_per_side² blocos
+        """
+        self.slot_size = slot_size
+        self.slots_per_side = slots_per_side
+        self.size = slot_size * slots_per_side
+        self.texture_id = None
+        self.free = list(range(slots_per_side * slots_per_side))
+        self.resident = OrderedDict()  # chave do bloco -> slot, do menos para o mais recente
+        self.pinned = set()
+        self.last_used = {}
+
+    def create(self):
+        self.texture_id = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture_id)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, self.size, self.size, 0, GL_RGB, GL_UNSIGNED_BYTE, None)
+        registry.register(TEXTURE, self.texture_id, texture_bytes(self.size, self.size), "atlas de textura virtual",
+                          owner=self)
+
+    def lookup(self, key, frame):
+        slot = self.resident.get(key)
+        if slot is not None:
+            self.resident.move_to_end(key)
+            self.last_used[key] = frame
+        return slot
+
+    def insert(self, key, data, frame, pinned=False):
+        """
+        Envia um bloco ao atlas. Retorna False se todos os slots estão em uso.
+        :param frame: Quadro atual; os blocos desenhados no quadro anterior (a visibilidade é
+                      registrada depois do envio) ou neste não são descartados
+        """
+        if key in self.resident:
+            return True
+        if self.free:
+            slot = self.free.pop()
+        else:
+            victim = next((k for k in self.resident
+                           if k not in self.pinned and self.last_used.get(k, -1) < frame - 1), None)
+            if victim is None:
+                return False
+            slot = self.resident.pop(victim)
+            self.last_used.pop(victim, None)
+        x, y = self.slot_origin(slot)
+        glBindTexture(GL_TEXTURE_2D, self.texture_id)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexSubImage2D(GL_TEXTURE_2D, 0, x, y, self.slot_size, self.slot_size, GL_RGB, GL_UNSIGNED_BYTE, data)
+        self.resident[key] = slot
+        self.last_used[key] = frame
+        if pinned:
+            self.pinned.add(key)
+        return True
+
+    def remove(self, key):
+        """
+        Devolve o slot de um bloco aos livres (inclusive blocos fixos).
+        """
+        slot = self.resident.pop(key, None)
+        if slot is not None:
+            self.free.append(slot)
+        self.last_used.pop(key, None)
+        self.pinned.discard(key)
+
+    def slot_origin(self, slot):
+        return (slot % self.slots_per_side) * self.slot_size, (slot // self.slots_per_side) * self.slot_size
+
+
+# Classe para ler blocos do disco em segundo plano
+class TileLoader:
+    def __init__(self, workers=2, max_pending=32):
+        """
+        :param workers: Threads de leitura/decodificação
+        :param max_pending: Limite de blocos pedidos ou decodificados aguardando envio
+        """
+        self.max_pending = max_pending
+        self.requests = queue.LifoQueue()  # Pedidos mais recentes primeiro (vista atual)
+        self.results = queue.Queue()
+        self.wanted = {}  # chave -> último quadro em que foi pedida
+        self.lock = threading.Lock()
+        self.frame = 0
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def request(self, key, path):
+        with self.lock:
+            if key in self.wanted:
+                self.wanted[key] = self.frame
+                return
+            if len(self.wanted) >= self.max_pending:
+                return  # Pedido de novo no próximo quadro, se ainda for visível
+            self.wanted[key] = self.frame
+        self.requests.put((key, path))
+
+    def _work(self):
+        while True:
+            key, path = self.requests.get()
+            with self.lock:
+                stale = self.wanted.get(key, -1) < self.frame - 2
+                if stale:
+                    self.wanted.pop(key, None)
+            if stale:
+                continue  # Saiu da vista antes de ser lido
+            try:
+                data = Image.open(path).convert("RGB").tobytes()
+            except OSError as e:
+                print(f"Erro ao ler bloco {path}: {e}")
+                data = None
+            self.results.put((key, data))
+
+    def finished(self, key):
+        with self.lock:
+            self.wanted.pop(key, None)
+
+    def pending(self):
+        return len(self.wanted)
+
+
+# Classe que junta o atlas, o leitor e as texturas virtuais dos planetas
+class VirtualTextureCache:
+    def __init__(self, slots_per_side=8, uploads_per_frame=4, pinned_fraction=0.5):
+        """
+        :param slots_per_side: Tamanho do atlas em blocos por lado (limite de VRAM)
+        :param uploads_per_frame: Blocos enviados à GPU por quadro, no máximo
+        :param pinned_fraction: Fração do atlas que os níveis 0 fixos podem ocupar (o resto é dos blocos
+                                lidos sob demanda); texturas além disso usam a textura comum
+        """
+        self.pinned_fraction = pinned_fraction
+        self.slots_per_side = slots_per_side
+        self.uploads_per_frame = uploads_per_frame
+        self.atlas = None
+        self.loader = TileLoader()
+        self.frame = 0
+        self.textures = []
+
+    def open(self, texture_file, color=(1.0, 1.0, 1.0)):
+        """
+        Abre a pirâmide de blocos de uma textura (textures/vt/<nome>/), se existir.
+        :param color: Cor lisa usada se nenhum bloco da região estiver no atlas
+        :return: VirtualTexture ou None
+        """
+        name = os.path.splitext(os.path.basename(texture_file))[0]
+        directory = os.path.join(TILE_DIR, name)
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        slot_size = meta["tile_size"] + 2 * meta["border"]
+        if self.atlas is None:
+            self.atlas = PageAtlas(slot_size, self.slots_per_side)
+            self.atlas.create()
+        elif self.atlas.slot_size != slot_size:
+            print(f"Blocos de {name} com tamanho diferente do atlas; usando a textura comum")
+            return None
+        if len(self.atlas.pinned) + 2 > self.pinned_fraction * self.slots_per_side ** 2:
+            print(f"Atlas de textura virtual cheio; {name} usa a textura comum")
+            return None
+        texture = VirtualTexture(self, len(self.textures), directory, meta, color)
+        # O nível 0 fica sempre no atlas: é o último recurso enquanto blocos chegam
+        roots = [texture.key(0, tx, 0) for tx in range(2)]
+        for tx, key in enumerate(roots):
+            try:
+                data = Image.open(texture.tile_path(0, tx, 0)).convert("RGB").tobytes()
+            except OSError as e:
+                data = None
+                print(f"Erro ao ler bloco de {name}: {e}")
+            if data is None or not self.atlas.insert(key, data, self.frame, pinned=True):
+                for root in roots:
+                    self.atlas.remove(root)
+                print(f"Nível 0 de {name} fora do atlas; usando a textura comum")
+                return None
+        self.textures.append(texture)
+        return texture
+
+    def update(self):
+        """
+        Chamado uma vez por quadro: envia ao atlas os blocos já decodificados.
+        """
+        self.frame += 1
+        self.loader.frame = self.frame
+        for _ in range(self.uploads_per_frame):
+            try:
+                key, data = self.loader.results.get_nowait()
+            except queue.Empty:
+                break
+            self.loader.finished(key)
+            if data is not None and not self.atlas.insert(key, data, self.frame):
+                break  # Atlas cheio com blocos visíveis: o bloco é pedido de novo depois
+
+    def stats(self):
+        if self.atlas is None:
+            return None
+        return len(self.atlas.resident), self.slots_per_side ** 2, self.loader.pending()
+
+
+# Classe para a textura virtual de um planeta
+class VirtualTexture:
+    def __init__(self, cache, texture_index, directory, meta, color=(1.0, 1.0, 1.0)):
+        self.cache = cache
+        self.color = color
+        self.index = texture_index
+        self.directory = directory
+        self.tile_size = meta["tile_size"]
+        self.levels = meta["levels"]
+        self.border = meta["border"]
+
+    def key(self, level, tx, ty):
+        return self.index, level, tx, ty
+
+    def tile_path(self, level, tx, ty):
+        return os.path.join(self.directory, str(level), f"{tx}_{ty}.jpg")
+
+    def draw(self, radius, slices=50):
+        """
+        Desenha a esfera (mesma orientação e coordenadas de textura do gluSphere)
+        com a matriz de modelo atual.
+        :param slices: Tesselação de referência; cada bloco recebe uma fração dela
+        """
+        modelview = np.array(glGetDoublev(GL_MODELVIEW_MATRIX)).reshape(4, 4)
+        projection = np.array(glGetDoublev(GL_PROJECTION_MATRIX)).reshape(4, 4)
+        viewport = glGetIntegerv(GL_VIEWPORT)
+        # Matrizes do OpenGL vêm em ordem de coluna: transpor para v' = M @ v
+        mvp = (modelview @ projection).T
+        eye = np.linalg.inv(modelview.T) @ np.array([0.0, 0.0, 0.0, 1.0])
+        focal_px = viewport[3] * 0.5 * projection[1][1]
+
+        patches = []
+        for tx in range(2):
+            self._select(0, tx, 0, radius, eye[:3], mvp, focal_px, patches)
+
+        atlas = self.cache.atlas
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, atlas.texture_id)
+        registry.touch(TEXTURE, atlas.texture_id)
+        glColor3f(1.0, 1.0, 1.0)
+        for level, tx, ty in patches:
+            self._draw_patch(level, tx, ty, radius, max(2, slices >> (level + 1)))
+        glDisable(GL_TEXTURE_2D)
+
+    def _bounds(self, level, tx, ty):
+        # Região do bloco no mapa: u para a direita, v para baixo (linhas da imagem)
+        cols, rows = 2 << level, 1 << level
+        return tx / cols, (tx + 1) / cols, ty / rows, (ty + 1) / rows
+
+    def _select(self, level, tx, ty, radius, eye, mvp, focal_px, patches):
+        u0, u1, v0, v1 = self._bounds(level, tx, ty)
+        samples = sphere_points(radius, np.array([u0, (u0 + u1) / 2, u1]), np.array([v0, (v0 + v1) / 2, v1]))
+        normals = samples / radius
+        center = normals[4]
+
+        # Horizonte: o cone que envolve o bloco não alcança a calota visível da câmera
+        eye_distance = np.linalg.norm(eye)
+        if eye_distance > radius:
+            spread = np.arccos(np.clip(normals @ center, -1.0, 1.0)).max()
+            visible = math.acos(radius / eye_distance)
+            if math.acos(np.clip(center @ eye / eye_distance, -1.0, 1.0)) > spread + visible + 0.05:
+                return
+
+        # Fora da vista: esfera envolvente atrás de algum plano do volume de visão
+        middle = samples.mean(axis=0)
+        bound = np.linalg.norm(samples - middle, axis=1).max() * 1.25
+        for axis in range(3):
+            for sign in (1.0, -1.0):
+                plane = mvp[3] + sign * mvp[axis]
+                if (plane[:3] @ middle + plane[3]) / np.linalg.norm(plane[:3]) < -bound:
+                    return
+
+        # Tamanho na tela do lado do bloco contra os texels que o nível oferece
+        edge = radius * math.pi / (1 << level)
+        distance = max(np.min(np.linalg.norm(samples - eye, axis=1)), 1e-3)
+        if edge * focal_px / distance > self.tile_size and level + 1 < self.levels:
+            for dy in range(2):
+                for dx in range(2):
+                    self._select(level + 1, 2 * tx + dx, 2 * ty + dy, radius, eye, mvp, focal_px, patches)
+            return
+        patches.append((level, tx, ty))
+
+    def _draw_patch(self, level, tx, ty, radius, segments):
+        cache = self.cache
+        atlas = cache.atlas
+        slot = atlas.lookup(self.key(level, tx, ty), cache.frame)
+        source = (level, tx, ty)
+        if slot is None:
+            cache.loader.request(self.key(level, tx, ty), self.tile_path(level, tx, ty))
+            # Usar o ancestral mais próximo que já está no atlas
+            while slot is None and source[0] > 0:
+                source = (source[0] - 1, source[1] // 2, source[2] // 2)
+                slot = atlas.lookup(self.key(*source), cache.frame)
+
+        u0, u1, v0, v1 = self._bounds(level, tx, ty)
+        us = np.linspace(u0, u1, segments + 1)
+        vs = np.linspace(v0, v1, segments + 1)
+        points = sphere_points(radius, us, vs)
+        normals = np.ascontiguousarray(points / radius, dtype=np.float32)
+        if slot is None:
+            # Nem o nível 0 está no atlas: cor lisa, sem textura
+            glDisable(GL_TEXTURE_2D)
+            glColor3f(*self.color)
+            self._draw_grid(points, normals, None, segments)
+            glColor3f(1.0, 1.0, 1.0)
+            glEnable(GL_TEXTURE_2D)
+            return
+
+        su0, su1, sv0, sv1 = self._bounds(*source)
+        ox, oy = atlas.slot_origin(slot)
+        inner = self.tile_size / atlas.size
+        s = (ox + self.border) / atlas.size + (us - su0) / (su1 - su0) * inner
+        t = (oy + self.border) / atlas.size + (vs - sv0) / (sv1 - sv0) * inner
+        texcoords = np.stack(np.meshgrid(s, t), axis=-1).reshape(-1, 2).astype(np.float32)
+        self._draw_grid(points, normals, texcoords, segments)
+
+    def _draw_grid(self, points, normals, texcoords, segments):
+        # Um único glDrawElements por bloco, com arrays de vértices
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, points.astype(np.float32))
+        glNormalPointer(GL_FLOAT, 0, normals)
+        if texcoords is not None:
+            glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+            glTexCoordPointer(2, GL_FLOAT, 0, texcoords)
+        indices = grid_indices(segments)
+        glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_INT, indices)
+        if texcoords is not None:
+            glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+
+_grid_indices = {}
+
+
+# Função para os índices dos triângulos de uma grade (segments x segments), em cache
+def grid_indices(segments):
+    indices = _grid_indices.get(segments)
+    if indices is None:
+        row = segments + 1
+        j, i = np.meshgrid(np.arange(segments), np.arange(segments), indexing="ij")
+        a = (j * row + i).ravel()
+        b, c, d = a + 1, a + row, a + row + 1
+        indices = np.stack([a, c, b, b, c, d], axis=1).ravel().astype(np.uint32)
+        _grid_indices[segments] = indices
+    return indices
+
+
+# Função para os pontos da esfera nas coordenadas de textura do gluSphere
+def sphere_points(radius, us, vs):
+    """
+    s (= u) vai de +y para +x; t (= 1 - v) vai de -z a +z.
+    :return: Matriz (len(vs) * len(us), 3)
+    """
+    theta = 2 * math.pi * us
+    phi = math.pi * vs
+    sin_phi = np.sin(phi)[:, None]
+    x = radius * sin_phi * np.sin(theta)[None, :]
+    y = radius * sin_phi * np.cos(theta)[None, :]
+    z = radius * np.cos(phi)[:, None] * np.ones_like(theta)[None, :]
+    return np.stack([x, y, z], axis=-1).reshape(-1, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Divide mapas de planetas em blocos para textura virtual")
+    parser.add_argument("sources", nargs="+", help="Mapas equirretangulares (ex.: textures/earth.jpg)")
+    parser.add_argument("--tile", type=int, default=256, help="Tamanho do bloco em texels")
+    parser.add_argument("--output", default=TILE_DIR, help="Diretório das pirâmides")
+    args = parser.parse_args()
+    for source in args.sources:
+        name = os.path.splitext(os.path.basename(source))[0]
+        levels = build_pyramid(source, os.path.join(args.output, name), args.tile)
+        print(f"{source}: {levels} níveis em {os.path.join(args.output, name)}")
+
+
+if __name__ == "__main__":
+    main()